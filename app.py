@@ -1,60 +1,288 @@
 # app.py
-from flask import Flask, request, jsonify, render_template
-from transformers import pipeline
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
 import docker
-import re
+import os
 import json
-from typing import Dict, List, Tuple
+import time
+import atexit
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
+from inference import MicroBatcher, load_classifier
+from intent_router import IntentRouter
+from entities import EntityExtractor, parse_image_ref
+from docker_jobs import JobManager
+from container_inventory import ContainerInventory
+from docker_bulk import run_bulk, select_containers
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class DockerManager:
+    # Operations that can take seconds (image pulls, stop grace periods) run as jobs
+    LONG_ACTIONS = {"run_container", "stop_container", "restart_container", "remove_container", "pull_image"}
+    # Intents that act on a set of containers when the command names a selector
+    BULK_INTENTS = {"stop_container": "stop", "restart_container": "restart", "remove_container": "remove"}
+    STATUS_WORDS = {"running": "running", "stopped": "exited", "exited": "exited",
+                    "paused": "paused", "created": "created"}
+
     def __init__(self):
+        # Connect on first use so the web process starts without waiting on the daemon
+        self._client = None
+        self._client_lock = threading.Lock()
+
+        # All requests share one client whose connection pool to the daemon is
+        # bounded; the semaphore caps in-flight daemon calls at the pool size
+        self.pool_size = int(os.getenv("INFRAPILOT_DOCKER_POOL_SIZE", "10"))
+        self._daemon_slots = threading.BoundedSemaphore(self.pool_size)
+        self.jobs = JobManager(max_workers=int(os.getenv("INFRAPILOT_DOCKER_JOB_WORKERS", "4")))
+        self.bulk_workers = int(os.getenv("INFRAPILOT_BULK_WORKERS", "8"))
+        self.bulk_timeout = int(os.getenv("INFRAPILOT_BULK_TIMEOUT", "10"))
+
+        # Container listings are served from an event-driven cache unless disabled
+        self.use_inventory = os.getenv("INFRAPILOT_CONTAINER_CACHE", "1") != "0"
+        self._inventory = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        # DOCKER_HOST may point at a fake daemon (tcp://127.0.0.1:2375) for testing
+                        self._client = docker.from_env(
+                            max_pool_size=self.pool_size,
+                            timeout=int(os.getenv("INFRAPILOT_DOCKER_TIMEOUT", "60"))
+                        )
+                        logger.info("Successfully connected to Docker daemon")
+                    except Exception as e:
+                        logger.error(f"Failed to connect to Docker daemon: {str(e)}")
+        return self._client
+
+    @property
+    def inventory(self) -> Optional[ContainerInventory]:
+        if self.use_inventory and self._inventory is None and self.client is not None:
+            with self._client_lock:
+                if self._inventory is None:
+                    inventory = ContainerInventory(self.client)
+                    inventory.start()
+                    self._inventory = inventory
+        return self._inventory
+
+    def list_containers(self, **filters) -> Dict:
+        """List containers from the inventory cache, or from the daemon when it is disabled"""
         try:
-            self.client =  docker.from_env()
-            logger.info("Successfully connected to Docker daemon")
+            inventory = self.inventory
+            if inventory is not None:
+                listing = inventory.list(**filters)
+                return {"status": "success", "data": listing.pop("items"), **listing}
+            return self._execute("list_containers", {})
         except Exception as e:
-            logger.error(f"Failed to connect to Docker daemon: {str(e)}")
-            self.client = None
+            logger.error(f"Docker operation failed: {str(e)}")
+            return {"status": "error", "message": str(e)}
 
-    def execute_command(self, action: str, params: Dict) -> Dict:
-        """Execute Docker commands based on NLP analysis"""
+    def bulk_action(self, action: str, name: Optional[str] = None, label: Optional[str] = None,
+                    image: Optional[str] = None, status: Optional[str] = None, group: Optional[str] = None,
+                    ids: Optional[List[str]] = None, max_workers: Optional[int] = None,
+                    timeout: Optional[int] = None, force: bool = False, dry_run: bool = False) -> Dict:
+        """Stop, restart or remove every container matching the selectors
+
+        ids selects exact containers (full or 12-character ids), e.g. the
+        targets a dry run reported. A dry run resolves the targets without
+        touching them.
+        """
         try:
-            if action == "list_containers":
-                containers = self.client.containers.list(all=True)
+            inventory = self.inventory
+            if inventory is not None:
+                containers = inventory.snapshot()
+            else:
+                with self._daemon_slots:
+                    rows = self.client.api.containers(all=True)
+                containers = [ContainerInventory.from_summary(row) for row in rows]
+
+            if ids:
+                wanted = set(ids)
+                targets = [c for c in containers if c["id"] in wanted or c["id"][:12] in wanted]
+            elif group:
+                # "all nginx containers": a name glob or image repository, or a state
+                if group in self.STATUS_WORDS:
+                    status = self.STATUS_WORDS[group]
+                    targets = select_containers(containers, name=name, label=label, image=image, status=status)
+                else:
+                    # A bare word is the name itself or a compose-style prefix, never any substring
+                    patterns = [group] if "*" in group else [group, f"{group}-*", f"{group}_*"]
+                    by_name = [c for pattern in patterns
+                               for c in select_containers(containers, name=pattern, label=label, status=status)]
+                    by_image = select_containers(containers, image=group, label=label, status=status)
+                    targets = list({c["id"]: c for c in by_name + by_image}.values())
+            else:
+                targets = select_containers(containers, name=name, label=label, image=image, status=status)
+
+            if dry_run:
                 return {
-                    "status": "success",
-                    "data": [{"id": c.id[:12], "name": c.name, "status": c.status} 
-                            for c in containers]
+                    "status": "confirm",
+                    "action": action,
+                    "matched": len(targets),
+                    "targets": [{"id": c["id"][:12], "name": c["name"], "image": c["image"],
+                                 "status": c["status"]} for c in targets]
                 }
-            
-            elif action == "run_container":
-                container = self.client.containers.run(
-                    params.get("image", "hello-world"),
-                    detach=True,
-                    name=params.get("name"),
-                    ports=params.get("ports", {})
+            return run_bulk(
+                self.client, action, targets,
+                max_workers=max_workers or self.bulk_workers,
+                timeout=timeout if timeout is not None else self.bulk_timeout,
+                force=force,
+                slots=self._daemon_slots
+            )
+        except Exception as e:
+            logger.error(f"Bulk {action} failed: {str(e)}")
+            return {"status": "error", "message": str(e)}
+
+    def execute_command(self, action: str, params: Dict, background: bool = True) -> Dict:
+        """Execute Docker commands based on NLP analysis
+
+        Long operations are submitted as jobs unless background is False, in
+        which case they run to completion on the calling thread.
+        """
+        if action == "list_containers" and self.use_inventory:
+            # The chat cannot page, so it gets every container as before
+            return self.list_containers(limit=None)
+
+        if action in self.BULK_INTENTS and not params.get("container_id") and (
+                params.get("container_group") or params.get("label") or params.get("image_name")):
+            image = params.get("image_name")
+            job_name = f"bulk_{self.BULK_INTENTS[action]}"
+            fn, args, kwargs = self.bulk_action, (self.BULK_INTENTS[action],), {
+                "label": params.get("label"),
+                "image": image["repo"] if image else None,
+                "group": params.get("container_group")
+            }
+            if action == "remove_container":
+                # Removal is not undoable: report what matched and let the caller confirm by id
+                preview = self.bulk_action("remove", dry_run=True, **kwargs)
+                if preview["status"] == "confirm":
+                    preview["confirm"] = {
+                        "method": "POST",
+                        "path": "/containers/bulk",
+                        "body": {"action": "remove", "ids": [c["id"] for c in preview["targets"]]}
+                    }
+                return preview
+        elif action in self.LONG_ACTIONS:
+            job_name, fn, args, kwargs = action, self._execute, (action, params), {}
+        else:
+            return self._execute(action, params)
+
+        if not background:
+            return fn(*args, **kwargs)
+        job = self.jobs.submit(job_name, fn, *args, **kwargs)
+        return {"status": "accepted", "job_id": job["id"], "poll": f"/jobs/{job['id']}"}
+
+    def stream_command(self, action: str, params: Dict) -> Iterator[Dict]:
+        """Execute a command, yielding progress events as the daemon reports them"""
+        if action != "run_container" or params.get("container_id"):
+            yield {"event": "result", "result": self.execute_command(action, params, background=False)}
+            return
+
+        try:
+            api = self.client.api
+            image = self._image_ref(params, default="hello-world:latest")
+            # Same splitting rule as the entity extractor, so registry ports stay in the repository
+            ref = parse_image_ref(image)
+            # The engine takes a digest in place of the tag
+            repo, tag = ref["repo"], ref["digest"] or ref["tag"]
+
+            with self._daemon_slots:
+                try:
+                    api.inspect_image(image)
+                    yield {"event": "pull", "status": f"Image {image} is present locally"}
+                except docker.errors.ImageNotFound:
+                    for progress in api.pull(repo, tag=tag, stream=True, decode=True):
+                        if "error" in progress:
+                            raise docker.errors.APIError(progress["error"])
+                        yield {"event": "pull", **progress}
+
+                ports, port_bindings = None, None
+                if params.get("port_mapping"):
+                    host_port, container_port = params["port_mapping"]
+                    ports, port_bindings = [container_port], {container_port: host_port}
+                container = api.create_container(
+                    image,
+                    name=params.get("container_name"),
+                    ports=ports,
+                    host_config=api.create_host_config(port_bindings=port_bindings)
                 )
-                return {"status": "success", "container_id": container.id[:12]}
-            
-            elif action == "stop_container":
-                container = self.client.containers.get(params["container_id"])
-                container.stop()
-                return {"status": "success", "message": f"Container {params['container_id']} stopped"}
+                container_id = container["Id"][:12]
+                yield {"event": "created", "container_id": container_id}
+
+                api.start(container["Id"])
+                yield {"event": "started", "container_id": container_id}
+
+            yield {"event": "result", "result": {"status": "success", "container_id": container_id}}
+        except Exception as e:
+            logger.error(f"Docker operation failed: {str(e)}")
+            yield {"event": "result", "result": {"status": "error", "message": str(e)}}
+
+    def _execute(self, action: str, params: Dict) -> Dict:
+        try:
+            with self._daemon_slots:
+                if action == "list_containers":
+                    containers = self.client.containers.list(all=True)
+                    return {
+                        "status": "success",
+                        "data": [{"id": c.id[:12], "name": c.name, "status": c.status}
+                                for c in containers]
+                    }
+
+                elif action == "run_container":
+                    ports = {}
+                    if params.get("port_mapping"):
+                        host_port, container_port = params["port_mapping"]
+                        ports[f"{container_port}/tcp"] = host_port
+                    container = self.client.containers.run(
+                        self._image_ref(params, default="hello-world:latest"),
+                        detach=True,
+                        name=params.get("container_name"),
+                        ports=ports
+                    )
+                    return {"status": "success", "container_id": container.id[:12]}
+
+                elif action == "stop_container":
+                    container = self.client.containers.get(params["container_id"])
+                    container.stop()
+                    return {"status": "success", "message": f"Container {params['container_id']} stopped"}
+
+                elif action == "restart_container":
+                    self.client.api.restart(params["container_id"])
+                    return {"status": "success", "message": f"Container {params['container_id']} restarted"}
+
+                elif action == "remove_container":
+                    self.client.api.remove_container(params["container_id"])
+                    return {"status": "success", "message": f"Container {params['container_id']} removed"}
+
+                elif action == "pull_image":
+                    image = self.client.images.pull(self._image_ref(params))
+                    return {"status": "success", "image": image.tags[0] if image.tags else image.short_id}
+
+                return {"status": "error", "message": f"Unsupported action: {action}"}
 
         except Exception as e:
             logger.error(f"Docker operation failed: {str(e)}")
             return {"status": "error", "message": str(e)}
 
+    @staticmethod
+    def _image_ref(params: Dict, default: Optional[str] = None) -> str:
+        image = params.get("image_name")
+        if not image:
+            if default is None:
+                raise ValueError("No image given")
+            return default
+        if image.get("digest"):
+            return f"{image['repo']}@{image['digest']}"
+        return f"{image['repo']}:{image['tag']}"
+
 class NLPProcessor:
     def __init__(self):
-        # Initialize the zero-shot classification pipeline
-        self.classifier = pipeline("zero-shot-classification", 
-                                 model="facebook/bart-large-mnli")
-        
         # Define command categories and their corresponding Docker actions
         self.command_mappings = {
             "list_containers": {
@@ -68,57 +296,234 @@ class NLPProcessor:
             "stop_container": {
                 "patterns": ["stop container", "halt container", "terminate container"],
                 "docker_action": "stop_container"
+            },
+            "restart_container": {
+                "patterns": ["restart container", "reboot container", "bounce container"],
+                "docker_action": "restart_container"
+            },
+            "remove_container": {
+                "patterns": ["remove container", "delete container", "destroy container"],
+                "docker_action": "remove_container"
+            },
+            "pull_image": {
+                "patterns": ["pull image", "download image", "fetch image"],
+                "docker_action": "pull_image"
             }
         }
 
-        # Entity extraction patterns
-        self.entity_patterns = {
-            "container_id": r"container (?:id |ID )?([a-zA-Z0-9]+)",
-            "image_name": r"image (?:named? )?([a-zA-Z0-9\-\_\:\/]+)",
-            "port_mapping": r"port (\d+):(\d+)",
-            "container_name": r"name(?:d)? ([a-zA-Z0-9\-\_]+)"
-        }
+        # Entity extraction, all patterns compiled into one scanner
+        self.entity_extractor = EntityExtractor()
+
+        # Models are loaded by load(), either at startup, in the background or on first use
+        self.classifier = None
+        self.router = None
+        self.state = "not_loaded"
+        self.load_error = None
+        self.load_seconds = None
+        self._loaded = threading.Event()
+        self._load_lock = threading.Lock()
+
+    def load(self, share_weights: bool = False):
+        """Load the classifier and intent router
+
+        With share_weights the zero-shot weights are loaded into this process
+        before any fork, so inference workers (and pre-forked web workers)
+        share one copy instead of each loading a private one.
+        """
+        with self._load_lock:
+            if self.state == "ready":
+                return
+            self.state = "loading"
+            start = time.monotonic()
+            model_name = os.getenv("INFRAPILOT_MODEL", "facebook/bart-large-mnli")
+            try:
+                if share_weights:
+                    load_classifier(model_name)
+
+                # Zero-shot classification runs behind a micro-batcher so concurrent
+                # requests share one forward pass on a pool of worker processes
+                self.classifier = MicroBatcher(
+                    labels=list(self.command_mappings.keys()),
+                    hypothesis_template="This is a {} command.",
+                    model_name=model_name,
+                    max_batch_size=int(os.getenv("INFRAPILOT_MAX_BATCH_SIZE", "16")),
+                    max_wait_ms=float(os.getenv("INFRAPILOT_BATCH_WINDOW_MS", "10")),
+                    num_workers=int(os.getenv("INFRAPILOT_INFERENCE_WORKERS", "2")),
+                    threads_per_worker=int(os.getenv("INFRAPILOT_THREADS_PER_WORKER", "1"))
+                )
+
+                # Cheap tiers answer repetitive commands before falling back to zero-shot
+                self.router = IntentRouter(
+                    self.command_mappings,
+                    self.classifier,
+                    embedding_model_name=os.getenv("INFRAPILOT_ROUTER_MODEL", "all-MiniLM-L6-v2"),
+                    margin=float(os.getenv("INFRAPILOT_ROUTER_MARGIN", "0.1")),
+                    min_similarity=float(os.getenv("INFRAPILOT_ROUTER_MIN_SIMILARITY", "0.6"))
+                )
+
+                # Worker pools are started after the fork when weights are shared
+                if not share_weights:
+                    self.classifier.warm_up()
+
+                self.state = "ready"
+                self.load_error = None
+                self.load_seconds = time.monotonic() - start
+                logger.info(f"Models ready in {self.load_seconds:.1f}s")
+            except Exception as e:
+                self.state = "failed"
+                self.load_error = str(e)
+                logger.error(f"Model loading failed: {str(e)}")
+            finally:
+                self._loaded.set()
+
+    def start_background_load(self):
+        """Load models on a background thread while the server starts accepting requests"""
+        self.state = "loading"
+        threading.Thread(target=self.load, name="model-loader", daemon=True).start()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until models are loaded, loading them now if nothing has started yet"""
+        if self.state == "not_loaded":
+            self.load()
+        self._loaded.wait(timeout)
+        return self.state == "ready"
 
-    def analyze_command(self, command: str) -> Tuple[str, Dict]:
+    def close(self):
+        if self.classifier is not None:
+            self.classifier.close()
+
+    def analyze_command(self, command: str) -> Tuple[str, Dict, str]:
         """Analyze the command and extract relevant information"""
         # Classify intent
-        categories = list(self.command_mappings.keys())
-        result = self.classifier(command, categories, 
-                               hypothesis_template="This is a {} command.")
-        
-        intent = result['labels'][0]
-        confidence = result['scores'][0]
+        intent, confidence, tier = self.router.route(command)
 
         # Extract entities
-        entities = {}
-        for entity_name, pattern in self.entity_patterns.items():
-            matches = re.findall(pattern, command, re.IGNORECASE)
-            if matches:
-                entities[entity_name] = matches[0] if isinstance(matches[0], str) else matches[0]
+        entities = self.entity_extractor.extract(command)
+
+        logger.info(f"Command analysis - Intent: {intent}, Confidence: {confidence}, Tier: {tier}, Entities: {entities}")
+        return intent, entities, tier
 
-        logger.info(f"Command analysis - Intent: {intent}, Confidence: {confidence}, Entities: {entities}")
-        return intent, entities
+# Startup modes:
+#   background - serve immediately, load models on a background thread (default)
+#   lazy       - load models on the first /analyze request
+#   preload    - load models before serving; with gunicorn --preload the
+#                weights are shared copy-on-write by every forked worker
+STARTUP_MODE = os.getenv("INFRAPILOT_STARTUP_MODE", "background")
+READY_TIMEOUT = float(os.getenv("INFRAPILOT_READY_TIMEOUT", "60"))
 
 app = Flask(__name__)
 nlp_processor = NLPProcessor()
 docker_manager = DockerManager()
+if STARTUP_MODE == "preload":
+    nlp_processor.load(share_weights=True)
+elif STARTUP_MODE == "background":
+    nlp_processor.start_background_load()
+atexit.register(nlp_processor.close)
+atexit.register(docker_manager.jobs.shutdown)
+atexit.register(lambda: docker_manager._inventory and docker_manager._inventory.stop())
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
+@app.route('/ready')
+def ready():
+    status = {
+        'status': 'ready' if nlp_processor.state == 'ready' else 'not_ready',
+        'model': nlp_processor.state,
+        'startup_mode': STARTUP_MODE,
+        'load_seconds': nlp_processor.load_seconds,
+        'error': nlp_processor.load_error
+    }
+    return jsonify(status), 200 if nlp_processor.state == 'ready' else 503
+
+@app.route('/metrics')
+def metrics():
+    return jsonify({
+        'router_tiers': nlp_processor.router.stats() if nlp_processor.router else {}
+    })
+
+@app.route('/containers')
+def list_containers():
+    result = docker_manager.list_containers(
+        status=request.args.get('status'),
+        name_prefix=request.args.get('name'),
+        image=request.args.get('image'),
+        offset=request.args.get('offset', 0, type=int),
+        limit=request.args.get('limit', 50, type=int)
+    )
+    return jsonify(result), 200 if result['status'] == 'success' else 502
+
+@app.route('/containers/bulk', methods=['POST'])
+def bulk_containers():
+    body = request.json or {}
+    action = body.get('action')
+    if action not in ('stop', 'restart', 'remove'):
+        return jsonify({'status': 'error', 'message': "action must be stop, restart or remove"}), 400
+    if not any(body.get(k) for k in ('name', 'label', 'image', 'status', 'ids')):
+        return jsonify({'status': 'error', 'message': "a name, label, image, status or ids selector is required"}), 400
+
+    job = docker_manager.jobs.submit(
+        f"bulk_{action}", docker_manager.bulk_action, action,
+        name=body.get('name'),
+        label=body.get('label'),
+        image=body.get('image'),
+        status=body.get('status'),
+        ids=body.get('ids'),
+        max_workers=body.get('max_workers'),
+        timeout=body.get('timeout'),
+        force=bool(body.get('force')),
+        dry_run=bool(body.get('dry_run'))
+    )
+    return jsonify({'status': 'accepted', 'job_id': job['id'], 'poll': f"/jobs/{job['id']}"}), 202
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = docker_manager.jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': f"Unknown job {job_id}"}), 404
+    return jsonify(job)
+
+def stream_analysis(intent: str, entities: Dict, tier: str) -> Response:
+    """NDJSON response: one analysis event, then Docker progress events as they happen"""
+    def generate():
+        yield json.dumps({'event': 'analysis', 'intent': intent, 'tier': tier, 'entities': entities}) + '\n'
+        try:
+            for event in docker_manager.stream_command(intent, entities):
+                yield json.dumps(event) + '\n'
+        except Exception as e:
+            logger.error(f"Error streaming command: {str(e)}")
+            yield json.dumps({'event': 'result', 'result': {'status': 'error', 'message': str(e)}}) + '\n'
+
+    response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    # Keep reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/analyze', methods=['POST'])
 def analyze_command():
     try:
         command = request.json.get('command', '')
-        intent, entities = nlp_processor.analyze_command(command)
-        
+        if not nlp_processor.wait_until_ready(READY_TIMEOUT):
+            return jsonify({
+                'status': 'error',
+                'message': f"Model is not ready ({nlp_processor.state})"
+            }), 503
+
+        intent, entities, tier = nlp_processor.analyze_command(command)
+
+        # Streaming clients get the analysis right away, then execution progress
+        if request.args.get('stream') == '1' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+            return stream_analysis(intent, entities, tier)
+
         # Execute Docker command based on intent
         result = docker_manager.execute_command(intent, entities)
         
         return jsonify({
             'status': 'success',
             'intent': intent,
+            'tier': tier,
             'entities': entities,
             'result': result
         })
@@ -130,4 +535,4 @@ def analyze_command():
         })
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
\ No newline at end of file
@@ -0,0 +1,82 @@
+# benchmarks/analyze_load.py
+"""Load test for the /analyze endpoint
+
+Start the app (python app.py) and run:
+    python benchmarks/analyze_load.py --url http://127.0.0.1:5000/analyze --clients 1 8 64
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+import urllib.request
+from typing import List
+
+COMMANDS = [
+    "list containers",
+    "show all running containers",
+    "run container image nginx:latest with port 8080:80",
+    "start a container from image redis named cache",
+    "stop container 3f2a1b9c8d7e",
+    "halt the container named web",
+    "display containers on this host",
+    "launch container image postgres:15 named db"
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run_client(url: str, requests_per_client: int, offset: int, latencies: List[float], lock: threading.Lock):
+    for i in range(requests_per_client):
+        command = COMMANDS[(offset + i) % len(COMMANDS)]
+        body = json.dumps({"command": command}).encode("utf-8")
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(req) as response:
+            response.read()
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+
+def run_level(url: str, clients: int, requests_per_client: int) -> dict:
+    latencies: List[float] = []
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=run_client, args=(url, requests_per_client, i, latencies, lock))
+        for i in range(clients)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000/analyze")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--requests-per-client", type=int, default=20)
+    args = parser.parse_args()
+
+    # Warm up the workers before measuring
+    run_level(args.url, 1, 2)
+
+    print(f"{'clients':>8} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for clients in args.clients:
+        stats = run_level(args.url, clients, args.requests_per_client)
+        print(f"{stats['clients']:>8} {stats['requests']:>9} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+if __name__ == "__main__":
+    main()
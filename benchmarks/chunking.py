@@ -0,0 +1,104 @@
+# benchmarks/chunking.py
+"""Character chunker vs token-aware chunk_paragraphs: time, chunks and truncated tokens
+
+Builds docs-like pages of growing size out of prose paragraphs, code blocks
+and a few oversized paragraphs (long reference tables flattened to text).
+Each page is chunked by the old 1500/200-character create_chunks and by
+chunk_paragraphs at 382/48 tokens. For every chunk, tokens past the model's
+382-token window are counted as truncated, i.e. embedding compute spent on
+text the model never reads.
+
+Tokens are counted with the all-mpnet-base-v2 tokenizer. --approx switches
+to a word/punctuation count, which needs no transformers install.
+
+    python benchmarks/chunking.py --paragraphs 100 1000 10000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from chunker import chunk_paragraphs, model_token_counter  # noqa: E402
+
+WORDS = ("container image volume network daemon compose swarm build registry port mount service node "
+         "production development linux windows the a to of and you can run with for is").split()
+MODEL_WINDOW = 382
+
+def character_chunks(paragraphs, max_size: int = 1500, overlap: int = 200):
+    """DockerDocsScraper.create_chunks before this change"""
+    chunks = []
+    current_chunk = []
+    current_length = 0
+    for para in paragraphs:
+        if current_length + len(para) > max_size:
+            if current_chunk:
+                chunks.append(' '.join(current_chunk))
+                overlap_size = 0
+                overlap_chunks = []
+                for p in reversed(current_chunk):
+                    if overlap_size + len(p) <= overlap:
+                        overlap_chunks.insert(0, p)
+                        overlap_size += len(p)
+                    else:
+                        break
+                current_chunk = overlap_chunks
+                current_length = overlap_size
+            current_chunk.append(para)
+            current_length += len(para)
+        else:
+            current_chunk.append(para)
+            current_length += len(para)
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+    return chunks
+
+def page(count: int, rng: random.Random):
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    paragraphs = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.6:
+            paragraphs.append(" ".join(sentence(rng.randint(6, 20)) for _ in range(rng.randint(1, 4))))
+        elif roll < 0.9:
+            paragraphs.append("\n".join(f"docker run --name c{i}-{j} --network net{j} image:{j}"
+                                        for j in range(rng.randint(1, 12))))
+        elif roll < 0.97:
+            paragraphs.append(f"--opt-{i} {sentence(4)}")
+        else:
+            paragraphs.append(" ".join(sentence(rng.randint(10, 25)) for _ in range(rng.randint(40, 120))))
+    return paragraphs
+
+def approximate_tokens(text: str) -> int:
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+def measure(name, chunks, seconds, count_tokens):
+    tokens = [count_tokens(chunk) for chunk in chunks]
+    truncated = sum(max(0, t - MODEL_WINDOW) for t in tokens)
+    print(f"  {name:10} {seconds * 1000:9.1f} ms  {len(chunks):6} chunks  largest {max(tokens):6} tokens  "
+          f"truncated {truncated:8} of {sum(tokens)} tokens ({truncated / sum(tokens):.1%})")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--approx", action="store_true", help="Approximate token counts without transformers")
+    args = parser.parse_args()
+
+    count_tokens = approximate_tokens if args.approx else model_token_counter()
+    for count in args.paragraphs:
+        paragraphs = page(count, random.Random(count))
+        print(f"{count} paragraphs, {sum(map(len, paragraphs)) / 1e3:.0f} k characters")
+        start = time.perf_counter()
+        chunks = character_chunks(paragraphs)
+        measure("characters", chunks, time.perf_counter() - start, count_tokens)
+        start = time.perf_counter()
+        chunks = list(chunk_paragraphs(iter(paragraphs), count_tokens, MODEL_WINDOW, 48))
+        measure("tokens", chunks, time.perf_counter() - start, count_tokens)
+
+if __name__ == "__main__":
+    main()
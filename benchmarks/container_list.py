@@ -0,0 +1,56 @@
+# benchmarks/container_list.py
+"""List latency: client.containers.list(all=True) vs the ContainerInventory cache
+
+Runs both against benchmarks/fake_docker.py with 10, 100 and 1000 containers.
+--latency-ms adds a per-request delay to the fake daemon; the direct path makes
+one list call plus one inspect per container, the cache makes none.
+
+    python benchmarks/container_list.py --sizes 10 100 1000 --latency-ms 0.5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import docker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from container_inventory import ContainerInventory  # noqa: E402
+from fake_docker import FakeDocker, serve  # noqa: E402
+
+def measure(fn, repeat: int) -> float:
+    """Median latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--latency-ms", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'containers':>10} {'direct ms':>10} {'cached ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        state = FakeDocker(size, latency=args.latency_ms / 1000.0)
+        server = serve(state)
+        client = docker.DockerClient(base_url=f"tcp://127.0.0.1:{server.server_port}")
+        inventory = ContainerInventory(client)
+        inventory.start()
+        try:
+            direct = measure(lambda: client.containers.list(all=True), args.repeat)
+            cached = measure(lambda: inventory.list(limit=size), args.repeat)
+            print(f"{size:>10} {direct:>10.2f} {cached:>10.3f} {direct / cached:>7.0f}x")
+        finally:
+            inventory.stop()
+            server.shutdown()
+            client.close()
+
+if __name__ == "__main__":
+    main()
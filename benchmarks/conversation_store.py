@@ -0,0 +1,118 @@
+# benchmarks/conversation_store.py
+"""Per-turn storage cost: get_item + put_item every turn vs ConversationStore
+
+Replays slot-filling conversations against the SQLite backend with simulated
+DynamoDB round-trip latencies, so it runs offline:
+
+    python benchmarks/conversation_store.py --conversations 200 --get-ms 4 --write-ms 6
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation_store import ConversationStore, SQLiteBackend, new_conversation  # noqa: E402
+
+SLOTS = ['instance_type', 'region', 'image_name']
+
+class LatentBackend:
+    """Adds a fixed round-trip delay and counts calls and bytes written"""
+
+    def __init__(self, backend, get_ms: float, write_ms: float):
+        self.backend = backend
+        self.get_delay = get_ms / 1000.0
+        self.write_delay = write_ms / 1000.0
+        self.gets = self.writes = self.bytes_written = 0
+
+    def get(self, conversation_id):
+        self.gets += 1
+        time.sleep(self.get_delay)
+        return self.backend.get(conversation_id)
+
+    def write(self, conversation_id, sets, removes, expected_version, new_version):
+        self.writes += 1
+        self.bytes_written += len(json.dumps({'.'.join(k): v for k, v in sets.items()}, default=str))
+        time.sleep(self.write_delay)
+        self.backend.write(conversation_id, sets, removes, expected_version, new_version)
+
+    def put(self, item):
+        """Whole-item put, as save_conversation_state used to do"""
+        self.writes += 1
+        self.bytes_written += len(json.dumps(item, default=str))
+        time.sleep(self.write_delay)
+        stored = self.backend.get(item['id'])
+        version = stored['version'] if stored else 0
+        sets = {(k,): v for k, v in item.items() if k not in ('id', 'version')}
+        self.backend.write(item['id'], sets, [], version, version + 1)
+
+def play_turn(state, message):
+    """Mimic generate_response's state changes without calling Gemini"""
+    if state['state'] == 'START':
+        if message.startswith('deploy'):
+            state['current_intent'] = 'DEPLOY_EC2'
+            state['state'] = 'COLLECTING_SLOTS'
+            state['slots'] = {}
+        # Unrecognized openers leave the state untouched
+    elif state['state'] == 'COLLECTING_SLOTS':
+        pending = [s for s in SLOTS if s not in state['slots']]
+        if pending:
+            state['slots'][pending[0]] = message
+        if not [s for s in SLOTS if s not in state['slots']]:
+            state['state'] = 'COMPLETE'
+    return state
+
+def script(rng):
+    turns = ['hello'] * rng.randint(0, 2) + ['deploy docker on ec2'] + ['t3.small', 'us-east-1', 'nginx']
+    return turns + ['thanks'] * rng.randint(0, 2)
+
+def run_baseline(backend, conversations):
+    for conversation_id, turns in conversations:
+        for message in turns:
+            item = backend.get(conversation_id) or new_conversation(conversation_id)
+            state = play_turn(copy.deepcopy(item), message)
+            state['updated_at'] = time.time()
+            backend.put(state)
+
+def run_store(store, conversations):
+    for conversation_id, turns in conversations:
+        for message in turns:
+            state = play_turn(store.load(conversation_id), message)
+            store.save(state)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--conversations', type=int, default=200)
+    parser.add_argument('--get-ms', type=float, default=4.0)
+    parser.add_argument('--write-ms', type=float, default=6.0)
+    args = parser.parse_args()
+
+    rng = random.Random(3)
+    conversations = [(f"conv-{i}", script(rng)) for i in range(args.conversations)]
+    turns = sum(len(t) for _, t in conversations)
+
+    baseline = LatentBackend(SQLiteBackend(), args.get_ms, args.write_ms)
+    start = time.perf_counter()
+    run_baseline(baseline, conversations)
+    baseline_time = time.perf_counter() - start
+
+    latent = LatentBackend(SQLiteBackend(), args.get_ms, args.write_ms)
+    store = ConversationStore(latent)
+    start = time.perf_counter()
+    run_store(store, conversations)
+    store_time = time.perf_counter() - start
+
+    print(f"turns: {turns}")
+    print(f"{'':22}{'ms/turn':>9}{'gets':>8}{'writes':>8}{'bytes written':>15}")
+    print(f"{'get_item + put_item':22}{baseline_time * 1000 / turns:>9.2f}{baseline.gets:>8}"
+          f"{baseline.writes:>8}{baseline.bytes_written:>15}")
+    print(f"{'ConversationStore':22}{store_time * 1000 / turns:>9.2f}{latent.gets:>8}"
+          f"{latent.writes:>8}{latent.bytes_written:>15}")
+    print(f"store stats: {store.stats}")
+
+if __name__ == '__main__':
+    main()
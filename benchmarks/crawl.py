@@ -0,0 +1,116 @@
+# benchmarks/crawl.py
+"""Pages/sec: sequential requests.get crawl vs AsyncCrawler
+
+Generates a static mirror of docs-like pages, serves it over a local
+keep-alive HTTP server with --latency-ms added per response, and crawls it
+both ways. Both sides parse every page with BeautifulSoup. The old crawler
+also slept 1s per page for rate limiting; that sleep is left out of the
+baseline (pass --legacy-sleep to add it back), so the gap shown is the
+concurrency gain alone.
+
+    python benchmarks/crawl.py --pages 300 --latency-ms 50
+"""
+import argparse
+import asyncio
+import functools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crawler import AsyncCrawler  # noqa: E402
+
+WORDS = ("container image volume network daemon compose swarm build registry "
+         "port mount service node production development linux windows").split()
+
+def write_mirror(root: str, pages: int, rng: random.Random):
+    os.makedirs(os.path.join(root, "engine"), exist_ok=True)
+    for i in range(pages):
+        paragraphs = "".join(
+            f"<p>{' '.join(rng.choice(WORDS) for _ in range(60))}</p><code>docker run image-{j}</code>"
+            for j in range(40)
+        )
+        links = "".join(f'<a href="/engine/page-{rng.randrange(pages)}.html">link</a>' for _ in range(30))
+        html = (f"<html><head><style>body{{}}</style></head><body><nav>{links}</nav>"
+                f"<main><h1>Page {i} reference</h1>{paragraphs}</main><footer>f</footer></body></html>")
+        with open(os.path.join(root, "engine", f"page-{i}.html"), "w") as f:
+            f.write(html)
+
+class MirrorHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+def parse(html: str) -> int:
+    """Same shape of work as DockerDocsScraper.extract_content"""
+    soup = BeautifulSoup(html, "html.parser")
+    for element in soup.find_all(["nav", "footer", "script", "style"]):
+        element.decompose()
+    main = soup.find("main")
+    return sum(1 for elem in main.find_all(["p", "li", "h2", "h3", "code"]) if elem.get_text().strip())
+
+def crawl_sequential(urls, legacy_sleep: bool):
+    for url in urls:
+        response = requests.get(url)
+        response.raise_for_status()
+        if legacy_sleep:
+            time.sleep(1)
+        parse(response.text)
+
+async def crawl_async(urls, concurrency: int, parse_workers: int):
+    async with AsyncCrawler(max_connections=concurrency, per_host_concurrency=concurrency,
+                            per_host_rate=10_000, burst=concurrency,
+                            parse_workers=parse_workers) as crawler:
+        async def handle(url, html):
+            await crawler.parse(parse, html)
+        return await crawler.crawl(urls, handle)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--parse-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--legacy-sleep", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        write_mirror(root, args.pages, random.Random(7))
+        MirrorHandler.latency = args.latency_ms / 1000.0
+        server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(MirrorHandler, directory=root))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls = [f"http://127.0.0.1:{server.server_port}/engine/page-{i}.html" for i in range(args.pages)]
+
+        try:
+            start = time.perf_counter()
+            crawl_sequential(urls, args.legacy_sleep)
+            sequential = time.perf_counter() - start
+
+            start = time.perf_counter()
+            stats = asyncio.run(crawl_async(urls, args.concurrency, args.parse_workers))
+            concurrent = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+    print(f"pages: {args.pages}, latency: {args.latency_ms} ms, concurrency: {args.concurrency}, "
+          f"parse workers: {args.parse_workers}")
+    print(f"{'sequential requests.get':24} {args.pages / sequential:8.1f} pages/s")
+    print(f"{'AsyncCrawler':24} {args.pages / concurrent:8.1f} pages/s  "
+          f"({sequential / concurrent:.1f}x, {stats})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# benchmarks/document_writer.py
+"""Storing a corpus: one insert per chunk vs DocumentWriter's buffered upserts
+
+Runs against the in-memory FakeSupabase with --latency-ms per request. It
+also writes the corpus a second time to check that re-runs leave one row per
+(url, chunk_hash), and injects request failures to exercise retries.
+
+    python benchmarks/document_writer.py --pages 500 --latency-ms 20
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from document_writer import DocumentWriter  # noqa: E402
+from fake_supabase import FakeSupabase  # noqa: E402
+
+def corpus(pages: int, seed: int = 5):
+    rng = random.Random(seed)
+    result = []
+    for i in range(pages):
+        url = f"https://docs.docker.com/engine/page-{i}/"
+        rows = []
+        for j in range(rng.randint(2, 20)):
+            chunk = f"{url} chunk {j} " + "x" * rng.randint(50, 1500)
+            chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+            rows.append({"url": url, "chunk_hash": chunk_hash, "content": chunk,
+                         "metadata": {"url": url}, "embedding": [0.0] * 8})
+        result.append(rows)
+    return result
+
+def per_chunk(client, pages):
+    for rows in pages:
+        for row in rows:
+            client.table("documents").insert(row).execute()
+
+def buffered(client, pages, batch_size: int):
+    writer = DocumentWriter(client, batch_size=batch_size, flush_interval=0.5, backoff=0.01)
+    futures = [writer.upsert(rows) for rows in pages]
+    writer.close()
+    for future in futures:
+        future.result()
+    return writer.stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    pages = corpus(args.pages)
+    chunks = sum(len(rows) for rows in pages)
+    latency = args.latency_ms / 1000.0
+
+    client = FakeSupabase(latency)
+    start = time.perf_counter()
+    per_chunk(client, pages)
+    baseline = time.perf_counter() - start
+    baseline_requests = client.requests
+
+    client = FakeSupabase(latency)
+    start = time.perf_counter()
+    stats = buffered(client, pages, args.batch_size)
+    batched = time.perf_counter() - start
+
+    # Second run with two failed requests: same rows, retried batches, no duplicates
+    client.fail_next = 2
+    rerun = buffered(client, pages, args.batch_size)
+    stored = len(client.tables["documents"])
+
+    print(f"pages: {args.pages}, chunks: {chunks}, latency: {args.latency_ms} ms, batch size: {args.batch_size}")
+    print(f"{'insert per chunk':18} {baseline:8.2f}s {baseline_requests:>7} requests")
+    print(f"{'DocumentWriter':18} {batched:8.2f}s {stats['requests']:>7} requests  ({baseline / batched:.0f}x)")
+    print(f"re-run: {rerun}, rows stored: {stored} (expected {chunks})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/embedding.py
+"""Chunks/sec: one encode() per chunk vs the batched EmbeddingPipeline
+
+Both run all-mpnet-base-v2 on CPU over the same fixed corpus of docs-like
+chunks. The corpus is seeded, so runs are comparable. Chunk lengths vary
+the way create_chunks output does.
+
+    python benchmarks/embedding.py --pages 100 --batch-size 64 --threads 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from sentence_transformers import SentenceTransformer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from embedding_pipeline import EmbeddingPipeline  # noqa: E402
+
+WORDS = ("container image volume network daemon compose swarm build registry port mount "
+         "service node production development linux windows docker run exec logs inspect").split()
+
+def corpus(pages: int, seed: int = 11):
+    """Per page, a list of chunks between ~80 and ~1500 characters"""
+    rng = random.Random(seed)
+    return [
+        [" ".join(rng.choice(WORDS) for _ in range(rng.randint(12, 220))) for _ in range(rng.randint(2, 20))]
+        for _ in range(pages)
+    ]
+
+def per_chunk(model, pages):
+    for chunks in pages:
+        for chunk in chunks:
+            model.encode(chunk).tolist()
+
+async def pipelined(model, pages, batch_size: int, workers: int, threads: int):
+    pipeline = await EmbeddingPipeline(model, batch_size=batch_size, num_workers=workers,
+                                       num_threads=threads).start()
+    await asyncio.gather(*(pipeline.embed(chunks) for chunks in pages))
+    await pipeline.close()
+    return pipeline.stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=os.cpu_count())
+    parser.add_argument("--model", default="all-mpnet-base-v2")
+    args = parser.parse_args()
+
+    import torch
+    torch.set_num_threads(args.threads)
+    model = SentenceTransformer(args.model, device="cpu")
+    pages = corpus(args.pages)
+    chunks = sum(len(p) for p in pages)
+    model.encode(pages[0])  # Warm up
+
+    start = time.perf_counter()
+    per_chunk(model, pages)
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    stats = asyncio.run(pipelined(model, pages, args.batch_size, args.workers, args.threads))
+    batched = time.perf_counter() - start
+
+    print(f"chunks: {chunks}, batch size: {args.batch_size}, workers: {args.workers}, threads: {args.threads}")
+    print(f"{'encode() per chunk':22} {chunks / baseline:8.1f} chunks/s")
+    print(f"{'EmbeddingPipeline':22} {chunks / batched:8.1f} chunks/s  ({baseline / batched:.1f}x, {stats})")
+
+if __name__ == "__main__":
+    main()
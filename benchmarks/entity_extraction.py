@@ -0,0 +1,111 @@
+# benchmarks/entity_extraction.py
+"""Microbenchmark: per-pattern re.findall loop vs the single-pass EntityExtractor
+
+    python benchmarks/entity_extraction.py --commands 5000 --repeat 5
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entities import ENTITY_SPECS, EntityExtractor  # noqa: E402
+
+# The patterns NLPProcessor used before the extractor, with the extractor's
+# fixes applied so both find the same values: the image class is widened to
+# dotted tags and registry hosts (the original turned "nginx:1.25" into tag
+# "1") and keywords are not taken as container ids ("container image nginx")
+LEGACY_PATTERNS = {
+    "container_id": r"container (?:id |ID )?((?!(?:image|named?|with|from|on|port)\b)[a-zA-Z0-9]+)",
+    "image_name": r"image (?:named? )?([a-zA-Z0-9\-\_\/@]+(?:[\.\:][a-zA-Z0-9\-\_\/@]+)*)",
+    "port_mapping": r"port (\d+):(\d+)",
+    "container_name": r"name(?:d)? ([a-zA-Z0-9\-\_]+)"
+}
+
+TEMPLATES = [
+    "list containers",
+    "show all running containers on this host",
+    "run container image {image} with port {port}",
+    "start a container from image {image} named {name}",
+    "launch container image {image} named {name} with port {port} in the background",
+    "stop container {cid}",
+    "stop container id {cid} please",
+    "halt the container named {name}",
+    "terminate container ID {cid} now, it is using too much memory",
+    "pull image {image} and run it with port {port}",
+    "restart the service named {name} after the deploy finishes",
+    "can you show me the logs for the web container, the one that keeps crashing",
+]
+IMAGES = ["nginx", "nginx:1.25", "redis:7-alpine", "postgres:15", "myregistry:5000/team/api:v2",
+          "library/ubuntu:22.04", "ghcr.io/org/worker:sha-1a2b3c", "localhost:5000/api",
+          "nginx@sha256:0d17b565c37bcbd895e9d92315a05c1c3c9a29f762b011a10c54a66cd53c9b31"]
+NAMES = ["web", "api-server", "cache_1", "db", "worker-blue", "nightly-etl"]
+
+def make_corpus(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        template = rng.choice(TEMPLATES)
+        corpus.append(template.format(
+            image=rng.choice(IMAGES),
+            name=rng.choice(NAMES),
+            port=f"{rng.randint(1024, 65000)}:{rng.choice([80, 443, 5432, 6379, 8080])}",
+            cid="".join(rng.choice("0123456789abcdef") for _ in range(12))
+        ))
+    return corpus
+
+def legacy_extract(command: str):
+    entities = {}
+    for entity_name, pattern in LEGACY_PATTERNS.items():
+        matches = re.findall(pattern, command, re.IGNORECASE)
+        if matches:
+            entities[entity_name] = matches[0]
+    return entities
+
+def time_it(fn, corpus, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for command in corpus:
+            fn(command)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.commands)
+    extractor = EntityExtractor()
+
+    # Same entities found, modulo typing
+    mismatches = 0
+    for command in corpus:
+        legacy = legacy_extract(command)
+        typed = {k: v for k, v in extractor.extract(command).items() if k in LEGACY_PATTERNS}
+        if set(legacy) != set(typed):
+            mismatches += 1
+            continue
+        for name, value in legacy.items():
+            spec = ENTITY_SPECS[name]
+            raw = ":".join(value) if isinstance(value, tuple) else value
+            if spec.convert(raw) != typed[name]:
+                mismatches += 1
+                break
+
+    legacy_time = time_it(legacy_extract, corpus, args.repeat)
+    extractor_time = time_it(extractor.extract, corpus, args.repeat)
+
+    print(f"commands:        {len(corpus)}")
+    print(f"mismatches:      {mismatches}")
+    print(f"findall loop:    {legacy_time * 1e6 / len(corpus):.2f} us/command")
+    print(f"EntityExtractor: {extractor_time * 1e6 / len(corpus):.2f} us/command")
+    print(f"speedup:         {legacy_time / extractor_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
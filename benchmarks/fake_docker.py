@@ -0,0 +1,288 @@
+# benchmarks/fake_docker.py
+"""In-memory stand-in for the Docker Engine API
+
+Serves the subset of endpoints DockerManager uses over plain HTTP, so the app
+and benchmarks can run without a daemon:
+
+    python benchmarks/fake_docker.py --port 2375 --containers 100
+    DOCKER_HOST=tcp://127.0.0.1:2375 python app.py
+"""
+import argparse
+import json
+import queue
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+API_VERSION = "1.43"
+
+class FakeDocker:
+    """Container and image state behind the fake API"""
+
+    def __init__(self, containers: int = 0, latency: float = 0.0, stop_delay: float = 0.0):
+        self.latency = latency          # Added to every request, like a busy daemon
+        self.stop_delay = stop_delay    # Stop grace period
+        self.containers: Dict[str, Dict] = {}
+        self.images: Dict[str, Dict] = {}
+        self.subscribers = []           # One queue per open /events stream
+        self.lock = threading.Lock()
+        for i in range(containers):
+            image = ["nginx:latest", "redis:7", "postgres:15", "api:v2"][i % 4]
+            self.create(f"{image.split(':')[0]}-{i}", image, status="running" if i % 3 else "exited")
+
+    def create(self, name: Optional[str], image: str, labels: Optional[Dict] = None, status: str = "created") -> Dict:
+        container_id = uuid.uuid4().hex + uuid.uuid4().hex
+        container = {
+            "id": container_id,
+            "name": name or f"fake_{container_id[:6]}",
+            "image": image,
+            "labels": labels or {},
+            "status": status,
+            "created": int(time.time())
+        }
+        with self.lock:
+            self.containers[container_id] = container
+        self.publish("create", container)
+        return container
+
+    def find(self, ref: str) -> Optional[Dict]:
+        with self.lock:
+            for container in self.containers.values():
+                if container["id"].startswith(ref) or container["name"] == ref:
+                    return container
+        return None
+
+    def set_status(self, container: Dict, status: str, action: Optional[str] = None):
+        with self.lock:
+            container["status"] = status
+        if action:
+            self.publish(action, container)
+
+    def publish(self, action: str, container: Dict):
+        event = {
+            "Type": "container", "Action": action, "id": container["id"], "status": action,
+            "Actor": {"ID": container["id"], "Attributes": {
+                "name": container["name"], "image": container["image"], **container["labels"]
+            }},
+            "time": int(time.time()), "timeNano": time.time_ns()
+        }
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    @staticmethod
+    def summary(c: Dict) -> Dict:
+        """Entry of GET /containers/json"""
+        return {
+            "Id": c["id"], "Names": ["/" + c["name"]], "Image": c["image"],
+            "State": c["status"], "Status": c["status"], "Labels": c["labels"], "Created": c["created"]
+        }
+
+    @staticmethod
+    def inspect(c: Dict) -> Dict:
+        """Body of GET /containers/{id}/json"""
+        return {
+            "Id": c["id"], "Name": "/" + c["name"], "Image": "sha256:" + c["id"][:12],
+            "Created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(c["created"])),
+            "State": {"Status": c["status"], "Running": c["status"] == "running"},
+            "Config": {"Image": c["image"], "Labels": c["labels"]}
+        }
+
+def make_handler(state: FakeDocker):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body=None):
+            payload = b"" if body is None else json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Api-Version", API_VERSION)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _route(self, method: str):
+            if state.latency:
+                time.sleep(state.latency)
+            url = urlparse(self.path)
+            path = re.sub(r"^/v[0-9.]+", "", url.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            handler = getattr(self, f"_{method}", None)
+            if handler is None or not handler(path, query, body):
+                self._send(404, {"message": f"page not found: {method.upper()} {path}"})
+
+        def do_GET(self):
+            self._route("get")
+
+        def do_POST(self):
+            self._route("post")
+
+        def do_DELETE(self):
+            self._route("delete")
+
+        def _get(self, path, query, body) -> bool:
+            if path == "/_ping":
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"OK")
+                return True
+            if path == "/version":
+                self._send(200, {"ApiVersion": API_VERSION, "Version": "fake", "MinAPIVersion": "1.24"})
+                return True
+            if path == "/events":
+                self._stream_events()
+                return True
+            if path == "/containers/json":
+                with state.lock:
+                    containers = list(state.containers.values())
+                if query.get("all") not in ("1", "true", "True"):
+                    containers = [c for c in containers if c["status"] == "running"]
+                self._send(200, [state.summary(c) for c in containers])
+                return True
+            match = re.fullmatch(r"/containers/([^/]+)/json", path)
+            if match:
+                container = state.find(match.group(1))
+                if container is None:
+                    self._send(404, {"message": f"No such container: {match.group(1)}"})
+                else:
+                    self._send(200, state.inspect(container))
+                return True
+            match = re.fullmatch(r"/images/(.+)/json", path)
+            if match:
+                name = match.group(1)
+                image = state.images.get(name)
+                if image is None:
+                    self._send(404, {"message": f"No such image: {name}"})
+                else:
+                    self._send(200, image)
+                return True
+            return False
+
+        def _post(self, path, query, body) -> bool:
+            if path == "/containers/create":
+                container = state.create(query.get("name"), body.get("Image", ""), body.get("Labels"))
+                self._send(201, {"Id": container["id"], "Warnings": []})
+                return True
+            if path == "/images/create":
+                name = f"{query.get('fromImage')}:{query.get('tag') or 'latest'}"
+                state.images[name] = {"Id": "sha256:" + uuid.uuid4().hex, "RepoTags": [name]}
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                for event in ({"status": f"Pulling from {name}"},
+                              {"status": "Downloading", "progressDetail": {"current": 50, "total": 100}},
+                              {"status": "Download complete"},
+                              {"status": f"Status: Downloaded newer image for {name}"}):
+                    chunk = (json.dumps(event) + "\r\n").encode("utf-8")
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+                return True
+            match = re.fullmatch(r"/containers/([^/]+)/restart", path)
+            if match:
+                container = state.find(match.group(1))
+                if container is None:
+                    self._send(404, {"message": f"No such container: {match.group(1)}"})
+                    return True
+                if state.stop_delay:
+                    time.sleep(state.stop_delay)
+                state.set_status(container, "running", "restart")
+                self._send(204)
+                return True
+            match = re.fullmatch(r"/containers/([^/]+)/(start|stop)", path)
+            if match:
+                container = state.find(match.group(1))
+                if container is None:
+                    self._send(404, {"message": f"No such container: {match.group(1)}"})
+                    return True
+                if match.group(2) == "stop" and state.stop_delay:
+                    time.sleep(state.stop_delay)
+                if match.group(2) == "start":
+                    state.set_status(container, "running", "start")
+                else:
+                    state.set_status(container, "exited", "die")
+                    state.publish("stop", container)
+                self._send(204)
+                return True
+            return False
+
+        def _stream_events(self):
+            subscriber = queue.Queue()
+            with state.lock:
+                state.subscribers.append(subscriber)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.flush()
+            try:
+                while True:
+                    try:
+                        event = subscriber.get(timeout=1.0)
+                    except queue.Empty:
+                        continue
+                    chunk = (json.dumps(event) + "\n").encode("utf-8")
+                    self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                with state.lock:
+                    state.subscribers.remove(subscriber)
+                self.close_connection = True
+
+        def _delete(self, path, query, body) -> bool:
+            match = re.fullmatch(r"/containers/([^/]+)", path)
+            if not match:
+                return False
+            container = state.find(match.group(1))
+            if container is None:
+                self._send(404, {"message": f"No such container: {match.group(1)}"})
+            elif container["status"] == "running" and query.get("force") not in ("1", "true", "True"):
+                self._send(409, {"message": f"cannot remove running container {container['id'][:12]}"})
+            else:
+                with state.lock:
+                    state.containers.pop(container["id"], None)
+                state.publish("destroy", container)
+                self._send(204)
+            return True
+
+    return Handler
+
+def serve(state: FakeDocker, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Start the fake API on a background thread; DOCKER_HOST is tcp://host:server.server_port"""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=2375)
+    parser.add_argument("--containers", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--stop-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    state = FakeDocker(args.containers, latency=args.latency_ms / 1000.0, stop_delay=args.stop_delay)
+    server = serve(state, port=args.port)
+    print(f"Fake Docker API on tcp://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
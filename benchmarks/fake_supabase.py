@@ -0,0 +1,143 @@
+# benchmarks/fake_supabase.py
+"""In-memory stand-in for the supabase-py table API
+
+Covers the query builder calls the scraper, DocumentWriter and
+LocalVectorIndex make (insert, upsert, update, delete, select with eq / gt /
+in_ / not_.in_, order and limit). Every execute() counts as one round trip
+and sleeps for `latency`, so storage code can be measured and checked without
+a Supabase project:
+
+    client = FakeSupabase(latency=0.02)
+    DocumentWriter(client).upsert(rows)
+"""
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+class FakeResponse:
+    def __init__(self, data: List[Dict]):
+        self.data = data
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.operation = "select"
+        self.payload: List[Dict] = []
+        self.on_conflict: Optional[str] = None
+        self.filters = []
+        self.order_by: Optional[str] = None
+        self.row_limit: Optional[int] = None
+        self._negate = False
+
+    # Operations
+    def select(self, *columns):
+        self.operation = "select"
+        return self
+
+    def insert(self, rows):
+        self.operation, self.payload = "insert", rows if isinstance(rows, list) else [rows]
+        return self
+
+    def upsert(self, rows, on_conflict: Optional[str] = None):
+        self.operation, self.payload = "upsert", rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict
+        return self
+
+    def update(self, values: Dict):
+        self.operation, self.payload = "update", [values]
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    # Filters
+    @property
+    def not_(self):
+        self._negate = True
+        return self
+
+    def eq(self, column: str, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def gt(self, column: str, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def in_(self, column: str, values):
+        values = set(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def order(self, column: str):
+        self.order_by = column
+        return self
+
+    def limit(self, n: int):
+        self.row_limit = n
+        return self
+
+    def _filter(self, predicate):
+        negate, self._negate = self._negate, False
+        self.filters.append((lambda row: not predicate(row)) if negate else predicate)
+        return self
+
+    def execute(self) -> FakeResponse:
+        return self.client._execute(self)
+
+class FakeSupabase:
+    """Tables of dict rows behind a supabase-py style client"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, List[Dict]] = {}
+        self.requests = 0
+        self.fail_next = 0              # Fail this many upcoming requests, to exercise retries
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def _execute(self, query: FakeQuery) -> FakeResponse:
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if self.fail_next:
+                self.fail_next -= 1
+                raise ConnectionError("injected failure")
+            rows = self.tables.setdefault(query.table, [])
+            matches = [row for row in rows if all(f(row) for f in query.filters)]
+
+            if query.operation == "select":
+                if query.order_by:
+                    matches.sort(key=lambda row: row.get(query.order_by))
+                if query.row_limit is not None:
+                    matches = matches[:query.row_limit]
+                return FakeResponse([dict(row) for row in matches])
+            if query.operation == "insert":
+                for row in query.payload:
+                    rows.append({"id": next(self._ids), **row})
+                return FakeResponse(query.payload)
+            if query.operation == "upsert":
+                keys = (query.on_conflict or "id").split(",")
+                existing = {tuple(r.get(k) for k in keys): r for r in rows}
+                seen = set()
+                for row in query.payload:
+                    key = tuple(row.get(k) for k in keys)
+                    if key in seen:
+                        raise ValueError("ON CONFLICT DO UPDATE command cannot affect row a second time")
+                    seen.add(key)
+                    if key in existing:
+                        existing[key].update(row)
+                    else:
+                        rows.append({"id": next(self._ids), **row})
+                return FakeResponse(query.payload)
+            if query.operation == "update":
+                for row in matches:
+                    row.update(query.payload[0])
+                return FakeResponse(matches)
+            if query.operation == "delete":
+                self.tables[query.table] = [row for row in rows if row not in matches]
+                return FakeResponse(matches)
+            raise ValueError(f"Unsupported operation: {query.operation}")
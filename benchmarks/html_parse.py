@@ -0,0 +1,147 @@
+# benchmarks/html_parse.py
+"""Pages/sec: BeautifulSoup extraction vs the single-pass extract_page
+
+The BeautifulSoup side is the scraper's previous parse_page: html.parser
+tree, decompose nav/footer/script/style, then separate find_all passes for
+links, content blocks, code and prerequisites plus get_text() over the whole
+page. The new side is DockerDocsScraper.parse_page. Both run over the same
+fixed set of pages, and their outputs (title, chunks, metadata, links) are
+compared page by page.
+
+Pass a directory of saved docs pages (e.g. from `wget -r -l1
+https://docs.docker.com/engine/`) with --pages. Without it, a seeded set of
+docs-like pages is generated: a large nav, sidebar, main with headings,
+paragraphs, inline and block code, a prerequisites list, footer and scripts.
+
+    python benchmarks/html_parse.py --pages saved_docs/ --repeat 3
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from document_scraper import DockerDocsScraper  # noqa: E402
+
+WORDS = ("container image volume network daemon compose swarm build registry port mount service node "
+         "production development linux windows the a to of and you can run with for is").split()
+
+def write_pages(root: str, pages: int, rng: random.Random):
+    def sentence(n):
+        return " ".join(rng.choice(WORDS) for _ in range(n))
+
+    nav = "".join(f'<li><a href="/engine/section-{i}/">Section {i}</a></li>' for i in range(300))
+    for i in range(pages):
+        body = []
+        for j in range(rng.randint(8, 30)):
+            body.append(f"<h2 id=\"h{j}\">{sentence(4)}</h2>")
+            if j == 1:
+                body.append("<h2>Prerequisites</h2><ul>"
+                            + "".join(f"<li>{sentence(8)}</li>" for _ in range(3)) + "</ul>")
+            for _ in range(rng.randint(1, 5)):
+                body.append(f"<p>{sentence(20)} <code>--flag-{j}</code> {sentence(30)} "
+                            f"<a href=\"../page-{rng.randrange(pages)}/\">link</a> <em>{sentence(3)}</em>.</p>")
+            if rng.random() < 0.6:
+                body.append(f"<pre><code>docker run --name c{j} image-{j}\n{sentence(6)}</code></pre>")
+            if rng.random() < 0.3:
+                body.append("<ul>" + "".join(f"<li>{sentence(12)}</li>" for _ in range(4)) + "</ul>")
+        html = (f"<!DOCTYPE html><html><head><title>Page {i}</title><meta charset=\"utf-8\">"
+                f"<link rel=\"stylesheet\" href=\"/s.css\"><style>body{{margin:0}}</style>"
+                f"<script>window.dataLayer=[];</script></head><body>"
+                f"<header><nav><ul>{nav}</ul></nav></header>"
+                f"<div class=\"sidebar\"><nav><ul>{nav[:len(nav) // 3]}</ul></nav></div>"
+                f"<main><h1>Page {i} {rng.choice(['reference', 'guide', 'troubleshooting'])}</h1>"
+                f"{''.join(body)}<p>Docker version 2{rng.randint(0, 7)}.0 on linux and windows</p></main>"
+                f"<footer><p>{sentence(20)}</p></footer><script src=\"/app.js\"></script></body></html>")
+        with open(os.path.join(root, f"page-{i}.html"), "w") as f:
+            f.write(html)
+
+def legacy_parse_page(html: str, url: str):
+    """DockerDocsScraper.parse_page as it was on BeautifulSoup"""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = [urljoin(url, link['href']) for link in soup.find_all('a', href=True)]
+    for element in soup.find_all(['nav', 'footer', 'script', 'style']):
+        element.decompose()
+    main_content = soup.find('main') or soup.find(class_='content')
+    if not main_content:
+        return None, links
+    title = soup.find('h1')
+    paragraphs = []
+    for elem in main_content.find_all(['p', 'li', 'h2', 'h3', 'code']):
+        text = elem.get_text().strip()
+        if elem.name == 'code':
+            if text:
+                paragraphs.append(text)
+        elif text and len(text) > 20:
+            paragraphs.append(text)
+
+    text = soup.get_text().lower()
+    commands = [block.text.strip() for block in soup.find_all('code') if block.text.strip().startswith('docker')]
+    prereq_section = soup.find(['h2', 'h3'], string=re.compile(r'prerequisites|requirements', re.I))
+    prerequisites = []
+    if prereq_section:
+        prereq_list = prereq_section.find_next('ul')
+        if prereq_list:
+            prerequisites = [li.text.strip() for li in prereq_list.find_all('li')]
+    title_text = title.get_text().strip() if title else ""
+    metadata = {
+        'command_category': DockerDocsScraper._get_command_category(url, text),
+        'component_type': DockerDocsScraper._get_component_type(url, text),
+        'resource_type': DockerDocsScraper._get_resource_type(title.text if title else None),
+        'docker_commands': commands[:10],
+        'prerequisites': prerequisites,
+        'environment': DockerDocsScraper._get_environment_type(text),
+        'os_compatibility': DockerDocsScraper._get_os_compatibility(text),
+        'docker_version': DockerDocsScraper._extract_version(text),
+        'last_updated': time.strftime('%Y-%m-%d')
+    }
+    return {"title": title_text, "chunks": list(DockerDocsScraper.create_chunks(paragraphs)), "url": url,
+            "metadata": metadata}, links
+
+def run(parse, pages, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [parse(html, url) for url, html in pages]
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", help="Directory of saved .html pages; generated when omitted")
+    parser.add_argument("--count", type=int, default=100, help="Pages to generate without --pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as generated:
+        root = args.pages
+        if root is None:
+            root = generated
+            write_pages(root, args.count, random.Random(5))
+        pages = []
+        for directory, _, files in os.walk(root):
+            for name in sorted(files):
+                if name.endswith(".html"):
+                    with open(os.path.join(directory, name), encoding="utf-8", errors="replace") as f:
+                        pages.append((f"https://docs.docker.com/engine/{name[:-5]}/", f.read()))
+
+    size = sum(len(html) for _, html in pages) / 1e6
+    print(f"pages: {len(pages)} ({size:.1f} MB)")
+    legacy, legacy_seconds = run(legacy_parse_page, pages, args.repeat)
+    print(f"beautifulsoup  {len(pages) * args.repeat / legacy_seconds:8.1f} pages/s")
+    single, single_seconds = run(DockerDocsScraper.parse_page, pages, args.repeat)
+    print(f"single pass    {len(pages) * args.repeat / single_seconds:8.1f} pages/s  "
+          f"({legacy_seconds / single_seconds:.1f}x)")
+
+    differing = [url for (url, _), old, new in zip(pages, legacy, single) if old != new]
+    print(f"pages with different output: {len(differing)}")
+    for url in differing[:5]:
+        print(f"  {url}")
+
+if __name__ == "__main__":
+    main()
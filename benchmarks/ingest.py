@@ -0,0 +1,119 @@
+# benchmarks/ingest.py
+"""Pages/sec and memory in flight: one coroutine per page vs the staged IngestPipeline
+
+Generates a local mirror of docs-like pages and ingests it into an in-memory
+FakeSupabase both ways. The baseline starts a coroutine for every page at
+once, each reading, parsing on the event loop, then awaiting
+embed_and_store. The pipeline runs the same work as bounded fetch / parse
+(process pool) / embed / store stages. Both share the scraper's batched
+EmbeddingPipeline and DocumentWriter, so the gap is the stage separation.
+Memory is tracemalloc's peak in the main process, less what is still
+allocated at the end (mostly the stored rows), i.e. the working set of
+pages in flight.
+
+--encode-ms replaces the embedding model with a stand-in that sleeps that
+long per chunk, for runs without sentence-transformers.
+
+    python benchmarks/ingest.py --pages 500 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+sys.path.insert(1, os.path.dirname(os.path.abspath(__file__)))
+
+from document_scraper import DockerDocsScraper  # noqa: E402
+from ingest_pipeline import IngestPipeline, mirror_files  # noqa: E402
+from page_index import PageIndex  # noqa: E402
+from fake_supabase import FakeSupabase  # noqa: E402
+from crawl import write_mirror  # noqa: E402
+
+BASE_URL = "https://docs.docker.com"
+
+class SleepingModel:
+    """Stands in for SentenceTransformer: encode costs encode_ms per text"""
+
+    def __init__(self, encode_ms: float):
+        self.encode_ms = encode_ms
+
+    def encode(self, texts, batch_size=None):
+        time.sleep(self.encode_ms / 1000 * len(texts))
+        return [np.full(768, len(text), dtype=np.float32) for text in texts]
+
+def make_scraper(model, index_path: str) -> DockerDocsScraper:
+    scraper = DockerDocsScraper.__new__(DockerDocsScraper)
+    scraper.base_url = BASE_URL
+    scraper.headers = {}
+    scraper.max_connections, scraper.per_host_concurrency, scraper.per_host_rate = 16, 4, 100.0
+    scraper.page_index = PageIndex(index_path)
+    scraper.incremental = True
+    scraper.embed_batch_size, scraper.embed_workers, scraper.embed_threads = 64, 1, 0
+    scraper.write_batch_size, scraper.flush_interval = 500, 0.2
+    scraper.supabase = FakeSupabase()
+    scraper.embedding_model = model
+    return scraper
+
+async def per_page(scraper: DockerDocsScraper, root: str):
+    """Every page started at once, parsed inline on the event loop"""
+    async def ingest(url: str, path: str):
+        with open(path) as f:
+            html = f.read()
+        content, _ = scraper.parse_page(html, url)
+        await scraper.embed_and_store(content, None)
+
+    await scraper.open_outputs()
+    await asyncio.gather(*(ingest(url, path) for url, path in mirror_files(root, BASE_URL)))
+    await scraper.close_outputs()
+
+def measure(name: str, run, scraper: DockerDocsScraper, pages: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rows = len(scraper.supabase.table('documents').select('id').execute().data)
+    print(f"  {name:9} {pages / seconds:8.1f} pages/s  {seconds:6.2f} s  "
+          f"in flight {(peak - retained) / 1e6:7.1f} MB  {rows} rows")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Parse processes")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--encode-ms", type=float, default=None, help="Stand-in model cost per chunk")
+    args = parser.parse_args()
+
+    if args.encode_ms is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer("all-mpnet-base-v2")
+    else:
+        model = SleepingModel(args.encode_ms)
+
+    with tempfile.TemporaryDirectory() as root:
+        write_mirror(root, args.pages, random.Random(0))
+        print(f"{args.pages} pages, {args.workers} parse workers")
+
+        scraper = make_scraper(model, os.path.join(root, "baseline.db"))
+        measure("per page", lambda: asyncio.run(per_page(scraper, root)), scraper, args.pages)
+
+        scraper = make_scraper(model, os.path.join(root, "pipeline.db"))
+        pipeline = IngestPipeline(scraper, parse_workers=args.workers, queue_size=args.queue_size,
+                                  report_interval=3600)
+        stats = measure("pipeline", lambda: asyncio.run(pipeline.run_directory(root, BASE_URL)),
+                        scraper, args.pages)
+        for name, stage in stats.items():
+            print(f"    {name:6} busy {stage['busy_seconds']:7.2f} s  max queue {stage['max_queue']:4}  "
+                  f"failed {stage['failed']}")
+
+if __name__ == "__main__":
+    main()
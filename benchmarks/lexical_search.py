@@ -0,0 +1,88 @@
+# benchmarks/lexical_search.py
+"""BM25 index: build rate, saved size, query latency and exact-flag hit rate
+
+Generates docs-like chunks from a seeded vocabulary. One chunk in every
+`--planted` carries a rare flag or subcommand ("--flag-17", "plugin-17
+bake"); each planted term is then queried and counted as a hit when its
+chunk ranks first. Also times an incremental add of 1% more chunks after a
+save/load round trip.
+
+    python benchmarks/lexical_search.py --chunks 50000 --queries 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from lexical_index import BM25Index  # noqa: E402
+
+WORDS = ("container image volume network daemon compose swarm build registry port mount service node "
+         "production development linux windows docker run exec logs inspect restart policy flag option "
+         "stop start create remove list tag push pull login context builder cache layer").split()
+
+def chunks(count: int, planted: int, rng: random.Random, start: int = 0):
+    rows = []
+    for i in range(start, start + count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(20, 250))]
+        if i % planted == 0:
+            words.insert(rng.randint(0, len(words)), f"--flag-{i} plugin-{i} bake")
+        rows.append({"id": i + 1, "content": " ".join(words),
+                     "metadata": {"url": f"https://docs.docker.com/page/{i // 8}",
+                                  "docker_commands": [f"docker {rng.choice(WORDS)} {rng.choice(WORDS)}"]}})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--planted", type=int, default=50, help="Plant a rare flag in one chunk out of this many")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rows = chunks(args.chunks, args.planted, rng)
+    index = BM25Index()
+    start = time.perf_counter()
+    index.add(rows)
+    elapsed = time.perf_counter() - start
+    print(f"indexed {len(rows)} chunks in {elapsed:.2f}s ({len(rows) / elapsed:.0f} chunks/s), "
+          f"{len(index.terms)} terms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "lexical_index.npz")
+        index.save(path)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        index = BM25Index(path)
+        print(f"saved {size / 1e6:.1f} MB, loaded in {time.perf_counter() - start:.2f}s")
+
+    extra = chunks(max(1, args.chunks // 100), args.planted, rng, start=args.chunks)
+    start = time.perf_counter()
+    index.add(extra)
+    print(f"incremental add of {len(extra)} chunks: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    planted = [i for i in range(args.chunks) if i % args.planted == 0][:args.queries]
+    latencies, hits = [], 0
+    for i in planted:
+        start = time.perf_counter()
+        results = index.search(f"docker plugin-{i} bake --flag-{i}", 5)
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += bool(results) and results[0]["id"] == i + 1
+    print(f"flag queries: {len(planted)}, top-1 hits {hits}/{len(planted)}, "
+          f"median {statistics.median(latencies):.2f} ms, p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.2f} ms")
+
+    latencies = []
+    for _ in range(args.queries):
+        query = " ".join(rng.choice(WORDS) for _ in range(4))
+        start = time.perf_counter()
+        index.search(query, 20)
+        latencies.append((time.perf_counter() - start) * 1000)
+    print(f"common-word queries: median {statistics.median(latencies):.2f} ms, "
+          f"p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.2f} ms")
+
+if __name__ == "__main__":
+    main()
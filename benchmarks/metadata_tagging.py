@@ -0,0 +1,82 @@
+# benchmarks/metadata_tagging.py
+"""Texts/sec: per-field DockerMetadata regexes vs the shared PatternSet lookup
+
+The old side runs each field's patterns as separate re.search(...,
+re.IGNORECASE) calls over the whole text (about 30 per text) plus the
+complexity substring scan, exactly as DockerMetadata did. The new side is
+DockerMetadata.extract_all. Outputs are compared text by text.
+
+Texts are seeded docs-like chunks: mostly filler prose with Docker terms
+mixed in at --density. Pass --corpus with a JSONL file of {"content": ...}
+rows (e.g. an export of the documents table) to use real chunks.
+
+    python benchmarks/metadata_tagging.py --texts 5000 --density 0.05
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from new_scraper import COMPLEXITY_TERMS, METADATA_PATTERNS, DockerMetadata  # noqa: E402
+
+TERMS = ("docker build run compose swarm network volume secret Dockerfile container containers networking "
+         "image images service services stack production prod development dev testing test latest staging "
+         "localhost orchestration kubernetes security scaling deployment requires Linux kernel 4 GB RAM "
+         "root privileges sudo access version").split()
+FILLER = ("the a of to and is with for you can this that when page guide see more about using option flag "
+          "value default set configure file path output example").split()
+
+def legacy_metadata(text: str):
+    """DockerMetadata before this change: one re.search per pattern"""
+    metadata = {}
+    for field, labels in METADATA_PATTERNS.items():
+        metadata[field] = [label for label, alternatives in labels.items()
+                           if re.search('|'.join(alternatives), text, re.IGNORECASE)]
+    text_lower = text.lower()
+    advanced_count = sum(1 for term in COMPLEXITY_TERMS['advanced'] if term in text_lower)
+    intermediate_count = sum(1 for term in COMPLEXITY_TERMS['intermediate'] if term in text_lower)
+    if advanced_count >= 2:
+        metadata['complexity'] = 'advanced'
+    elif intermediate_count >= 2:
+        metadata['complexity'] = 'intermediate'
+    else:
+        metadata['complexity'] = 'beginner'
+    return metadata
+
+def generate(count: int, density: float, rng: random.Random):
+    return [" ".join(rng.choice(TERMS) if rng.random() < density else rng.choice(FILLER)
+                     for _ in range(rng.randint(50, 400)))
+            for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--density", type=float, default=0.05, help="Share of words that are Docker terms")
+    parser.add_argument("--corpus", help="JSONL file of rows with a content field")
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as f:
+            texts = [json.loads(line)["content"] for line in f if line.strip()]
+    else:
+        texts = generate(args.texts, args.density, random.Random(9))
+    print(f"texts: {len(texts)} ({sum(map(len, texts)) / 1e6:.1f} M characters)")
+
+    start = time.perf_counter()
+    legacy = [legacy_metadata(text) for text in texts]
+    legacy_seconds = time.perf_counter() - start
+    print(f"per-field regexes  {len(texts) / legacy_seconds:9.0f} texts/s")
+
+    start = time.perf_counter()
+    tagged = [DockerMetadata.extract_all(text) for text in texts]
+    seconds = time.perf_counter() - start
+    print(f"pattern set        {len(texts) / seconds:9.0f} texts/s  ({legacy_seconds / seconds:.1f}x)")
+    print(f"texts with different metadata: {sum(old != new for old, new in zip(legacy, tagged))}")
+
+if __name__ == "__main__":
+    main()
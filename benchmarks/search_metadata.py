@@ -0,0 +1,75 @@
+# benchmarks/search_metadata.py
+"""Search filter extraction: local gazetteer vs Gemini, accuracy and latency
+
+Scores both extractors against the hand-labeled queries in
+benchmarks/search_queries.jsonl. Precision and recall are counted over
+(field, value) pairs, and exact match means all five fields are right.
+Without --llm only the local extractor runs, so no credentials are needed:
+
+    python benchmarks/search_metadata.py
+    python benchmarks/search_metadata.py --llm   # needs SUPABASE_*/GEMINI_API_KEY
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from search_filters import GAZETTEER, LocalMetadataExtractor  # noqa: E402
+
+FIELDS = list(GAZETTEER)
+
+def load_queries(path: str):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def pairs(metadata):
+    return {(field, value) for field in FIELDS for value in (metadata.get(field) or [])}
+
+def score(name, predictions, labels, latencies):
+    tp = fp = fn = exact = 0
+    for predicted, label in zip(predictions, labels):
+        p, l = pairs(predicted), pairs(label)
+        tp, fp, fn = tp + len(p & l), fp + len(p - l), fn + len(l - p)
+        exact += p == l
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"{name:8} precision {precision:.2f}  recall {recall:.2f}  exact {exact}/{len(labels)}  "
+          f"median {statistics.median(latencies):.3f} ms  p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          "search_queries.jsonl"))
+    parser.add_argument("--llm", action="store_true", help="Also time Gemini on the same queries")
+    args = parser.parse_args()
+
+    labels = load_queries(args.queries)
+    extractor = LocalMetadataExtractor()
+
+    predictions, latencies, fallbacks = [], [], 0
+    for label in labels:
+        start = time.perf_counter()
+        metadata, confidence = extractor.extract(label["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        predictions.append(metadata)
+        fallbacks += confidence < 0.5
+    print(f"queries: {len(labels)}, would fall back to Gemini under the default policy: {fallbacks}")
+    score("local", predictions, labels, latencies)
+
+    if args.llm:
+        from scraper_script import VectorSearch
+
+        search = VectorSearch()
+        predictions, latencies = [], []
+        for label in labels:
+            start = time.perf_counter()
+            predictions.append(search.llm_search_metadata(label["query"]))
+            latencies.append((time.perf_counter() - start) * 1000)
+        score("gemini", predictions, labels, latencies)
+
+if __name__ == "__main__":
+    main()
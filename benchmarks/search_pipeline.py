@@ -0,0 +1,137 @@
+# benchmarks/search_pipeline.py
+"""Queries/sec under concurrent load: sequential search path vs the async pipeline
+
+Gemini, the embedding model and the search RPC are replaced with stubs that
+sleep for configurable latencies. The model stub holds the GIL-free sleep
+for a fixed overhead plus a per-text cost, like a CPU forward pass. Every
+query goes to Gemini (SEARCH_METADATA_LLM=always) and the query cache is
+disabled, so both paths do the full work. The sequential path is the old
+one: blocking extraction, then encoding, then the RPC, all on the event loop.
+
+    python benchmarks/search_pipeline.py --clients 32 --queries 256 --llm-ms 300 --rpc-ms 40
+
+Needs the scraper's Python dependencies installed, but no credentials.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from query_cache import QueryCache  # noqa: E402
+from scraper_script import VectorSearch  # noqa: E402
+from search_filters import LocalMetadataExtractor  # noqa: E402
+
+RESPONSE = '{"command_category": ["container"], "os_compatibility": ["linux"]}'
+
+class StubResponse:
+    text = RESPONSE
+
+class StubLLM:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        return StubResponse()
+
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(self.latency)
+        return StubResponse()
+
+class StubModel:
+    def __init__(self, overhead: float, per_text: float, dim: int = 768):
+        self.overhead = overhead
+        self.per_text = per_text
+        self.dim = dim
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False):
+        self.calls += 1
+        single = isinstance(texts, str)
+        count = 1 if single else len(texts)
+        time.sleep(self.overhead + self.per_text * count)
+        vectors = np.random.default_rng(count).normal(size=(count, self.dim)).astype(np.float32)
+        return vectors[0] if single else vectors
+
+class StubBackend:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def data_version(self):
+        return None
+
+    def search(self, query_embedding, match_threshold, match_count, filter_conditions):
+        time.sleep(self.latency)
+        return [{"id": 1, "content": "chunk", "metadata": {"url": "https://docs.docker.com/"}, "similarity": 0.9}]
+
+def build(args) -> VectorSearch:
+    # Skip __init__: no credentials or real model, just the stubs
+    search = VectorSearch.__new__(VectorSearch)
+    search.llm = StubLLM(args.llm_ms / 1000)
+    search.metadata_extractor = LocalMetadataExtractor()
+    search.llm_policy = "always"
+    search.llm_min_confidence = 0.5
+    search.search_backend = StubBackend(args.rpc_ms / 1000)
+    search.lexical_index = None
+    search.query_cache = QueryCache(ttl=0, max_bytes=0)
+    search.embedding_model = StubModel(args.encode_ms / 1000, args.encode_per_query_ms / 1000)
+    search.encode_executor = ThreadPoolExecutor(max_workers=1)
+    search.search_executor = ThreadPoolExecutor(max_workers=args.clients)
+    return search
+
+async def sequential(search: VectorSearch, query: str, match_threshold: float, match_count: int):
+    metadata = search.extract_search_metadata(query)
+    metadata_filter = search.build_metadata_filter(metadata)
+    query_embedding = search.generate_embedding(query)
+    return search.search_backend.search(query_embedding, match_threshold, match_count, metadata_filter)
+
+async def load(run, queries, clients: int):
+    pending = list(queries)
+
+    async def client():
+        while pending:
+            await run(pending.pop(), 0.7, 5)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return time.perf_counter() - start
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=16, help="Queries per search_similar_documents_batch call")
+    parser.add_argument("--llm-ms", type=float, default=300)
+    parser.add_argument("--rpc-ms", type=float, default=40)
+    parser.add_argument("--encode-ms", type=float, default=15, help="Fixed cost of one forward pass")
+    parser.add_argument("--encode-per-query-ms", type=float, default=2)
+    args = parser.parse_args()
+
+    queries = [f"how do I run container {i} on linux" for i in range(args.queries)]
+
+    search = build(args)
+    elapsed = await load(lambda q, t, c: sequential(search, q, t, c), queries, args.clients)
+    print(f"sequential  {args.queries / elapsed:8.1f} queries/s  ({elapsed:.2f}s)")
+
+    search = build(args)
+    elapsed = await load(search.search_similar_documents, queries, args.clients)
+    print(f"pipelined   {args.queries / elapsed:8.1f} queries/s  ({elapsed:.2f}s)")
+
+    search = build(args)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        search.search_similar_documents_batch(queries[i:i + args.batch])
+        for i in range(0, len(queries), args.batch)
+    ))
+    elapsed = time.perf_counter() - start
+    print(f"batched     {args.queries / elapsed:8.1f} queries/s  ({elapsed:.2f}s, "
+          f"{search.embedding_model.calls} forward passes)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+# benchmarks/startup.py
+"""Startup benchmark: time-to-first-byte, time-to-ready and memory per worker
+
+Runs the app under gunicorn once per startup mode and reports, for each mode,
+how long it takes until / answers, how long until /ready reports the model as
+loaded, and the RSS and PSS (proportional set size, which splits shared pages
+between the processes mapping them) of every worker process.
+
+    python benchmarks/startup.py --workers 4 --modes background lazy preload
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def wait_for(url: str, deadline: float, expect_ok: bool = False) -> Optional[float]:
+    """Poll a URL until it answers (or answers 200 when expect_ok), returning the time it did"""
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                response.read(1)
+                return time.monotonic()
+        except urllib.error.HTTPError:
+            if not expect_ok:
+                return time.monotonic()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return None
+
+def child_pids(pid: int) -> List[int]:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for task in os.listdir(task_dir):
+        with open(os.path.join(task_dir, task, "children")) as f:
+            children.extend(int(p) for p in f.read().split())
+    return children
+
+def memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS in kB from /proc/<pid>/smaps_rollup"""
+    stats = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                stats[key.lower()] = int(rest.split()[0])
+    return stats
+
+def run_mode(mode: str, workers: int, port: int, timeout: float) -> Dict:
+    env = dict(os.environ, INFRAPILOT_STARTUP_MODE=mode)
+    command = [
+        sys.executable, "-m", "gunicorn",
+        "--workers", str(workers),
+        "--bind", f"127.0.0.1:{port}",
+        "--timeout", str(int(timeout))
+    ]
+    if mode == "preload":
+        command.append("--preload")
+    command.append("app:app")
+
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.monotonic()
+    process = subprocess.Popen(command, cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout
+        first_byte = wait_for(base_url + "/", deadline)
+        if mode == "lazy" and first_byte:
+            # Nothing loads until the first command arrives
+            request = urllib.request.Request(
+                base_url + "/analyze", data=b'{"command": "list containers"}',
+                headers={"Content-Type": "application/json"}
+            )
+            try:
+                urllib.request.urlopen(request, timeout=timeout).read()
+            except urllib.error.HTTPError:
+                pass
+        ready = wait_for(base_url + "/ready", deadline, expect_ok=True)
+
+        memory = []
+        for worker in child_pids(process.pid):
+            procs = [worker] + child_pids(worker)
+            per_proc = [memory_kb(p) for p in procs]
+            memory.append({
+                "pid": worker,
+                "processes": len(procs),
+                "rss_mb": sum(m.get("rss", 0) for m in per_proc) / 1024,
+                "pss_mb": sum(m.get("pss", 0) for m in per_proc) / 1024
+            })
+        return {
+            "mode": mode,
+            "ttfb_s": first_byte - start if first_byte else None,
+            "ready_s": ready - start if ready else None,
+            "workers": memory
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--modes", nargs="+", default=["background", "lazy", "preload"])
+    args = parser.parse_args()
+
+    for mode in args.modes:
+        result = run_mode(mode, args.workers, args.port, args.timeout)
+        ttfb = f"{result['ttfb_s']:.2f}s" if result["ttfb_s"] is not None else "timeout"
+        ready = f"{result['ready_s']:.2f}s" if result["ready_s"] is not None else "timeout"
+        print(f"\n[{mode}] time-to-first-byte: {ttfb}, time-to-ready: {ready}")
+        for worker in result["workers"]:
+            print(f"  worker {worker['pid']} ({worker['processes']} processes): "
+                  f"RSS {worker['rss_mb']:.0f} MB, PSS {worker['pss_mb']:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/stream_run.py
+"""Time to first progress event: DockerManager.stream_command vs execute_command
+
+Runs "run container" commands against benchmarks/fake_docker.py, with entities
+taken by the EntityExtractor as /analyze would. The streamed run reports the
+image pull as it happens; the plain run only returns once the container has
+started. Exits non-zero when a command that names a missing image streams no
+pull progress, e.g. because a keyword was taken for a container id and the
+command fell back to the non-streaming path.
+
+    python benchmarks/stream_run.py --latency-ms 20
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_docker import FakeDocker, serve  # noqa: E402
+
+COMMANDS = [
+    "run container image nginx:1.25",
+    "run container image nginx named web-{i} with port {port}:80",
+    "launch container image ghcr.io/org/worker:sha-1a2b3c",
+    "start a container from image localhost:5000/team/api:v2 named api-{i}",
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake daemon delay per request")
+    args = parser.parse_args()
+
+    server = serve(FakeDocker(latency=args.latency_ms / 1000.0))
+    os.environ["DOCKER_HOST"] = f"tcp://127.0.0.1:{server.server_port}"
+    os.environ["INFRAPILOT_STARTUP_MODE"] = "lazy"
+    os.environ["INFRAPILOT_CONTAINER_CACHE"] = "0"
+    from app import DockerManager  # noqa: E402
+    from entities import EntityExtractor  # noqa: E402
+
+    manager, extractor, failed = DockerManager(), EntityExtractor(), 0
+    print(f"{'command':70} {'first event ms':>14} {'streamed ms':>11} {'plain ms':>9}  pulled")
+    try:
+        for i, template in enumerate(COMMANDS):
+            params = extractor.extract(template.format(i=i, port=8000 + i))
+            start = time.perf_counter()
+            first, events = None, []
+            for event in manager.stream_command("run_container", params):
+                first = first if first is not None else time.perf_counter() - start
+                events.append(event)
+            streamed = time.perf_counter() - start
+
+            # Same command again without streaming; the image is present by now
+            params = extractor.extract(template.format(i=i + len(COMMANDS), port=9000 + i))
+            start = time.perf_counter()
+            manager.execute_command("run_container", params, background=False)
+            plain = time.perf_counter() - start
+
+            pulled = sum(1 for e in events if e["event"] == "pull")
+            result = events[-1]["result"]
+            if not pulled or result["status"] != "success":
+                failed += 1
+            print(f"{template:70} {first * 1000:>14.1f} {streamed * 1000:>11.1f} {plain * 1000:>9.1f}  "
+                  f"{pulled} {result['status']}")
+    finally:
+        manager.jobs.shutdown()
+        server.shutdown()
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
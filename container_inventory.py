@@ -0,0 +1,172 @@
+# container_inventory.py
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from entities import image_matches
+
+logger = logging.getLogger(__name__)
+
+# Container event action -> resulting status
+EVENT_STATUS = {
+    "create": "created",
+    "start": "running",
+    "restart": "running",
+    "unpause": "running",
+    "pause": "paused",
+    "die": "exited",
+    "stop": "exited",
+    "oom": "exited"
+}
+
+class ContainerInventory:
+    """In-memory view of the daemon's containers, kept current from the Docker events stream"""
+
+    def __init__(self, client, reconnect_delay: float = 1.0):
+        self.client = client
+        self.reconnect_delay = reconnect_delay
+        self.containers: Dict[str, Dict] = {}
+        self.seeded_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.disconnected_at: Optional[float] = time.time()
+        self._lock = threading.Lock()
+        self._stream = None
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Seed from the daemon and follow its events on a background thread"""
+        if self._thread is None:
+            # Subscribe from before the seed so nothing between the two is missed
+            since = int(time.time())
+            self.seed()
+            self._thread = threading.Thread(
+                target=self._watch, args=(since,), name="container-inventory", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._stream is not None:
+            self._stream.close()
+
+    @staticmethod
+    def from_summary(row: Dict) -> Dict:
+        """Cache entry from one row of the low-level containers listing"""
+        return {
+            "id": row["Id"],
+            "name": (row.get("Names") or ["/"])[0].lstrip("/"),
+            "image": row.get("Image", ""),
+            "status": row.get("State", ""),
+            "labels": row.get("Labels") or {},
+            "created": row.get("Created")
+        }
+
+    def seed(self):
+        """Replace the cache with one low-level list call (no per-container inspect)"""
+        rows = self.client.api.containers(all=True)
+        containers = {row["Id"]: self.from_summary(row) for row in rows}
+        with self._lock:
+            self.containers = containers
+            self.seeded_at = time.time()
+        logger.info(f"Container inventory seeded with {len(containers)} containers")
+
+    def snapshot(self) -> List[Dict]:
+        """Copy of every cached container, labels included"""
+        with self._lock:
+            return [dict(c) for c in self.containers.values()]
+
+    def list(self, status: Optional[str] = None, name_prefix: Optional[str] = None,
+             image: Optional[str] = None, offset: int = 0, limit: Optional[int] = 50) -> Dict:
+        """Filtered, paginated containers straight from memory; limit=None returns them all"""
+        with self._lock:
+            containers = list(self.containers.values())
+
+        if status:
+            containers = [c for c in containers if c["status"] == status]
+        if name_prefix:
+            containers = [c for c in containers if c["name"].startswith(name_prefix)]
+        if image:
+            containers = [c for c in containers if image_matches(c["image"], image)]
+
+        containers.sort(key=lambda c: c["name"])
+        page = containers[offset:] if limit is None else containers[offset:offset + limit]
+        return {
+            "items": [{"id": c["id"][:12], "name": c["name"], "status": c["status"], "image": c["image"]}
+                      for c in page],
+            "total": len(containers),
+            "offset": offset,
+            "limit": limit,
+            "cache": self.staleness()
+        }
+
+    def staleness(self) -> Dict:
+        """How far behind the daemon the cache may be"""
+        now = time.time()
+        live = self.disconnected_at is None
+        return {
+            "live": live,
+            # While subscribed to events the cache trails the daemon only by event delivery
+            "stale_seconds": 0.0 if live else round(now - (self.disconnected_at or now), 3),
+            "seeded_seconds_ago": round(now - self.seeded_at, 3) if self.seeded_at else None,
+            "last_event_seconds_ago": round(now - self.last_event_at, 3) if self.last_event_at else None
+        }
+
+    def apply_event(self, event: Dict):
+        """Update the cache from one container event"""
+        action = (event.get("Action") or event.get("status") or "").split(":")[0]
+        container_id = event.get("id") or event.get("Actor", {}).get("ID")
+        attributes = event.get("Actor", {}).get("Attributes", {})
+        if not container_id:
+            return
+
+        with self._lock:
+            self.last_event_at = time.time()
+            if action == "destroy":
+                self.containers.pop(container_id, None)
+                return
+
+            container = self.containers.get(container_id)
+            if container is None:
+                if action not in EVENT_STATUS and action != "rename":
+                    return
+                container = {
+                    "id": container_id,
+                    "name": attributes.get("name", ""),
+                    "image": attributes.get("image", event.get("from", "")),
+                    "status": "created",
+                    "labels": {k: v for k, v in attributes.items() if k not in ("name", "image")},
+                    "created": event.get("time")
+                }
+                self.containers[container_id] = container
+
+            if action == "rename":
+                container["name"] = attributes.get("name", container["name"])
+            elif action in EVENT_STATUS:
+                container["status"] = EVENT_STATUS[action]
+
+    def _watch(self, since: int):
+        while not self._stopping.is_set():
+            try:
+                self._stream = self.client.api.events(
+                    since=since, filters={"type": "container"}, decode=True
+                )
+                self.disconnected_at = None
+                for event in self._stream:
+                    self.apply_event(event)
+            except Exception as e:
+                if not self._stopping.is_set():
+                    logger.error(f"Container events stream failed: {str(e)}")
+            finally:
+                if self.disconnected_at is None:
+                    self.disconnected_at = time.time()
+
+            if self._stopping.wait(self.reconnect_delay):
+                return
+            # Events may have been missed while disconnected, start over from a fresh seed
+            since = int(time.time())
+            try:
+                self.seed()
+            except Exception as e:
+                logger.error(f"Container inventory reseed failed: {str(e)}")
@@ -0,0 +1,219 @@
+# conversation_store.py
+import copy
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+# Attributes whose entries are written one by one instead of as a whole map
+NESTED_ATTRIBUTES = ('slots',)
+# Attributes managed by the store itself
+RESERVED_ATTRIBUTES = ('id', 'version', 'updated_at')
+
+Path = Tuple[str, ...]
+
+class ConflictError(Exception):
+    """The conversation was changed by someone else since it was loaded"""
+
+def new_conversation(conversation_id: str) -> Dict:
+    return {'id': conversation_id, 'state': 'START', 'slots': {}, 'version': 0}
+
+def diff_state(old: Dict, new: Dict) -> Tuple[Dict[Path, Any], List[Path]]:
+    """Attribute paths to set and to remove to turn old into new"""
+    sets, removes = {}, []
+    for key, value in new.items():
+        if key in RESERVED_ATTRIBUTES:
+            continue
+        if key not in old:
+            sets[(key,)] = value
+        elif key in NESTED_ATTRIBUTES and isinstance(value, dict) and isinstance(old[key], dict):
+            for name, slot_value in value.items():
+                if old[key].get(name, object()) != slot_value:
+                    sets[(key, name)] = slot_value
+            removes.extend((key, name) for name in old[key] if name not in value)
+        elif old[key] != value:
+            sets[(key,)] = value
+    removes.extend((key,) for key in old if key not in new and key not in RESERVED_ATTRIBUTES)
+    return sets, removes
+
+class DynamoDBBackend:
+    """Conversation items in a DynamoDB table, written with partial conditional updates"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def get(self, conversation_id: str) -> Optional[Dict]:
+        return self.table.get_item(Key={'id': conversation_id}).get('Item')
+
+    def write(self, conversation_id: str, sets: Dict[Path, Any], removes: List[Path],
+              expected_version: int, new_version: int):
+        names, values = {}, {}
+
+        def path_expression(path: Path) -> str:
+            parts = []
+            for part in path:
+                alias = f"#n{len(names)}"
+                names[alias] = part
+                parts.append(alias)
+            return '.'.join(parts)
+
+        set_clauses = []
+        for path, value in sets.items():
+            alias = f":v{len(values)}"
+            values[alias] = value
+            set_clauses.append(f"{path_expression(path)} = {alias}")
+        names['#version'] = 'version'
+        values[':new_version'] = new_version
+        set_clauses.append('#version = :new_version')
+
+        expression = 'SET ' + ', '.join(set_clauses)
+        if removes:
+            expression += ' REMOVE ' + ', '.join(path_expression(path) for path in removes)
+
+        if expected_version:
+            condition = '#version = :expected_version'
+            values[':expected_version'] = expected_version
+        else:
+            condition = 'attribute_not_exists(#version)'
+
+        try:
+            self.table.update_item(
+                Key={'id': conversation_id},
+                UpdateExpression=expression,
+                ConditionExpression=condition,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except Exception as e:
+            if type(e).__name__ == 'ConditionalCheckFailedException' or \
+                    getattr(e, 'response', {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                raise ConflictError(conversation_id) from e
+            raise
+
+class SQLiteBackend:
+    """Local stand-in for DynamoDB with the same partial-update and version semantics"""
+
+    def __init__(self, path: str = ':memory:'):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS conversations (id TEXT PRIMARY KEY, version INTEGER, item TEXT)'
+        )
+        self.lock = threading.Lock()
+
+    def get(self, conversation_id: str) -> Optional[Dict]:
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT item FROM conversations WHERE id = ?', (conversation_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, conversation_id: str, sets: Dict[Path, Any], removes: List[Path],
+              expected_version: int, new_version: int):
+        with self.lock, self.conn:
+            row = self.conn.execute(
+                'SELECT version, item FROM conversations WHERE id = ?', (conversation_id,)
+            ).fetchone()
+            if (row[0] if row else 0) != expected_version:
+                raise ConflictError(conversation_id)
+
+            item = json.loads(row[1]) if row else {'id': conversation_id}
+            for path, value in sets.items():
+                target = item
+                for part in path[:-1]:
+                    target = target.setdefault(part, {})
+                target[path[-1]] = value
+            for path in removes:
+                target = item
+                for part in path[:-1]:
+                    target = target.get(part, {})
+                target.pop(path[-1], None)
+            item['version'] = new_version
+
+            self.conn.execute(
+                'INSERT OR REPLACE INTO conversations (id, version, item) VALUES (?, ?, ?)',
+                (conversation_id, new_version, json.dumps(item, default=str))
+            )
+
+class ConversationStore:
+    """Warm-container LRU cache of conversations in front of a backend
+
+    Saves write only the attributes that changed since the conversation was
+    loaded, guarded by a version check, and are skipped entirely when nothing
+    changed. A ConflictError means another container won the race; the cached
+    copy is dropped so the next load reads the stored one.
+    """
+
+    def __init__(self, backend, cache_size: int = 256):
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'skipped_writes': 0, 'conflicts': 0}
+
+    def load(self, conversation_id: str) -> Dict:
+        """Working copy of a conversation; mutate it and pass it to save()"""
+        with self._lock:
+            cached = self._cache.get(conversation_id)
+            if cached is not None:
+                self._cache.move_to_end(conversation_id)
+                self.stats['hits'] += 1
+                return copy.deepcopy(cached)
+            self.stats['misses'] += 1
+
+        item = self.backend.get(conversation_id) or new_conversation(conversation_id)
+        item.setdefault('version', 0)
+        self._remember(conversation_id, item)
+        return copy.deepcopy(item)
+
+    def save(self, state: Dict) -> bool:
+        """Write the changes made to a loaded conversation; returns False if there were none"""
+        conversation_id = state['id']
+        with self._lock:
+            snapshot = self._cache.get(conversation_id)
+        if snapshot is None or snapshot.get('version', 0) != state.get('version', 0):
+            # Evicted from the cache; diff against what is stored, which must
+            # still be the version this state was loaded from
+            snapshot = self.backend.get(conversation_id) or new_conversation(conversation_id)
+            snapshot.setdefault('version', 0)
+            if snapshot['version'] != state.get('version', 0):
+                self.stats['conflicts'] += 1
+                self.invalidate(conversation_id)
+                raise ConflictError(conversation_id)
+
+        sets, removes = diff_state(snapshot, state)
+        if not sets and not removes:
+            self.stats['skipped_writes'] += 1
+            return False
+        if not snapshot.get('version'):
+            # Nothing stored under version control yet, so nested maps may not
+            # exist in the item; write whole top-level attributes instead
+            sets, removes = diff_state({}, state)
+
+        state['updated_at'] = datetime.utcnow().isoformat()
+        sets[('updated_at',)] = state['updated_at']
+        expected_version = snapshot.get('version', 0)
+        new_version = expected_version + 1
+        try:
+            self.backend.write(conversation_id, sets, removes, expected_version, new_version)
+        except ConflictError:
+            self.stats['conflicts'] += 1
+            self.invalidate(conversation_id)
+            raise
+
+        state['version'] = new_version
+        self.stats['writes'] += 1
+        self._remember(conversation_id, state)
+        return True
+
+    def invalidate(self, conversation_id: str):
+        with self._lock:
+            self._cache.pop(conversation_id, None)
+
+    def _remember(self, conversation_id: str, item: Dict):
+        with self._lock:
+            self._cache[conversation_id] = copy.deepcopy(item)
+            self._cache.move_to_end(conversation_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
@@ -0,0 +1,100 @@
+# docker_bulk.py
+import fnmatch
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from entities import image_matches
+
+logger = logging.getLogger(__name__)
+
+BULK_ACTIONS = ("stop", "restart", "remove")
+
+def select_containers(containers: List[Dict], name: Optional[str] = None,
+                      label: Optional[str] = None, image: Optional[str] = None,
+                      status: Optional[str] = None) -> List[Dict]:
+    """Containers matching every given selector
+
+    name is a glob over container names, label is 'key' or 'key=value',
+    image matches either the full reference or just the repository and
+    status is the container state (running, exited, ...).
+    """
+    if not (name or label or image or status):
+        raise ValueError("At least one selector (name, label, image or status) is required")
+
+    label_key, _, label_value = (label or "").partition("=")
+    selected = []
+    for container in containers:
+        if name and not fnmatch.fnmatchcase(container["name"], name):
+            continue
+        if label:
+            labels = container.get("labels") or {}
+            if label_key not in labels or ("=" in label and labels[label_key] != label_value):
+                continue
+        if image and not image_matches(container["image"], image):
+            continue
+        if status and container["status"] != status:
+            continue
+        selected.append(container)
+    return selected
+
+def run_bulk(client, action: str, targets: List[Dict], max_workers: int = 8,
+             timeout: int = 10, force: bool = False,
+             slots: Optional[threading.BoundedSemaphore] = None) -> Dict:
+    """Apply one action to many containers concurrently and aggregate the outcome
+
+    timeout is the stop/restart grace period before Docker kills the
+    container. It does not bound the HTTP call: docker-py waits up to the
+    client's own timeout plus the grace period for stop and restart, and the
+    client timeout alone for remove. slots, when given, is held around each
+    daemon call to share the client's connection budget.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f"Unsupported bulk action: {action}")
+
+    def apply(container: Dict) -> Dict:
+        start = time.monotonic()
+        try:
+            if slots is not None:
+                with slots:
+                    _call(client, action, container["id"], timeout, force)
+            else:
+                _call(client, action, container["id"], timeout, force)
+            status, message = "success", None
+        except Exception as e:
+            logger.error(f"Bulk {action} failed for {container['name']}: {str(e)}")
+            status, message = "error", str(e)
+        return {
+            "id": container["id"][:12],
+            "name": container["name"],
+            "status": status,
+            "message": message,
+            "seconds": round(time.monotonic() - start, 3)
+        }
+
+    results = []
+    if targets:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(targets)),
+                                thread_name_prefix=f"bulk-{action}") as executor:
+            results = list(executor.map(apply, targets))
+
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    failed = len(results) - succeeded
+    return {
+        "status": "success" if not failed else ("partial" if succeeded else "error"),
+        "action": action,
+        "matched": len(targets),
+        "succeeded": succeeded,
+        "failed": failed,
+        "results": results
+    }
+
+def _call(client, action: str, container_id: str, timeout: int, force: bool):
+    if action == "stop":
+        client.api.stop(container_id, timeout=timeout)
+    elif action == "restart":
+        client.api.restart(container_id, timeout=timeout)
+    elif action == "remove":
+        client.api.remove_container(container_id, force=force)
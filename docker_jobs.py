@@ -0,0 +1,72 @@
+# docker_jobs.py
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class JobManager:
+    """Runs long Docker operations in the background and tracks their status"""
+
+    def __init__(self, max_workers: int = 4, max_finished: int = 1000):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="docker-job")
+        self._jobs: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, action: str, fn: Callable[..., Dict], *args, **kwargs) -> Dict:
+        """Queue fn(*args, **kwargs) as a job and return its initial record"""
+        job_id = uuid.uuid4().hex[:12]
+        job = {
+            "id": job_id,
+            "action": action,
+            "status": "pending",
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current record for a job, or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str, fn: Callable[..., Dict], args: tuple, kwargs: Dict):
+        self._update(job_id, status="running", started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            status = "failed" if result.get("status") == "error" else "succeeded"
+            self._update(job_id, status=status, result=result,
+                         error=result.get("message") if status == "failed" else None)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self._update(job_id, status="failed", error=str(e))
+        finally:
+            self._update(job_id, finished_at=time.time())
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        # Drop the oldest finished jobs once over the cap
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job["status"] in ("succeeded", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
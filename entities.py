@@ -0,0 +1,123 @@
+# entities.py
+import re
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import yaml
+
+class EntitySpec(NamedTuple):
+    keyword: str                    # Word that introduces the entity, scanned for in the text
+    lead: str                       # Optional words between the keyword and the value
+    value: str                      # Value pattern, must not contain capturing groups
+    convert: Callable[[str], Any]   # Turns the matched value into a typed value
+
+def parse_port_mapping(value: str) -> Tuple[int, int]:
+    """Split 'host:container' into a pair of ints"""
+    host, container = value.split(":", 1)
+    return int(host), int(container)
+
+def parse_image_ref(value: str) -> Dict[str, Optional[str]]:
+    """Split an image reference into repository, tag and digest (None unless pinned with @)"""
+    name, _, digest = value.partition("@")
+    # A colon before the last slash belongs to a registry port, not a tag
+    repo, sep, tag = name.rpartition(":")
+    if not sep or "/" in tag:
+        repo, tag = name, ""
+    return {"repo": repo, "tag": tag or "latest", "digest": digest or None}
+
+def image_matches(image: str, wanted: str) -> bool:
+    """Whether an image reference is `wanted`, given as the full reference or just its repository"""
+    return image == wanted or parse_image_ref(image)["repo"] == wanted
+
+ENTITY_SPECS = {
+    # Words that introduce another entity ("container image nginx", "container named web") are not ids
+    "container_id": EntitySpec(r"container ", r"(?:id |ID )?",
+                               r"(?!(?:image|named?|with|from|on|port)\b)[a-zA-Z0-9]+", str),
+    # Registry hosts, dotted tags and @sha256: digests; a trailing "." or ":" ends the sentence, not the ref
+    "image_name": EntitySpec(r"image ", r"(?:named? )?",
+                             r"[a-zA-Z0-9\-\_\/@]+(?:[\.\:][a-zA-Z0-9\-\_\/@]+)*", parse_image_ref),
+    "port_mapping": EntitySpec(r"port ", r"", r"\d+:\d+", parse_port_mapping),
+    "container_name": EntitySpec(r"name", r"(?:d)? ", r"[a-zA-Z0-9\-\_]+", str),
+    # Selectors for bulk operations: "all nginx containers", "labeled team=payments"
+    "container_group": EntitySpec(r"all ", r"", r"[a-zA-Z0-9\-\_\.\*]+(?= containers?\b)", str),
+    "label": EntitySpec(r"label(?:ed)? ", r"", r"[a-zA-Z0-9\-\_\.\/]+(?:=[a-zA-Z0-9\-\_\.\/]*)?", str)
+}
+
+class EntityExtractor:
+    """Extracts every entity from a command in a single pass over the text"""
+
+    def __init__(self, specs: Dict[str, EntitySpec] = ENTITY_SPECS):
+        self.specs = specs
+        # One alternation over all entities, scanned once. Only the keyword is
+        # consumed; the value is captured in a lookahead so the scan resumes
+        # right after the keyword and one entity's value may still hold another
+        # entity's keyword ("container named web"), as with per-pattern findall.
+        self.scanner = re.compile(
+            "|".join(
+                f"{spec.keyword}(?={spec.lead}(?P<{name}>{spec.value}))"
+                for name, spec in specs.items()
+            ),
+            re.IGNORECASE
+        )
+        self.value_patterns = {
+            name: re.compile(spec.value, re.IGNORECASE) for name, spec in specs.items()
+        }
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        """Return the first typed value found for each entity"""
+        entities = {}
+        for match in self.scanner.finditer(text):
+            name = match.lastgroup
+            if name not in entities:
+                entities[name] = self.specs[name].convert(match.group(name))
+                if len(entities) == len(self.specs):
+                    break
+        return entities
+
+    def parse(self, name: str, value: str) -> Optional[Any]:
+        """Parse a bare value as the given entity, or None if it does not match"""
+        if not self.value_patterns[name].fullmatch(value):
+            return None
+        return self.specs[name].convert(value)
+
+class SlotValidator:
+    """Validates and types slot values described in config/intents.yaml
+
+    Slots are checked against their `validation` regex, compiled once, and
+    converted by `type` (integer/string). A slot may instead name an entity
+    (`entity: image_name`) to be parsed by the shared EntityExtractor.
+    Slots the config does not describe are accepted as given.
+    """
+
+    def __init__(self, intents: Dict, extractor: Optional[EntityExtractor] = None):
+        self.extractor = extractor or EntityExtractor()
+        self.slots = {}
+        for intent, config in intents.items():
+            for slot, spec in config.get("required_slots", {}).items():
+                pattern = spec.get("validation")
+                self.slots[(intent, slot)] = (spec, re.compile(pattern) if pattern else None)
+
+    @classmethod
+    def from_yaml(cls, path: str = "config/intents.yaml") -> "SlotValidator":
+        with open(path) as f:
+            return cls(yaml.safe_load(f))
+
+    def validate(self, intent: str, slot: str, value: str) -> Tuple[bool, Any]:
+        """Return (is_valid, typed_value) for a user-supplied slot value"""
+        value = value.strip()
+        if (intent, slot) not in self.slots:
+            return True, value
+        spec, pattern = self.slots[(intent, slot)]
+        if not value:
+            return bool(spec.get("optional")), None
+        if pattern and not pattern.match(value):
+            return False, None
+
+        if spec.get("entity"):
+            parsed = self.extractor.parse(spec["entity"], value)
+            return parsed is not None, parsed
+        if spec.get("type") == "integer":
+            try:
+                return True, int(value)
+            except ValueError:
+                return False, None
+        return True, value
@@ -0,0 +1,164 @@
+# inference.py
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Classifier owned by each worker process
+_classifier = None
+
+def load_classifier(model_name: str):
+    """Load the classifier into this process so forked workers share its weights copy-on-write"""
+    global _classifier
+    from transformers import pipeline
+
+    if _classifier is None:
+        _classifier = pipeline("zero-shot-classification", model=model_name)
+        logger.info(f"Loaded {model_name} for sharing with forked workers")
+
+def _init_worker(model_name: str, num_threads: int):
+    """Load the zero-shot classifier once per worker process"""
+    global _classifier
+    import torch
+
+    torch.set_num_threads(num_threads)
+    if _classifier is None:
+        from transformers import pipeline
+        _classifier = pipeline("zero-shot-classification", model=model_name)
+        logger.info(f"Inference worker loaded {model_name}")
+
+def _classify_batch(commands: List[str], labels: List[str], hypothesis_template: str) -> List[Dict]:
+    """Run every premise x hypothesis pair of the batch through one forward pass"""
+    results = _classifier(
+        commands,
+        labels,
+        hypothesis_template=hypothesis_template,
+        batch_size=len(commands) * len(labels)
+    )
+    if isinstance(results, dict):
+        results = [results]
+    return [{"labels": r["labels"], "scores": r["scores"]} for r in results]
+
+class MicroBatcher:
+    """Gathers concurrent classification requests into batches for a pool of worker processes"""
+
+    def __init__(self, labels: List[str], hypothesis_template: str,
+                 model_name: str = "facebook/bart-large-mnli",
+                 max_batch_size: int = 16, max_wait_ms: float = 10.0,
+                 num_workers: int = 2, threads_per_worker: int = 1):
+        self.labels = list(labels)
+        self.hypothesis_template = hypothesis_template
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.model_name = model_name
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker
+
+        # Threads and worker processes do not survive a fork, so they are
+        # started on first use in whichever process ends up serving requests
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._requests: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue()
+            # One batch in flight per worker; requests keep queueing while all workers are busy
+            self._free_workers = threading.Semaphore(self.num_workers)
+            # Fork when the weights are already in memory so workers share them
+            context = "fork" if _classifier is not None else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=multiprocessing.get_context(context),
+                initializer=_init_worker,
+                initargs=(self.model_name, self.threads_per_worker)
+            )
+            self._collector = threading.Thread(target=self._collect, name="micro-batcher", daemon=True)
+            self._collector.start()
+            self._pid = os.getpid()
+
+    def submit(self, command: str) -> Future:
+        """Queue a command for classification"""
+        self._ensure_started()
+        future: Future = Future()
+        self._requests.put((command, future))
+        return future
+
+    def classify(self, command: str, timeout: Optional[float] = None) -> Dict:
+        """Classify a command, blocking until its batch has been scored"""
+        return self.submit(command).result(timeout=timeout)
+
+    def warm_up(self, timeout: Optional[float] = None):
+        """Start the worker pool and wait for a model to finish loading"""
+        self.classify("list containers", timeout=timeout)
+
+    def close(self):
+        """Stop collecting requests and shut down the worker pool"""
+        if self._pid != os.getpid():
+            return
+        self._requests.put(None)
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect(self):
+        while True:
+            item = self._requests.get()
+            if item is None:
+                return
+            self._free_workers.acquire()
+
+            # Gather whatever else arrives within the batching window
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._requests.get(timeout=remaining)
+                    else:
+                        item = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._dispatch(batch)
+            if stopping:
+                return
+
+    def _dispatch(self, batch: List[Tuple[str, Future]]):
+        commands = [command for command, _ in batch]
+        try:
+            future = self._executor.submit(
+                _classify_batch, commands, self.labels, self.hypothesis_template
+            )
+        except Exception as e:
+            self._free_workers.release()
+            for _, waiter in batch:
+                waiter.set_exception(e)
+            return
+        future.add_done_callback(lambda f: self._resolve(batch, f))
+
+    def _resolve(self, batch: List[Tuple[str, Future]], future: Future):
+        self._free_workers.release()
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Batch classification failed: {str(e)}")
+            for _, waiter in batch:
+                waiter.set_exception(e)
+            return
+        for (_, waiter), result in zip(batch, results):
+            waiter.set_result(result)
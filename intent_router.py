@@ -0,0 +1,98 @@
+# intent_router.py
+import logging
+import re
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Words that carry no intent and are dropped before the exact lookup
+FILLER_WORDS = {"a", "an", "the", "all", "my", "me", "please", "of", "for", "every", "any"}
+
+class IntentRouter:
+    """Resolves intents through exact lookup, embedding match and zero-shot fallback, cheapest first"""
+
+    TIERS = ("exact", "embedding", "zero_shot")
+
+    def __init__(self, command_mappings: Dict, classifier,
+                 embedding_model_name: str = "all-MiniLM-L6-v2",
+                 margin: float = 0.1, min_similarity: float = 0.6):
+        self.classifier = classifier
+        self.margin = margin
+        self.min_similarity = min_similarity
+        self.counts = Counter({tier: 0 for tier in self.TIERS})
+        self._lock = threading.Lock()
+
+        # Tier one: normalized pattern -> intent
+        self.exact_patterns = {}
+        pattern_texts, pattern_intents = [], []
+        for intent, mapping in command_mappings.items():
+            for pattern in mapping["patterns"]:
+                self.exact_patterns[self.normalize(pattern)] = intent
+                pattern_texts.append(pattern)
+                pattern_intents.append(intent)
+
+        # Tier two: patterns embedded once, matched by cosine similarity
+        self.intents = list(command_mappings.keys())
+        self.pattern_intent_ids = np.array([self.intents.index(i) for i in pattern_intents])
+        self.embedding_model = None
+        self.pattern_embeddings = None
+        try:
+            from sentence_transformers import SentenceTransformer
+            self.embedding_model = SentenceTransformer(embedding_model_name)
+            self.pattern_embeddings = self.embedding_model.encode(
+                pattern_texts, normalize_embeddings=True
+            ).astype(np.float32)
+            logger.info(f"Embedded {len(pattern_texts)} command patterns with {embedding_model_name}")
+        except Exception as e:
+            logger.error(f"Embedding tier disabled: {str(e)}")
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lowercase, strip punctuation and drop filler words"""
+        words = re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+        return " ".join(w for w in words if w not in FILLER_WORDS)
+
+    def route(self, command: str) -> Tuple[str, float, str]:
+        """Return (intent, confidence, tier) for a command"""
+        intent = self.exact_patterns.get(self.normalize(command))
+        if intent:
+            return self._record(intent, 1.0, "exact")
+
+        match = self._embedding_match(command)
+        if match:
+            return self._record(match[0], match[1], "embedding")
+
+        result = self.classifier.classify(command)
+        return self._record(result["labels"][0], result["scores"][0], "zero_shot")
+
+    def stats(self) -> Dict[str, int]:
+        """Number of requests answered by each tier"""
+        with self._lock:
+            return dict(self.counts)
+
+    def _embedding_match(self, command: str) -> Optional[Tuple[str, float]]:
+        if self.embedding_model is None:
+            return None
+
+        query = self.embedding_model.encode([command], normalize_embeddings=True)[0]
+        similarities = self.pattern_embeddings @ query
+
+        # Best pattern score per intent
+        intent_scores = np.full(len(self.intents), -1.0, dtype=np.float32)
+        np.maximum.at(intent_scores, self.pattern_intent_ids, similarities)
+        ranked = np.argsort(intent_scores)[::-1]
+        best = float(intent_scores[ranked[0]])
+        runner_up = float(intent_scores[ranked[1]]) if len(ranked) > 1 else -1.0
+
+        if best >= self.min_similarity and best - runner_up >= self.margin:
+            return self.intents[ranked[0]], best
+        return None
+
+    def _record(self, intent: str, confidence: float, tier: str) -> Tuple[str, float, str]:
+        with self._lock:
+            self.counts[tier] += 1
+        return intent, confidence, tier
@@ -1,22 +1,33 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import json
 import os
+import hashlib
 import logging
 import boto3
+import numpy as np
 import google.generativeai as genai
-from datetime import datetime
+
+from conversation_store import ConflictError, ConversationStore, DynamoDBBackend, SQLiteBackend, new_conversation
+from entities import SlotValidator
 
 # Setup logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # Initialize AWS and Gemini
-dynamodb = boto3.resource('dynamodb')
-conversations_table = dynamodb.Table(os.environ['CONVERSATIONS_TABLE'])
+if os.environ.get('STATE_BACKEND', 'dynamodb') == 'sqlite':
+    # Local/offline runs keep conversations in SQLite instead of DynamoDB
+    state_backend = SQLiteBackend(os.environ.get('STATE_DB_PATH', ':memory:'))
+else:
+    dynamodb = boto3.resource('dynamodb')
+    conversations_table = dynamodb.Table(os.environ['CONVERSATIONS_TABLE'])
+    state_backend = DynamoDBBackend(conversations_table)
+
+# Conversations stay cached for as long as the container is warm
+conversation_store = ConversationStore(state_backend, cache_size=int(os.environ.get('STATE_CACHE_SIZE', '256')))
 
 genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
 model = genai.GenerativeModel('gemini-pro')
-embedder = genai.GenerativeModel('embedding-001')
 
 # Define intents with their required info
 INTENTS = {
@@ -39,42 +50,112 @@ INTENTS = {
     # Add other intents here
 }
 
+# Answers are checked and typed against the slot rules in config/intents.yaml
+slot_validator = SlotValidator.from_yaml(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'intents.yaml')
+)
+
+# Precomputed intent embeddings, stored next to the code and rebuilt only
+# when an intent description changes
+EMBEDDING_MODEL = 'models/embedding-001'
+INTENT_INDEX_PATH = os.environ.get(
+    'INTENT_INDEX_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_index.npz')
+)
+INTENT_THRESHOLD = 0.7  # Confidence threshold
+_intent_index = None
+
 def get_conversation_state(conversation_id: str) -> Dict:
-    """Get conversation state from DynamoDB"""
+    """Get conversation state from the warm cache or DynamoDB"""
     try:
-        response = conversations_table.get_item(Key={'id': conversation_id})
-        return response.get('Item', {'id': conversation_id, 'state': 'START', 'slots': {}})
+        return conversation_store.load(conversation_id)
     except Exception as e:
         logger.error(f"Failed to get conversation state: {e}")
-        return {'id': conversation_id, 'state': 'START', 'slots': {}}
+        return new_conversation(conversation_id)
 
 def save_conversation_state(state: Dict):
-    """Save conversation state to DynamoDB"""
+    """Save the attributes of the conversation state that changed this turn"""
     try:
-        state['updated_at'] = datetime.utcnow().isoformat()
-        conversations_table.put_item(Item=state)
+        conversation_store.save(state)
+    except ConflictError:
+        raise
     except Exception as e:
         logger.error(f"Failed to save conversation state: {e}")
 
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed a batch of texts as L2-normalized float32 rows"""
+    response = genai.embed_content(model=EMBEDDING_MODEL, content=texts)
+    vectors = np.asarray(response['embedding'], dtype=np.float32).reshape(len(texts), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def intents_fingerprint() -> str:
+    """Hash of the embedding model and intent descriptions the index was built from"""
+    payload = json.dumps(
+        [EMBEDDING_MODEL] + [[intent_id, info['description']] for intent_id, info in INTENTS.items()]
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def build_intent_index(path: str = INTENT_INDEX_PATH) -> Dict:
+    """Embed all intent descriptions in one batch and persist the matrix"""
+    intent_ids = list(INTENTS)
+    index = {
+        'fingerprint': intents_fingerprint(),
+        'intent_ids': intent_ids,
+        'embeddings': embed_texts([INTENTS[i]['description'] for i in intent_ids])
+    }
+    for target in (path, os.path.join('/tmp', os.path.basename(path))):
+        try:
+            np.savez(
+                target,
+                fingerprint=np.array(index['fingerprint']),
+                intent_ids=np.array(intent_ids),
+                embeddings=index['embeddings']
+            )
+            logger.info(f"Saved intent index with {len(intent_ids)} intents to {target}")
+            break
+        except OSError as e:
+            # The Lambda package directory is read-only, fall back to /tmp
+            logger.warning(f"Could not save intent index to {target}: {e}")
+    return index
+
+def load_intent_index() -> Dict:
+    """Load the intent index, rebuilding it if the intent descriptions changed"""
+    global _intent_index
+    fingerprint = intents_fingerprint()
+    if _intent_index is not None and _intent_index['fingerprint'] == fingerprint:
+        return _intent_index
+
+    for path in (os.path.join('/tmp', os.path.basename(INTENT_INDEX_PATH)), INTENT_INDEX_PATH):
+        try:
+            with np.load(path) as data:
+                if str(data['fingerprint']) == fingerprint:
+                    _intent_index = {
+                        'fingerprint': fingerprint,
+                        'intent_ids': [str(i) for i in data['intent_ids']],
+                        'embeddings': data['embeddings'].astype(np.float32)
+                    }
+                    return _intent_index
+            logger.info(f"Intent index at {path} is stale")
+        except (OSError, KeyError, ValueError):
+            continue
+
+    _intent_index = build_intent_index()
+    return _intent_index
+
 def detect_intent(text: str) -> Optional[str]:
     """Detect intent using Gemini embeddings"""
     try:
-        # Get embedding for user input
-        user_embedding = embedder.embed_content(text)
-        
-        # Get embeddings for intent descriptions
-        best_match = None
-        highest_score = 0
-        
-        for intent_id, intent_info in INTENTS.items():
-            intent_embedding = embedder.embed_content(intent_info['description'])
-            score = user_embedding.similarity(intent_embedding)
-            
-            if score > highest_score and score > 0.7:  # Confidence threshold
-                highest_score = score
-                best_match = intent_id
-        
-        return best_match
+        index = load_intent_index()
+
+        # One embedding call for the user input, scored against every intent at once
+        user_embedding = embed_texts([text])[0]
+        scores = index['embeddings'] @ user_embedding
+
+        best = int(np.argmax(scores))
+        if scores[best] > INTENT_THRESHOLD:
+            return index['intent_ids'][best]
+        return None
     except Exception as e:
         logger.error(f"Intent detection failed: {e}")
         return None
@@ -111,7 +192,15 @@ def generate_response(state: Dict, user_input: str) -> Dict:
             # Store the answer to the previous slot
             pending_slots = [s for s in INTENTS[current_intent]['slots'] if s not in slots]
             if pending_slots:
-                slots[pending_slots[0]] = user_input
+                slot = pending_slots[0]
+                valid, value = slot_validator.validate(current_intent, slot, user_input)
+                if not valid:
+                    return {
+                        'message': f"That doesn't look like a valid {slot.replace('_', ' ')}. "
+                                   + INTENTS[current_intent]['slots'][slot],
+                        'state': state
+                    }
+                slots[slot] = value
                 state['slots'] = slots
                 
                 # Check if we need more slots
@@ -164,14 +253,27 @@ def lambda_handler(event, context):
                 })
             }
 
-        # Get conversation state
-        state = get_conversation_state(conversation_id)
-        
-        # Generate response
-        response = generate_response(state, message)
-        
-        # Save updated state
-        save_conversation_state(response['state'])
+        for attempt in range(2):
+            # Get conversation state
+            state = get_conversation_state(conversation_id)
+
+            # Generate response
+            response = generate_response(state, message)
+
+            # Save updated state; if another container moved the conversation
+            # on in the meantime, replay the turn once on the stored state
+            try:
+                save_conversation_state(response['state'])
+                break
+            except ConflictError:
+                logger.warning(f"Conversation {conversation_id} changed concurrently, retrying turn")
+        else:
+            return {
+                'statusCode': 409,
+                'body': json.dumps({
+                    'error': 'Conversation was updated concurrently, please retry'
+                })
+            }
         
         return {
             'statusCode': 200,
@@ -188,4 +290,8 @@ def lambda_handler(event, context):
             'body': json.dumps({
                 'error': str(e)
             })
-        }
\ No newline at end of file
+        }
+
+if __name__ == '__main__':
+    # Build the intent index at packaging time: python lambda_function.py
+    build_intent_index()
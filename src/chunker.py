@@ -0,0 +1,97 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Iterable, Iterator, Tuple
+
+SENTENCE_RE = re.compile(r'(?<=[.!?])\s+(?=\S)')
+
+@lru_cache(maxsize=None)
+def model_token_counter(model_name: str = 'sentence-transformers/all-mpnet-base-v2') -> Callable[[str], int]:
+    """Counts tokens the way the embedding model's tokenizer does, without special tokens
+
+    Loaded once per process, so parse workers each pay for it once.
+    """
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    def count(text: str) -> int:
+        return len(tokenizer(text, add_special_tokens=False, return_attention_mask=False,
+                             verbose=False)['input_ids'])
+    return count
+
+def _pieces(text: str, count_tokens: Callable[[str], int], max_tokens: int,
+            tokens: int) -> Iterator[Tuple[str, int, str]]:
+    """Split text of more than max_tokens into (piece, tokens, separator) no larger than max_tokens
+
+    Code (multi-line text) splits on lines, prose on sentences, then words;
+    a single word too long for a chunk is cut by characters.
+    """
+    if '\n' in text:
+        parts, separator = [line for line in text.split('\n') if line.strip()], '\n'
+    else:
+        parts, separator = SENTENCE_RE.split(text), ' '
+        if len(parts) == 1:
+            parts = text.split()
+    if len(parts) == 1:
+        # No boundary left to split on: cut proportionally to the token count
+        width = max(1, len(text) * max_tokens // (tokens + 1))
+        parts, separator = [text[i:i + width] for i in range(0, len(text), width)], ''
+
+    for part in parts:
+        part_tokens = count_tokens(part)
+        if part_tokens > max_tokens:
+            # The first piece follows the previous part; the rest use their own boundary
+            first = True
+            for piece, piece_tokens, piece_separator in _pieces(part, count_tokens, max_tokens, part_tokens):
+                yield piece, piece_tokens, separator if first else piece_separator
+                first = False
+        else:
+            yield part, part_tokens, separator
+
+def chunk_paragraphs(paragraphs: Iterable[str], count_tokens: Callable[[str], int],
+                     max_tokens: int = 382, overlap_tokens: int = 48) -> Iterator[str]:
+    """Pack paragraphs into chunks of at most max_tokens, each repeating up to overlap_tokens of the last
+
+    Paragraphs are consumed and chunks yielded as they fill, so only the
+    current chunk is held in memory. The window slides: once a chunk is
+    emitted, paragraphs are dropped from its front until what is left fits in
+    the overlap, so every paragraph is counted and dropped once. Paragraphs
+    longer than max_tokens are split first rather than left to be truncated
+    by the model.
+    """
+    window: Deque[Tuple[str, int, str]] = deque()
+    total = 0
+    fresh = False       # Whether the window holds anything not yet emitted
+
+    def items(paragraph: str) -> Iterator[Tuple[str, int, str]]:
+        tokens = count_tokens(paragraph)
+        if tokens <= max_tokens:
+            yield paragraph, tokens, ' '
+        else:
+            first = True
+            for piece, piece_tokens, separator in _pieces(paragraph, count_tokens, max_tokens, tokens):
+                yield piece, piece_tokens, ' ' if first else separator
+                first = False
+
+    for paragraph in paragraphs:
+        for text, tokens, separator in items(paragraph):
+            if fresh and total + tokens > max_tokens:
+                yield _join(window)
+                fresh = False
+                while window and (total > overlap_tokens or total + tokens > max_tokens):
+                    total -= window.popleft()[1]
+            window.append((text, tokens, separator))
+            total += tokens
+            fresh = True
+
+    if fresh:
+        yield _join(window)
+
+def _join(window: Deque[Tuple[str, int, str]]) -> str:
+    parts = []
+    for i, (text, _, separator) in enumerate(window):
+        if i:
+            parts.append(separator)
+        parts.append(text)
+    return ''.join(parts)
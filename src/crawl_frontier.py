@@ -0,0 +1,106 @@
+import logging
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def canonicalize_url(url: str, keep_query: bool = False) -> str:
+    """One spelling per page: no fragment or query, lowercase host, no default
+    port and a trailing slash on every path that is not a file"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    last_segment = path.rsplit('/', 1)[-1]
+    if last_segment and '.' not in last_segment:
+        path += '/'
+
+    return urlunsplit((scheme, host, path, parts.query if keep_query else '', ''))
+
+class CrawlFrontier:
+    """Breadth-first crawl queue and visited set, checkpointed to SQLite
+
+    Every URL is canonicalized and stored once. A page and the links found on
+    it are recorded in one transaction, so after a crash the crawl resumes
+    from the checkpoint: pages that finished are not fetched again and pages
+    that were in flight go back in the queue.
+    """
+
+    def __init__(self, path: str = ':memory:', max_depth: int = 3,
+                 in_scope: Optional[Callable[[str], bool]] = None):
+        self.path = path
+        self.max_depth = max_depth
+        self.in_scope = in_scope or (lambda url: True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS frontier ('
+                'seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, depth INTEGER, status TEXT)'
+            )
+            self.conn.execute('CREATE INDEX IF NOT EXISTS frontier_queue ON frontier (status, depth, seq)')
+            # Pages in flight when the last run stopped never finished
+            resumed = self.conn.execute(
+                "UPDATE frontier SET status = 'pending' WHERE status = 'fetching'"
+            ).rowcount
+        if resumed or self.stats()['done']:
+            logger.info(f"Resuming crawl from {path}: {self.stats()}")
+
+    def add(self, urls: Iterable[str], depth: int = 0) -> int:
+        """Queue unseen in-scope urls at depth; returns how many were new"""
+        with self.conn:
+            return self._add(urls, depth)
+
+    def _add(self, urls: Iterable[str], depth: int) -> int:
+        if depth > self.max_depth:
+            return 0
+        rows = {canonicalize_url(url) for url in urls}
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO frontier (url, depth, status) VALUES (?, ?, 'pending')",
+            [(url, depth) for url in rows if self.in_scope(url)]
+        )
+        return self.conn.total_changes - before
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """Shallowest queued url and its depth, marked in flight; None when the queue is empty"""
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT seq, url, depth FROM frontier WHERE status = 'pending' ORDER BY depth, seq LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute("UPDATE frontier SET status = 'fetching' WHERE seq = ?", (row[0],))
+        return row[1], row[2]
+
+    def complete(self, url: str, depth: int, links: Iterable[str] = ()):
+        """Mark url done and queue the links found on it one level deeper"""
+        with self.conn:
+            self.conn.execute("UPDATE frontier SET status = 'done' WHERE url = ?", (canonicalize_url(url),))
+            self._add(links, depth + 1)
+
+    def fail(self, url: str):
+        with self.conn:
+            self.conn.execute("UPDATE frontier SET status = 'failed' WHERE url = ?", (canonicalize_url(url),))
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict(self.conn.execute('SELECT status, COUNT(*) FROM frontier GROUP BY status').fetchall())
+        return {status: counts.get(status, 0) for status in ('pending', 'fetching', 'done', 'failed')}
+
+    def close(self, remove: bool = False):
+        """Close the checkpoint, deleting it when the crawl is finished for good"""
+        self.conn.close()
+        if remove and self.path != ':memory:':
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
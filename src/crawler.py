@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from crawl_frontier import CrawlFrontier
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying; everything else >= 400 fails immediately
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class Page(NamedTuple):
+    status: int                     # 200, or 304 when a conditional GET found no change
+    text: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+class TokenBucket:
+    """Async rate limiter: `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self.updated is not None:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def parse_pool(workers: int, preload: Iterable[str] = ()) -> ProcessPoolExecutor:
+    """Process pool whose workers come from a fork server rather than forks of this process
+
+    By the time a pool starts, this process already runs threads (the event
+    loop's default executor, torch's intra-op pool), and a fork copies their
+    locks in whatever state they are in. The fork server is a fresh process;
+    it imports the modules named in preload once and every worker forks from
+    it with them loaded. Only the first pool to start the server preloads.
+    """
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(list(preload))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+class AsyncCrawler:
+    """Concurrent page fetcher over one pooled keep-alive session
+
+    Each host gets its own concurrency cap and token bucket, so a crawl stays
+    polite without sleeping between requests. Failed requests are retried with
+    jittered exponential backoff, and HTML parsing is pushed to a process pool
+    so it never blocks the event loop.
+    """
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None, max_connections: int = 32,
+                 per_host_concurrency: int = 8, per_host_rate: float = 10.0, burst: int = 8,
+                 max_retries: int = 3, backoff: float = 0.5, timeout: float = 30.0,
+                 parse_workers: Optional[int] = None, preload: Iterable[str] = ()):
+        self.headers = headers or {}
+        self.max_connections = max_connections
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_rate = per_host_rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.preload = list(preload)    # Modules the parse functions live in
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
+        self._hosts: Dict[str, tuple] = {}
+        self.stats = {'fetched': 0, 'not_modified': 0, 'failed': 0, 'retries': 0, 'bytes': 0}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.per_host_concurrency,
+            ttl_dns_cache=300
+        )
+        self.session = aiohttp.ClientSession(
+            headers=self.headers,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self._parse_pool = parse_pool(self.parse_workers, self.preload)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.session.close()
+        self._parse_pool.shutdown(wait=True)
+
+    def _host_limits(self, url: str) -> tuple:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = (
+                asyncio.Semaphore(self.per_host_concurrency),
+                TokenBucket(self.per_host_rate, self.burst)
+            )
+        return self._hosts[host]
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Body of url, or None once retries are exhausted or on a non-retryable error"""
+        page = await self.fetch_page(url)
+        return page.text if page else None
+
+    async def fetch_page(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[Page]:
+        """Like fetch, with extra request headers (e.g. conditional GET validators)
+        and the response's own validators"""
+        semaphore, bucket = self._host_limits(url)
+        for attempt in range(self.max_retries):
+            retry_after = None
+            async with semaphore:
+                await bucket.acquire()
+                try:
+                    async with self.session.get(url, headers=headers) as response:
+                        if response.status == 304:
+                            self.stats['not_modified'] += 1
+                            return Page(304, '', response.headers.get('ETag'),
+                                        response.headers.get('Last-Modified'))
+                        if response.status not in RETRY_STATUSES:
+                            response.raise_for_status()
+                            text = await response.text()
+                            self.stats['fetched'] += 1
+                            self.stats['bytes'] += len(text)
+                            return Page(response.status, text, response.headers.get('ETag'),
+                                        response.headers.get('Last-Modified'))
+                        retry_after = response.headers.get('Retry-After')
+                        logger.warning(f"Got {response.status} from {url}")
+                except aiohttp.ClientResponseError as e:
+                    logger.error(f"Error fetching {url}: {e}")
+                    break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.error(f"Error fetching {url}: {e}")
+
+            if attempt < self.max_retries - 1:
+                self.stats['retries'] += 1
+                delay = self.backoff * 2 ** attempt * (0.5 + random.random())
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, float(retry_after))
+                await asyncio.sleep(delay)
+
+        self.stats['failed'] += 1
+        return None
+
+    async def parse(self, fn: Callable[..., Any], *args) -> Any:
+        """Run a picklable parse function in the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_pool, fn, *args)
+
+    async def crawl(self, urls: Iterable[str],
+                    handle: Callable[[str, str], Awaitable[None]]) -> Dict[str, int]:
+        """Fetch every url concurrently and await handle(url, html) for each page"""
+        async def visit(url: str):
+            html = await self.fetch(url)
+            if html is None:
+                return
+            try:
+                await handle(url, html)
+            except Exception as e:
+                logger.error(f"Error processing {url}: {e}")
+
+        await asyncio.gather(*(visit(url) for url in dict.fromkeys(urls)))
+        return dict(self.stats)
+
+    async def crawl_frontier(self, frontier: CrawlFrontier,
+                             handle: Callable[[str, Page], Awaitable[Optional[List[str]]]],
+                             workers: Optional[int] = None,
+                             request_headers: Optional[Callable[[str], Dict[str, str]]] = None
+                             ) -> Dict[str, int]:
+        """Breadth-first crawl from the frontier until it runs dry
+
+        handle(url, page) processes a page and returns the links found on it;
+        the frontier filters, deduplicates and queues them one level deeper.
+        request_headers(url), when given, supplies per-url headers such as
+        conditional GET validators; handle also sees the 304 responses.
+        """
+        in_flight = 0
+        changed = asyncio.Condition()
+
+        async def worker():
+            nonlocal in_flight
+            while True:
+                async with changed:
+                    while True:
+                        item = frontier.pop()
+                        if item is not None:
+                            in_flight += 1
+                            break
+                        if in_flight == 0:
+                            # Nothing queued and nothing left that could queue more
+                            changed.notify_all()
+                            return
+                        await changed.wait()
+
+                url, depth = item
+                try:
+                    page = await self.fetch_page(url, request_headers(url) if request_headers else None)
+                    if page is None:
+                        frontier.fail(url)
+                    else:
+                        frontier.complete(url, depth, await handle(url, page) or [])
+                except Exception as e:
+                    logger.error(f"Error processing {url}: {e}")
+                    frontier.fail(url)
+                finally:
+                    async with changed:
+                        in_flight -= 1
+                        changed.notify_all()
+
+        await asyncio.gather(*(worker() for _ in range(workers or self.max_connections)))
+        return dict(self.stats)
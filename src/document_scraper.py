@@ -1,8 +1,7 @@
 import os
-import requests
-from bs4 import BeautifulSoup
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 import asyncio
 from supabase import create_client, Client
@@ -10,12 +9,24 @@ from sentence_transformers import SentenceTransformer
 import re
 from dotenv import load_dotenv
 import time
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future
+from crawler import AsyncCrawler, Page
+from crawl_frontier import CrawlFrontier
+from page_index import PageIndex
+from embedding_pipeline import EmbeddingPipeline
+from document_writer import DocumentWriter
+from html_extract import ExtractedPage, extract_page
+from chunker import chunk_paragraphs, model_token_counter
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Chunk size in model tokens: all-mpnet-base-v2 reads 384, [CLS] and [SEP] included.
+# Read here rather than in __init__ because chunking runs in the parse worker processes
+CHUNK_MAX_TOKENS = int(os.getenv("SCRAPER_CHUNK_TOKENS", "382"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("SCRAPER_CHUNK_OVERLAP_TOKENS", "48"))
+
 class DockerDocsScraper:
     def __init__(self):
         self.base_url = "https://docs.docker.com"
@@ -34,38 +45,50 @@ class DockerDocsScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+
+        # Crawl limits for docs.docker.com
+        self.max_connections = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "16"))
+        self.per_host_concurrency = int(os.getenv("SCRAPER_PER_HOST_CONCURRENCY", "4"))
+        self.per_host_rate = float(os.getenv("SCRAPER_PER_HOST_RATE", "2"))
+        self.max_depth = int(os.getenv("SCRAPER_MAX_DEPTH", "3"))
+        # Crawl progress is kept here so an interrupted crawl resumes where it stopped
+        self.checkpoint_path = os.getenv("SCRAPER_CHECKPOINT", "crawl_checkpoint.db")
+        # Validators and chunk hashes from earlier runs; unchanged pages are skipped
+        self.page_index = PageIndex(os.getenv("SCRAPER_PAGE_INDEX", "page_index.db"))
+        self.incremental = os.getenv("SCRAPER_INCREMENTAL", "1") != "0"
+
+        # Chunks from all pages are embedded together in length-bucketed batches
+        self.embed_batch_size = int(os.getenv("SCRAPER_EMBED_BATCH_SIZE", "64"))
+        self.embed_workers = int(os.getenv("SCRAPER_EMBED_WORKERS", "1"))
+        self.embed_threads = int(os.getenv("SCRAPER_EMBED_THREADS", str(os.cpu_count() or 1)))
+
+        # Rows from all pages are buffered and upserted together
+        self.write_batch_size = int(os.getenv("SCRAPER_WRITE_BATCH_SIZE", "500"))
+        self.flush_interval = float(os.getenv("SCRAPER_FLUSH_INTERVAL", "1.0"))
     
-    def extract_metadata(self, soup: BeautifulSoup, url: str) -> Dict[str, Any]:
+    @classmethod
+    def extract_metadata(cls, page: ExtractedPage, url: str) -> Dict[str, Any]:
         """Extract targeted Docker-specific metadata"""
-        text = soup.get_text().lower()
+        text = page.text.lower()
         
         # Extract commands
-        code_blocks = soup.find_all('code')
-        commands = [block.text.strip() for block in code_blocks 
-                   if block.text.strip().startswith('docker')]
-        
-        # Extract prerequisites
-        prereq_section = soup.find(['h2', 'h3'], string=re.compile(r'prerequisites|requirements', re.I))
-        prerequisites = []
-        if prereq_section:
-            prereq_list = prereq_section.find_next('ul')
-            if prereq_list:
-                prerequisites = [li.text.strip() for li in prereq_list.find_all('li')]
+        commands = [code.strip() for code in page.code if code.strip().startswith('docker')]
 
         metadata = {
-            'command_category': self._get_command_category(url, text),
-            'component_type': self._get_component_type(url, text),
-            'resource_type': self._get_resource_type(soup),
+            'command_category': cls._get_command_category(url, text),
+            'component_type': cls._get_component_type(url, text),
+            'resource_type': cls._get_resource_type(page.title),
             'docker_commands': commands[:10],  # Limit to most relevant
-            'prerequisites': prerequisites,
-            'environment': self._get_environment_type(text),
-            'os_compatibility': self._get_os_compatibility(text),
-            'docker_version': self._extract_version(text),
+            'prerequisites': page.prerequisites,
+            'environment': cls._get_environment_type(text),
+            'os_compatibility': cls._get_os_compatibility(text),
+            'docker_version': cls._extract_version(text),
             'last_updated': time.strftime('%Y-%m-%d')
         }
         return metadata
 
-    def _get_command_category(self, url: str, text: str) -> str:
+    @staticmethod
+    def _get_command_category(url: str, text: str) -> str:
         categories = {
             'container': ['container', 'run', 'exec'],
             'network': ['network', 'port', 'proxy'],
@@ -80,7 +103,8 @@ class DockerDocsScraper:
                 return category
         return 'general'
 
-    def _get_component_type(self, url: str, text: str) -> str:
+    @staticmethod
+    def _get_component_type(url: str, text: str) -> str:
         components = {
             'cli': ['command line', 'cli', 'command reference'],
             'daemon': ['dockerd', 'daemon', 'engine api'],
@@ -89,17 +113,18 @@ class DockerDocsScraper:
             'api': ['api', 'endpoint', 'rest']
         }
         
+        text = text.lower()
         for comp, keywords in components.items():
-            if any(k in text.lower() or k in url for k in keywords):
+            if any(k in text or k in url for k in keywords):
                 return comp
         return 'general'
 
-    def _get_resource_type(self, soup: BeautifulSoup) -> str:
-        title = soup.find('h1')
-        if not title:
+    @staticmethod
+    def _get_resource_type(title: Optional[str]) -> str:
+        if title is None:
             return 'general'
             
-        title_text = title.text.lower()
+        title_text = title.lower()
         
         if any(word in title_text for word in ['how to', 'tutorial', 'guide']):
             return 'tutorial'
@@ -109,7 +134,8 @@ class DockerDocsScraper:
             return 'troubleshooting'
         return 'general'
 
-    def _get_environment_type(self, text: str) -> List[str]:
+    @staticmethod
+    def _get_environment_type(text: str) -> List[str]:
         environments = []
         if any(word in text for word in ['development', 'local', 'test']):
             environments.append('development')
@@ -117,7 +143,8 @@ class DockerDocsScraper:
             environments.append('production')
         return environments or ['general']
 
-    def _get_os_compatibility(self, text: str) -> List[str]:
+    @staticmethod
+    def _get_os_compatibility(text: str) -> List[str]:
         os_list = []
         if any(word in text for word in ['linux', 'ubuntu', 'debian']):
             os_list.append('linux')
@@ -127,175 +154,203 @@ class DockerDocsScraper:
             os_list.append('macos')
         return os_list or ['all']
 
-    def _extract_version(self, text: str) -> Optional[str]:
+    @staticmethod
+    def _extract_version(text: str) -> Optional[str]:
         version_pattern = r'Docker version (\d+\.\d+)'
         match = re.search(version_pattern, text)
         return match.group(1) if match else None
 
-    def get_page_content(self, url: str) -> str:
-        """Fetch content from a URL with rate limiting and retries"""
-        for attempt in range(3):  # 3 retries
-            try:
-                response = requests.get(url, headers=self.headers)
-                response.raise_for_status() # Automatically checks if response has returned any error codes (4XX, 5XX)
-                time.sleep(1)  # Rate limiting
-                return response.text
-            except Exception as e:
-                logger.error(f"Error fetching {url}: {e}")
-                if attempt == 2:  # Last attempt
-                    raise
-                time.sleep(2 ** attempt)  # Exponential backoff
-        return ""
-    
     @staticmethod
-    def create_chunks(paragraphs: List[str], max_size: int = 1500, overlap: int = 200) -> List[str]:
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        
-        for para in paragraphs:
-            if current_length + len(para) > max_size:
-                if current_chunk:
-                    chunks.append(' '.join(current_chunk))
-                    # Keep last few paragraphs for overlap
-                    overlap_size = 0
-                    overlap_chunks = []
-                    for p in reversed(current_chunk):
-                        if overlap_size + len(p) <= overlap:
-                            overlap_chunks.insert(0, p)
-                            overlap_size += len(p)
-                        else:
-                            break
-                    current_chunk = overlap_chunks
-                    current_length = overlap_size
-                current_chunk.append(para)
-                current_length += len(para)
-            else:
-                current_chunk.append(para)
-                current_length += len(para)
-        
-        if current_chunk:
-            chunks.append(' '.join(current_chunk))
-        return chunks
+    def create_chunks(paragraphs: Iterable[str], max_tokens: int = CHUNK_MAX_TOKENS,
+                      overlap_tokens: int = CHUNK_OVERLAP_TOKENS) -> Iterator[str]:
+        """Chunks that fit the embedding model, measured with its own tokenizer"""
+        return chunk_paragraphs(paragraphs, model_token_counter(), max_tokens, overlap_tokens)
 
-    def extract_content(self, html_content: str) -> Dict[str, Any]:
+    @classmethod
+    def extract_content(cls, html_content: str, url: str) -> Dict[str, Any]:
         """Extract meaningful content from HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Remove navigation, footer, and other non-content elements
-        for element in soup.find_all(['nav', 'footer', 'script', 'style']):
-            element.decompose()
-        
-        # Get the main content
-        main_content = soup.find('main') or soup.find(class_='content')
-        if not main_content:
+        return cls._content_from_page(extract_page(html_content), url)
+
+    @classmethod
+    def parse_page(cls, html_content: str, url: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """Content and outgoing links of a page from a single parse"""
+        page = extract_page(html_content)
+        links = [urljoin(url, href) for href in page.links]
+        return cls._content_from_page(page, url), links
+
+    @classmethod
+    def _content_from_page(cls, page: ExtractedPage, url: str) -> Optional[Dict[str, Any]]:
+        # Navigation, footer, scripts and styles were skipped while parsing
+        if not page.found_main:
             return None
-            
-        # Extract title
-        title = soup.find('h1')
-        title_text = title.get_text().strip() if title else ""
-        
-        # Extract text from paragraphs and lists
-        paragraphs = []
-        for elem in main_content.find_all(['p', 'li', 'h2', 'h3', 'code']):
-            text = elem.get_text().strip()
-            if elem.name == 'code':
-                    if text:
-                        paragraphs.append(text)
-            elif text and len(text) > 20:
-            # Filter other elements by length
-                    paragraphs.append(text)
         
         #metadata extraction
-        metadata = self.extract_metadata(soup, self.current_url)
+        metadata = cls.extract_metadata(page, url)
         return {
-            "title": title_text,
-            "chunks": self.create_chunks(paragraphs),
-            "url": self.current_url,
+            "title": page.title.strip(),
+            "chunks": list(cls.create_chunks(cls._paragraphs(page))),
+            "url": url,
             "metadata": metadata
         }
 
-    def collect_doc_urls(self, start_url: str) -> List[str]:
-        """Collect all documentation URLs starting from a given URL"""
-        try:
-            content = self.get_page_content(start_url)
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            urls = set()
-            # Find all links within the documentation
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                full_url = urljoin(start_url, href)
-                
-                # Only include Docker documentation URLs
-                if full_url.startswith(self.base_url) and '/engine/' in full_url:
-                    urls.add(full_url)
-            
-            return list(urls)
-            
-        except Exception as e:
-            logger.error(f"Error collecting URLs: {e}")
-            return []
+    @staticmethod
+    def _paragraphs(page: ExtractedPage) -> Iterator[str]:
+        # Extract text from paragraphs and lists
+        for tag, text in zip(page.block_tags, page.blocks):
+            text = text.strip()
+            if tag == 'code':
+                    if text:
+                        yield text
+            elif text and len(text) > 20:
+            # Filter other elements by length
+                    yield text
 
-    async def embed_and_store(self, content: Dict[str, Any]) -> None:
-        """Generate embeddings and store in Supabase"""
+    def in_scope(self, url: str) -> bool:
+        """Only Docker engine documentation pages are crawled"""
+        return url.startswith(self.base_url) and '/engine/' in url
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _queue_writes(self, content: Dict[str, Any], added: Dict[str, str], embeddings: List,
+                      stale: List[str], first_seen: bool) -> List[Future]:
+        rows = [
+            {
+                'url': content['url'],
+                'chunk_hash': chunk_hash,
+                'content': chunk,
+                'metadata': {
+                    'title': content['title'],
+                    'url': content['url'],
+                    'chunk_hash': chunk_hash,
+                    **content['metadata']  # Include all extracted metadata
+                },
+                'embedding': embedding.tolist()
+            }
+            for (chunk_hash, chunk), embedding in zip(added.items(), embeddings)
+        ]
+        futures = [self.writer.upsert(rows)]
+        if first_seen:
+            # Rows stored before the page was indexed may hold chunks it no longer has
+            futures.append(self.writer.delete(content['url'], keep=list(added)))
+        elif stale:
+            futures.append(self.writer.delete(content['url'], stale=stale))
+        return futures
+
+    @classmethod
+    def diff_chunks(cls, content: Dict[str, Any], stored_hashes: Optional[List[str]]
+                    ) -> Tuple[List[str], Dict[str, str], List[str]]:
+        """The page's chunk hashes, the chunks not stored yet by hash, and the stored hashes that are gone"""
+        chunks = {cls.content_hash(chunk): chunk for chunk in content['chunks']}
+        known = set(stored_hashes or ())
+        added = {chunk_hash: chunk for chunk_hash, chunk in chunks.items() if chunk_hash not in known}
+        stale = [chunk_hash for chunk_hash in known if chunk_hash not in chunks]
+        return list(chunks), added, stale
+
+    async def store_chunks(self, content: Dict[str, Any], added: Dict[str, str], embeddings: List,
+                           stale: List[str], first_seen: bool):
+        """Upsert embedded chunks and delete stale ones, returning once the writer has flushed them"""
+        futures = self._queue_writes(content, added, embeddings, stale, first_seen)
+        # Wait for the writer's next flush, which carries other pages' rows too
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        logger.info(f"Stored {len(added)} new chunks and removed {len(stale)} stale ones from {content['title']}")
+
+    async def embed_and_store(self, content: Dict[str, Any],
+                              stored_hashes: Optional[List[str]] = None) -> Optional[List[str]]:
+        """Embed and upsert the chunks not stored yet and delete the ones that are gone
+
+        stored_hashes are the chunk hashes already in Supabase for this page, or
+        None if the page was never indexed. Returns the page's chunk hashes, or
+        None if storing failed.
+        """
+        chunk_hashes, added, stale = self.diff_chunks(content, stored_hashes)
+        if stored_hashes is not None and not added and not stale:
+            return chunk_hashes
         try:
-            for chunk in content['chunks']:
-                # Generate embedding
-                embedding = self.embedding_model.encode(chunk).tolist()
-                
-                 
-                data = {
-                    'content': chunk,
-                    'metadata': {
-                        'title': content['title'],
-                        'url': content['url'],
-                        **content['metadata']  # Include all extracted metadata
-                    },
-                    'embedding': embedding
-                }
-                
-                self.supabase.table('documents').insert(data).execute()
-                logger.info(f"Stored chunk from {content['title']}")
+            embeddings = await self.embedder.embed(list(added.values())) if added else []
+            await self.store_chunks(content, added, embeddings, stale, stored_hashes is None)
+            return chunk_hashes
                 
         except Exception as e:
             logger.error(f"Error storing content: {e}")
+            return None
 
-    async def process_url(self, url: str) -> None:
-        """Process a single URL"""
-        try:
-            self.current_url = url
-            content = self.get_page_content(url)
-            if not content:
-                return
-                
-            extracted = self.extract_content(content)
-            if extracted:
-                await self.embed_and_store(extracted)
-                
-        except Exception as e:
-            logger.error(f"Error processing {url}: {e}")
+    async def process_page(self, crawler: AsyncCrawler, url: str, page: Page) -> List[str]:
+        """Store what changed on a fetched page and return its links
+
+        Pages that answered 304 or whose body hashes the same as last time are
+        skipped without parsing; the links recorded for them keep the crawl going.
+        """
+        known = self.page_index.get(url) if self.incremental else None
+        if page.status == 304:
+            return known['links'] if known else []
+        body_hash = self.content_hash(page.text)
+        if known and known['content_hash'] == body_hash:
+            return known['links']
+
+        # Parse off the event loop
+        extracted, links = await crawler.parse(self.parse_page, page.text, url)
+        # A page that lost its main content keeps none of its chunks
+        extracted = extracted or {'title': url, 'chunks': [], 'url': url, 'metadata': {}}
+        chunk_hashes = await self.embed_and_store(extracted, known['chunk_hashes'] if known else None)
+        if chunk_hashes is None:
+            # Not stored; leave the index as it was so the next run retries
+            return links
+        self.page_index.put(url, page.etag, page.last_modified, body_hash,
+                            chunk_hashes, links, time.time())
+        return links
+
+    async def open_outputs(self):
+        """Start the shared embedding pipeline and document writer"""
+        self.writer = DocumentWriter(
+            self.supabase,
+            batch_size=self.write_batch_size,
+            flush_interval=self.flush_interval
+        )
+        self.embedder = await EmbeddingPipeline(
+            self.embedding_model,
+            batch_size=self.embed_batch_size,
+            num_workers=self.embed_workers,
+            num_threads=self.embed_threads
+        ).start()
+
+    async def close_outputs(self):
+        """Embed and write what is still queued"""
+        await self.embedder.close()
+        self.writer.close()
 
     async def scrape_and_store(self):
         """Main function to scrape Docker docs and store in Supabase"""
         try:
-            # Collect URLs
-            urls = self.collect_doc_urls(self.docs_url)
-            logger.info(f"Found {len(urls)} documentation pages")
-            
-            # Process URLs concurrently
-            tasks = []
-            for url in urls:
-                task = asyncio.create_task(self.process_url(url))
-                tasks.append(task)
-                await asyncio.sleep(0.5)  # Rate limiting
-                
-            await asyncio.gather(*tasks)
-            
-            logger.info("Documentation scraping and storage complete")
+            frontier = CrawlFrontier(self.checkpoint_path, max_depth=self.max_depth, in_scope=self.in_scope)
+            frontier.add([self.docs_url])
+
+            await self.open_outputs()
+
+            async with AsyncCrawler(
+                headers=self.headers,
+                max_connections=self.max_connections,
+                per_host_concurrency=self.per_host_concurrency,
+                per_host_rate=self.per_host_rate,
+                preload=[__name__]
+            ) as crawler:
+                # Breadth-first from the start page, paced per host by the crawler
+                stats = await crawler.crawl_frontier(
+                    frontier, lambda url, page: self.process_page(crawler, url, page),
+                    request_headers=self.page_index.validators if self.incremental else None
+                )
+            await self.close_outputs()
+
+            logger.info(f"Documentation scraping and storage complete: {stats}, pages: {frontier.stats()}, "
+                        f"embedding: {self.embedder.stats}, writes: {self.writer.stats}")
+            # Finished, so the next run starts a fresh crawl
+            frontier.close(remove=True)
             
         except Exception as e:
             logger.error(f"Error in scrape_and_store: {e}")
+        finally:
+            self.page_index.close()
 
 async def main():
     scraper = DockerDocsScraper()
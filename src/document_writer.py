@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# The upserts need a unique index on (url, chunk_hash); run this once in the
+# Supabase SQL editor (or psql) before the first write
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations',
+                           'documents_url_chunk_hash.sql')
+
+# Postgres' answer to ON CONFLICT on columns without a unique index
+MISSING_INDEX_ERRORS = ('42P10', 'no unique or exclusion constraint matching the ON CONFLICT')
+
+class DocumentWriter:
+    """Buffers document rows and flushes them as multi-row upserts
+
+    Rows are upserted on (url, chunk_hash), so writing a page twice leaves one
+    copy and re-runs are idempotent. Deletes of stale chunks are buffered the
+    same way. A background thread flushes every flush_interval seconds, or
+    sooner once batch_size rows are waiting; failed requests are retried with
+    backoff. upsert() and delete() return futures that resolve once their
+    rows have been flushed.
+    """
+
+    def __init__(self, client, table: str = 'documents', batch_size: int = 500,
+                 flush_interval: float = 2.0, max_retries: int = 3, backoff: float = 0.5,
+                 on_conflict: str = 'url,chunk_hash'):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.on_conflict = on_conflict
+        self._rows: List[Tuple[Dict, "_Countdown"]] = []
+        self._deletes: List[Tuple[str, Optional[List[str]], Optional[List[str]], Future]] = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._flusher = threading.Thread(target=self._run, name="document-writer", daemon=True)
+        self._flusher.start()
+        self.stats = {'rows': 0, 'deletes': 0, 'requests': 0, 'retries': 0, 'failed': 0}
+
+    def upsert(self, rows: List[Dict]) -> Future:
+        """Queue rows for upsert"""
+        future: Future = Future()
+        if not rows:
+            future.set_result(None)
+            return future
+        # All of a call's rows share one future; it resolves when the last of them is written
+        pending = _Countdown(future, len(rows))
+        with self._lock:
+            self._rows.extend((row, pending) for row in rows)
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self._wake.set()
+        return future
+
+    def delete(self, url: str, keep: Optional[List[str]] = None,
+               stale: Optional[List[str]] = None) -> Future:
+        """Queue deletion of a page's chunks: those in stale, or all not in keep"""
+        future: Future = Future()
+        with self._lock:
+            self._deletes.append((url, keep, stale, future))
+        return future
+
+    def flush(self):
+        """Write everything buffered so far"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            deletes, self._deletes = self._deletes, []
+
+        # Postgres rejects an upsert that hits the same key twice, so the last write wins
+        keys = self.on_conflict.split(',')
+        latest = {}
+        for row, waiter in rows:
+            key = tuple(row.get(k) for k in keys)
+            if key in latest:
+                latest[key][1].done_one()
+            latest[key] = (row, waiter)
+        rows = list(latest.values())
+
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            waiters = {id(waiter): waiter for _, waiter in batch}
+            try:
+                self._execute(lambda: self.client.table(self.table)
+                              .upsert([row for row, _ in batch], on_conflict=self.on_conflict)
+                              .execute())
+                self.stats['rows'] += len(batch)
+                for _, waiter in batch:
+                    waiter.done_one()
+            except Exception as e:
+                logger.error(f"Upsert of {len(batch)} rows failed: {str(e)}")
+                for waiter in waiters.values():
+                    waiter.fail(e)
+
+        for url, keep, stale, future in deletes:
+            try:
+                self._execute(lambda: self._delete_query(url, keep, stale).execute())
+                self.stats['deletes'] += 1
+                future.set_result(None)
+            except Exception as e:
+                logger.error(f"Deleting stale chunks of {url} failed: {str(e)}")
+                future.set_exception(e)
+
+    def close(self):
+        """Flush what is left and stop the background thread"""
+        self._stopping = True
+        self._wake.set()
+        self._flusher.join()
+        self.flush()
+
+    def _delete_query(self, url: str, keep: Optional[List[str]], stale: Optional[List[str]]):
+        query = self.client.table(self.table).delete().eq('url', url)
+        if keep is not None:
+            return query.not_.in_('chunk_hash', keep) if keep else query
+        return query.in_('chunk_hash', stale or [])
+
+    def _execute(self, request: Callable):
+        for attempt in range(self.max_retries):
+            self.stats['requests'] += 1
+            try:
+                return request()
+            except Exception as e:
+                if any(marker in str(e) for marker in MISSING_INDEX_ERRORS):
+                    # Retrying cannot help; every upsert fails until the migration is applied
+                    self.stats['failed'] += 1
+                    raise RuntimeError(
+                        f"{self.table} has no unique index on ({self.on_conflict}); apply {SCHEMA_PATH}"
+                    ) from e
+                if attempt == self.max_retries - 1:
+                    self.stats['failed'] += 1
+                    raise
+                self.stats['retries'] += 1
+                logger.warning(f"Supabase request failed, retrying: {str(e)}")
+                time.sleep(self.backoff * 2 ** attempt)
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Flush failed: {str(e)}")
+
+class _Countdown:
+    """Resolves a future after n rows have been written, or fails it on the first error"""
+
+    def __init__(self, future: Future, n: int):
+        self.future = future
+        self.remaining = n
+        self._lock = threading.Lock()
+
+    def done_one(self):
+        with self._lock:
+            self.remaining -= 1
+            if self.remaining == 0 and not self.future.done():
+                self.future.set_result(None)
+
+    def fail(self, error: Exception):
+        with self._lock:
+            if not self.future.done():
+                self.future.set_exception(error)
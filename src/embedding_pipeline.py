@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingPipeline:
+    """Streams chunks from many pages through length-bucketed encode batches
+
+    Callers await embed(texts) with one page's chunks. Chunks from all pages
+    land in one bounded queue; a collector drains up to bucket_batches batches
+    worth at a time, sorts them by length so each batch pads to similar sizes,
+    and hands the batches to a small thread pool running the model. A full
+    queue makes embed() wait, which holds back the crawl feeding it.
+    """
+
+    def __init__(self, model, batch_size: int = 64, max_wait_ms: float = 50.0,
+                 num_workers: int = 1, num_threads: Optional[int] = None,
+                 queue_size: int = 1024, bucket_batches: int = 4):
+        self.model = model
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.num_workers = num_workers
+        self.num_threads = num_threads
+        self.queue_size = queue_size
+        self.bucket_batches = bucket_batches
+        self.stats = {'chunks': 0, 'batches': 0, 'encode_seconds': 0.0}
+
+    async def start(self):
+        if self.num_threads:
+            import torch
+            torch.set_num_threads(self.num_threads)
+        self._queue: "asyncio.Queue[Optional[Tuple[str, asyncio.Future]]]" = asyncio.Queue(self.queue_size)
+        # One batch in flight per worker; chunks keep queueing while all workers are busy
+        self._free_workers = asyncio.Semaphore(self.num_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="embed")
+        self._in_flight = set()
+        self._collector = asyncio.create_task(self._collect())
+        return self
+
+    async def embed(self, texts: List[str]) -> List:
+        """Vectors for texts, in order, once every batch holding them has been encoded"""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            await self._queue.put((text, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def close(self):
+        """Encode what is queued, then stop the collector and the worker pool"""
+        await self._queue.put(None)
+        await self._collector
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        self._executor.shutdown(wait=True)
+
+    async def _collect(self):
+        bucket_size = self.batch_size * self.bucket_batches
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+
+            # Gather whatever else arrives within the batching window
+            pending = [item]
+            deadline = asyncio.get_running_loop().time() + self.max_wait
+            stopping = False
+            while len(pending) < bucket_size:
+                remaining = deadline - asyncio.get_running_loop().time()
+                try:
+                    if remaining > 0:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                pending.append(item)
+
+            # Similar lengths together so little of each batch is padding
+            pending.sort(key=lambda entry: len(entry[0]))
+            for start in range(0, len(pending), self.batch_size):
+                await self._free_workers.acquire()
+                task = asyncio.create_task(self._encode(pending[start:start + self.batch_size]))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+            if stopping:
+                return
+
+    async def _encode(self, batch: List[Tuple[str, asyncio.Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            start = time.perf_counter()
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                self._executor, lambda: self.model.encode(texts, batch_size=len(texts))
+            )
+            self.stats['encode_seconds'] += time.perf_counter() - start
+        except Exception as e:
+            logger.error(f"Embedding batch failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._free_workers.release()
+
+        self.stats['chunks'] += len(batch)
+        self.stats['batches'] += 1
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
@@ -0,0 +1,167 @@
+import re
+from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional
+
+# Subtrees dropped from the content and page text (links inside them still count)
+SKIPPED_TAGS = frozenset(['nav', 'footer', 'script', 'style'])
+BLOCK_TAGS = frozenset(['p', 'li', 'h2', 'h3', 'code'])
+VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                       'param', 'source', 'track', 'wbr'])
+PREREQUISITES_RE = re.compile(r'prerequisites|requirements', re.I)
+
+class ExtractedPage(NamedTuple):
+    title: str                  # Text of the first h1
+    found_main: bool            # Whether the page has a <main> or class="content" element
+    blocks: List[str]           # Text of p / li / h2 / h3 / code inside it, in document order
+    block_tags: List[str]       # Tag of each block
+    code: List[str]             # Text of every <code> on the page
+    prerequisites: List[str]    # Items of the list after a "Prerequisites" / "Requirements" heading
+    links: List[str]            # href of every <a>, as written
+    text: str                   # Page text outside the skipped subtrees
+
+class _Block:
+    __slots__ = ('tag', 'depth', 'parts', 'in_main', 'in_content')
+
+    def __init__(self, tag: str, depth: int, in_main: bool, in_content: bool):
+        self.tag = tag
+        self.depth = depth
+        self.parts: List[str] = []
+        self.in_main = in_main
+        self.in_content = in_content
+
+class _PageExtractor(HTMLParser):
+    """Collects everything DockerDocsScraper needs from one pass over the markup
+
+    No tree is built: an open-element stack tracks which regions (skipped
+    subtree, main, content, blocks being captured) the current text falls
+    in, and each piece of text is appended to every capture that is open.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[str] = []
+        self.skip_depth: Optional[int] = None
+        self.main_depth: Optional[int] = None
+        self.content_depth: Optional[int] = None
+        self.found_main = self.found_content = False
+        self.blocks: List[_Block] = []
+        self.open_blocks: List[_Block] = []
+        self.title_parts: Optional[List[str]] = None
+        self.title_depth: Optional[int] = None
+        self.title: Optional[str] = None
+        self.heading_parts: Optional[List[str]] = None
+        self.heading_depth: Optional[int] = None
+        self.awaiting_list = False
+        self.list_depth: Optional[int] = None
+        self.prerequisites: Optional[List[str]] = None
+        self.prerequisite_blocks: List[_Block] = []
+        self.links: List[str] = []
+        self.text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href is not None:
+                self.links.append(href)
+        if tag in VOID_TAGS:
+            return
+        depth = len(self.stack)
+        self.stack.append(tag)
+        if self.skip_depth is not None:
+            return
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = depth
+            return
+
+        if tag == 'main' and not self.found_main:
+            self.found_main, self.main_depth = True, depth
+        if not self.found_content and 'content' in (dict(attrs).get('class') or '').split():
+            self.found_content, self.content_depth = True, depth
+        if tag == 'h1' and self.title is None and self.title_parts is None:
+            self.title_parts, self.title_depth = [], depth
+        if (tag in ('h2', 'h3') and self.heading_parts is None
+                and not self.awaiting_list and self.prerequisites is None):
+            self.heading_parts, self.heading_depth = [], depth
+        if tag == 'ul' and self.awaiting_list:
+            self.awaiting_list, self.list_depth, self.prerequisites = False, depth, []
+        if tag == 'li' and self.list_depth is not None:
+            block = _Block(tag, depth, False, False)
+            self.prerequisite_blocks.append(block)
+            self.open_blocks.append(block)
+        if tag in BLOCK_TAGS:
+            block = _Block(tag, depth, self.main_depth is not None, self.content_depth is not None)
+            self.blocks.append(block)
+            self.open_blocks.append(block)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href is not None:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag not in self.stack:
+            return
+        # Close everything opened since the matching start tag, as a tree builder would
+        while self.stack:
+            depth = len(self.stack) - 1
+            if self.stack.pop() == tag:
+                self._close(depth)
+                return
+            self._close(depth)
+
+    def _close(self, depth: int):
+        if self.skip_depth is not None:
+            if depth == self.skip_depth:
+                self.skip_depth = None
+            return
+        while self.open_blocks and self.open_blocks[-1].depth >= depth:
+            self.open_blocks.pop()
+        if depth == self.main_depth:
+            self.main_depth = None
+        if depth == self.content_depth:
+            self.content_depth = None
+        if depth == self.title_depth:
+            self.title, self.title_parts, self.title_depth = ''.join(self.title_parts), None, None
+        if depth == self.heading_depth:
+            if PREREQUISITES_RE.search(''.join(self.heading_parts)):
+                self.awaiting_list = True
+            self.heading_parts, self.heading_depth = None, None
+        if depth == self.list_depth:
+            self.list_depth = None
+
+    def handle_data(self, data):
+        if self.skip_depth is not None:
+            return
+        self.text.append(data)
+        for block in self.open_blocks:
+            block.parts.append(data)
+        if self.title_parts is not None:
+            self.title_parts.append(data)
+        if self.heading_parts is not None:
+            self.heading_parts.append(data)
+
+    def result(self) -> ExtractedPage:
+        # <main> wins over class="content", wherever each appears
+        if self.found_main:
+            blocks = [block for block in self.blocks if block.in_main]
+        else:
+            blocks = [block for block in self.blocks if block.in_content]
+        title = self.title if self.title is not None else ''.join(self.title_parts or [])
+        return ExtractedPage(
+            title=title,
+            found_main=self.found_main or self.found_content,
+            blocks=[''.join(block.parts) for block in blocks],
+            block_tags=[block.tag for block in blocks],
+            code=[''.join(block.parts) for block in self.blocks if block.tag == 'code'],
+            prerequisites=[''.join(block.parts).strip() for block in self.prerequisite_blocks],
+            links=self.links,
+            text=''.join(self.text)
+        )
+
+def extract_page(html: str) -> ExtractedPage:
+    """Title, content blocks, code, prerequisites, links and text of a page in a single parse"""
+    extractor = _PageExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return extractor.result()
@@ -0,0 +1,282 @@
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urljoin
+
+from crawler import AsyncCrawler, Page, parse_pool
+from document_scraper import DockerDocsScraper
+
+logger = logging.getLogger(__name__)
+
+class _Item:
+    """One page on its way through the stages; fields are filled in as it goes"""
+    __slots__ = ('url', 'path', 'page', 'known', 'body_hash', 'content', 'links',
+                 'chunk_hashes', 'added', 'stale', 'embeddings')
+
+    def __init__(self, url: str, path: Optional[str] = None):
+        self.url = url
+        self.path = path
+        self.page: Optional[Page] = None
+        self.known: Optional[Dict[str, Any]] = None
+        self.body_hash: Optional[str] = None
+        self.content: Optional[Dict[str, Any]] = None
+        self.links: List[str] = []
+        self.chunk_hashes: List[str] = []
+        self.added: Dict[str, str] = {}
+        self.stale: List[str] = []
+        self.embeddings: List = []
+
+class Stage:
+    """A pool of async workers draining one bounded queue into the next stage's
+
+    handle(item) returns the item to pass on, or None to drop it (nothing to
+    do); an exception counts as a failure and drops the item too. A full
+    downstream queue blocks the workers here, so a slow stage holds back
+    everything before it instead of letting pages pile up in memory.
+    """
+
+    def __init__(self, name: str, handle: Callable[[_Item], Awaitable[Optional[_Item]]],
+                 workers: int, queue_size: int):
+        self.name = name
+        self.handle = handle
+        self.workers = workers
+        self.queue: "asyncio.Queue[_Item]" = asyncio.Queue(queue_size)
+        self.next: Optional["Stage"] = None
+        self.stats = {'processed': 0, 'dropped': 0, 'failed': 0, 'busy_seconds': 0.0, 'max_queue': 0}
+        self._tasks: List[asyncio.Task] = []
+
+    async def put(self, item: _Item):
+        await self.queue.put(item)
+        self.stats['max_queue'] = max(self.stats['max_queue'], self.queue.qsize())
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def drain(self):
+        """Wait for everything queued here to be handled and passed on, then stop the workers"""
+        await self.queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                start = time.perf_counter()
+                try:
+                    result = await self.handle(item)
+                finally:
+                    self.stats['busy_seconds'] += time.perf_counter() - start
+                if result is None:
+                    self.stats['dropped'] += 1
+                    continue
+                self.stats['processed'] += 1
+                if self.next is not None:
+                    await self.next.put(result)
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"{self.name} failed for {item.url}: {e}")
+            finally:
+                self.queue.task_done()
+
+class IngestPipeline:
+    """fetch -> parse -> embed -> store, each stage with its own workers and a bounded queue in front
+
+    Fetching is async over the crawler's pooled session, or reads files from
+    a local mirror. Parsing, metadata and chunking run together in a process
+    pool, so a page crosses the process boundary once. Embedding goes through
+    the scraper's batched EmbeddingPipeline, which fills each encode batch
+    with chunks from every page in the stage at once. Storing waits on the
+    scraper's DocumentWriter flushes. Unchanged pages are dropped after the
+    fetch, as in DockerDocsScraper.process_page, and the page index is only
+    updated once a page's rows are written.
+    """
+
+    def __init__(self, scraper: DockerDocsScraper, fetch_workers: int = 16, parse_workers: Optional[int] = None,
+                 embed_workers: int = 32, store_workers: int = 128, queue_size: int = 64,
+                 report_interval: float = 10.0):
+        self.scraper = scraper
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.embed_workers = embed_workers
+        self.store_workers = store_workers
+        self.queue_size = queue_size
+        self.report_interval = report_interval
+        self.crawler: Optional[AsyncCrawler] = None
+        self.stages: List[Stage] = []
+
+    async def run_urls(self, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch and ingest every url; links are recorded but not followed"""
+        scraper = self.scraper
+        async with AsyncCrawler(
+            headers=scraper.headers,
+            max_connections=scraper.max_connections,
+            per_host_concurrency=scraper.per_host_concurrency,
+            per_host_rate=scraper.per_host_rate,
+            parse_workers=1     # Parsing uses the pipeline's own pool
+        ) as crawler:
+            self.crawler = crawler
+            return await self._run(_Item(url) for url in dict.fromkeys(urls))
+
+    async def run_directory(self, root: str, base_url: str) -> Dict[str, Dict[str, Any]]:
+        """Ingest the .html files of a local mirror, each under base_url + its path in root"""
+        return await self._run(_Item(url, path) for url, path in mirror_files(root, base_url))
+
+    async def _run(self, items: Iterator[_Item]) -> Dict[str, Dict[str, Any]]:
+        self.stages = [
+            Stage('fetch', self._fetch, self.fetch_workers, self.queue_size),
+            Stage('parse', self._parse, self.parse_workers, self.queue_size),
+            Stage('embed', self._embed, self.embed_workers, self.queue_size),
+            Stage('store', self._store, self.store_workers, self.queue_size),
+        ]
+        for stage, after in zip(self.stages, self.stages[1:]):
+            stage.next = after
+
+        # Forked from a fork server with document_scraper (parse_page's module) already imported
+        self._pool = parse_pool(self.parse_workers, ['document_scraper'])
+        await self.scraper.open_outputs()
+        started = time.perf_counter()
+        reporter = asyncio.create_task(self._report(started))
+        try:
+            for stage in self.stages:
+                stage.start()
+            # Blocks whenever the fetch queue is full, so urls are only read as fast as pages finish
+            for item in items:
+                await self.stages[0].put(item)
+            for stage in self.stages:
+                await stage.drain()
+        finally:
+            reporter.cancel()
+            await self.scraper.close_outputs()
+            self._pool.shutdown(wait=True)
+            self.scraper.page_index.close()
+
+        stats = self.stats(time.perf_counter() - started)
+        logger.info(f"Ingestion complete: {stats}, embedding: {self.scraper.embedder.stats}, "
+                    f"writes: {self.scraper.writer.stats}")
+        return stats
+
+    def stats(self, elapsed: float) -> Dict[str, Dict[str, Any]]:
+        return {
+            stage.name: {
+                **stage.stats,
+                'queue': stage.queue.qsize(),
+                'per_second': round(stage.stats['processed'] / elapsed, 2) if elapsed else 0.0
+            }
+            for stage in self.stages
+        }
+
+    async def _report(self, started: float):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            elapsed = time.perf_counter() - started
+            logger.info("  ".join(
+                f"{name}: {stats['processed']} ({stats['per_second']}/s) queue {stats['queue']}/{self.queue_size}"
+                for name, stats in self.stats(elapsed).items()
+            ))
+
+    async def _fetch(self, item: _Item) -> Optional[_Item]:
+        scraper = self.scraper
+        item.known = scraper.page_index.get(item.url) if scraper.incremental else None
+        if item.path is not None:
+            item.page = Page(200, await asyncio.to_thread(_read, item.path))
+        else:
+            headers = scraper.page_index.validators(item.url) if scraper.incremental else None
+            item.page = await self.crawler.fetch_page(item.url, headers)
+            if item.page is None:
+                raise RuntimeError("fetch failed")
+            if item.page.status == 304:
+                return None
+        item.body_hash = scraper.content_hash(item.page.text)
+        if item.known and item.known['content_hash'] == item.body_hash:
+            return None
+        return item
+
+    async def _parse(self, item: _Item) -> Optional[_Item]:
+        loop = asyncio.get_running_loop()
+        content, item.links = await loop.run_in_executor(
+            self._pool, DockerDocsScraper.parse_page, item.page.text, item.url
+        )
+        # Only the validators are needed from here on
+        item.page = item.page._replace(text='')
+        # A page that lost its main content keeps none of its chunks
+        item.content = content or {'title': item.url, 'chunks': [], 'url': item.url, 'metadata': {}}
+        return item
+
+    async def _embed(self, item: _Item) -> Optional[_Item]:
+        stored_hashes = item.known['chunk_hashes'] if item.known else None
+        item.chunk_hashes, item.added, item.stale = self.scraper.diff_chunks(item.content, stored_hashes)
+        if item.added:
+            item.embeddings = await self.scraper.embedder.embed(list(item.added.values()))
+        return item
+
+    async def _store(self, item: _Item) -> Optional[_Item]:
+        first_seen = item.known is None
+        if first_seen or item.added or item.stale:
+            await self.scraper.store_chunks(item.content, item.added, item.embeddings, item.stale, first_seen)
+        self.scraper.page_index.put(item.url, item.page.etag, item.page.last_modified, item.body_hash,
+                                    item.chunk_hashes, item.links, time.time())
+        return item
+
+def _read(path: str) -> str:
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+def mirror_files(root: str, base_url: str) -> Iterator[tuple]:
+    """(url, path) of every .html file under root; index.html maps to its directory's url"""
+    base_url = base_url.rstrip('/') + '/'
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if not name.endswith(('.html', '.htm')):
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            if name == 'index.html':
+                relative = relative[:-len('index.html')]
+            yield urljoin(base_url, relative), path
+
+def read_urls(path: str) -> Iterator[str]:
+    """Urls from a file, one per line; blank lines and # comments are skipped"""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+async def main():
+    parser = argparse.ArgumentParser(description="Ingest Docker docs pages through the staged pipeline")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--urls', help="File with one url per line")
+    source.add_argument('--html-dir', help="Local mirror of the docs to ingest instead of fetching")
+    parser.add_argument('--base-url', default="https://docs.docker.com",
+                        help="Url the --html-dir root corresponds to")
+    parser.add_argument('--fetch-workers', type=int, default=16)
+    parser.add_argument('--parse-workers', type=int, default=None, help="Parse processes (default: cpu count)")
+    parser.add_argument('--embed-workers', type=int, default=32, help="Pages waiting on embeddings at once")
+    parser.add_argument('--store-workers', type=int, default=128,
+                        help="Pages waiting on writes at once; enough to fill a write batch")
+    parser.add_argument('--queue-size', type=int, default=64, help="Pages queued in front of each stage")
+    parser.add_argument('--report-interval', type=float, default=10.0, help="Seconds between progress lines")
+    args = parser.parse_args()
+
+    pipeline = IngestPipeline(
+        DockerDocsScraper(),
+        fetch_workers=args.fetch_workers,
+        parse_workers=args.parse_workers,
+        embed_workers=args.embed_workers,
+        store_workers=args.store_workers,
+        queue_size=args.queue_size,
+        report_interval=args.report_interval
+    )
+    if args.urls:
+        await pipeline.run_urls(read_urls(args.urls))
+    else:
+        await pipeline.run_directory(args.html_dir, args.base_url)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,304 @@
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Flags, subcommands and file names stay whole ("--restart", "unless-stopped",
+# "docker-compose.yml"); their parts are indexed as well
+TOKEN_RE = re.compile(r"-{0,2}[a-z0-9](?:[a-z0-9_.\-/:=]*[a-z0-9])?")
+PART_RE = re.compile(r"[_.\-/:=]+")
+STOP_WORDS = frozenset(
+    'a an and are as at be by can do does for from how i in is it my of on or the this to use using what '
+    'when where which with you your'.split()
+)
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        tokens.append(token)
+        parts = [part for part in PART_RE.split(token.lstrip('-')) if part]
+        if len(parts) > 1 or token.startswith('-'):
+            tokens.extend(part for part in parts if part not in STOP_WORDS)
+    return tokens
+
+class _State:
+    """Postings, lengths and rows of one version of the index"""
+    __slots__ = ('terms', 'docs', 'freqs', 'lengths', 'alive', 'rows', 'by_id', 'live', 'total_length', 'version')
+
+    def __init__(self):
+        self.terms: Dict[str, int] = {}
+        self.docs: List[array] = []         # Per term: document numbers, ascending
+        self.freqs: List[array] = []        # Per term: frequency in each of those documents
+        self.lengths = array('I')
+        self.alive = bytearray()
+        self.rows: List[Dict[str, Any]] = []
+        self.by_id: Dict[Any, int] = {}
+        self.live = 0
+        self.total_length = 0
+        self.version: Optional[str] = None
+
+class BM25Index:
+    """Incremental BM25 index over the stored chunks
+
+    Each chunk is indexed on its content plus the docker_commands of its
+    page. Postings are kept per term as two typed arrays (document number
+    and term frequency), so adding chunks only appends to them. Removed
+    chunks are tombstoned and dropped when the index is saved. The saved
+    form is a single .npz: every posting list concatenated into one array
+    with per-term offsets, plus the rows.
+
+    Everything lives in one state object. A reload of the saved index builds
+    a new one and swaps it in under a lock, and search reads the state once,
+    so searches on other threads never see half of each. add, remove and
+    refresh change the state in place and are meant for the single process
+    building the index.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.state = _State()
+        self._load_lock = threading.Lock()
+        if path and os.path.exists(path):
+            self._reload()
+
+    @property
+    def terms(self) -> Dict[str, int]:
+        return self.state.terms
+
+    @property
+    def live(self) -> int:
+        return self.state.live
+
+    # Indexing
+
+    def add(self, rows: Iterable[Dict[str, Any]]):
+        """Index rows of the documents table (id, content, metadata), replacing same ids"""
+        state = self.state
+        for row in rows:
+            self.remove([row['id']])
+            metadata = row.get('metadata') or {}
+            tokens = tokenize(row.get('content') or '')
+            for command in metadata.get('docker_commands') or []:
+                tokens.extend(tokenize(command))
+
+            doc = len(state.rows)
+            counts: Dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term = state.terms.get(token)
+                if term is None:
+                    term = state.terms[token] = len(state.docs)
+                    state.docs.append(array('I'))
+                    state.freqs.append(array('H'))
+                state.docs[term].append(doc)
+                state.freqs[term].append(min(count, 0xFFFF))
+
+            state.rows.append({'id': row['id'], 'content': row.get('content'), 'metadata': metadata})
+            state.by_id[row['id']] = doc
+            state.lengths.append(len(tokens))
+            state.alive.append(1)
+            state.live += 1
+            state.total_length += len(tokens)
+
+    def remove(self, ids: Iterable[Any]):
+        state = self.state
+        for row_id in ids:
+            doc = state.by_id.pop(row_id, None)
+            if doc is not None:
+                state.alive[doc] = 0
+                state.live -= 1
+                state.total_length -= state.lengths[doc]
+
+    def refresh(self, client, page_size: int = 1000) -> bool:
+        """Index rows added to the documents table since the last refresh and drop deleted ones
+
+        Rows are matched by id alone. New content always arrives as new rows,
+        because DocumentWriter keys rows on (url, chunk_hash). Rows edited in
+        place, such as by a metadata backfill, keep their stale terms and
+        metadata until the index is rebuilt with --full.
+        """
+        live_ids = []
+        last_id = 0
+        while True:
+            page = (client.table('documents').select('id')
+                    .gt('id', last_id).order('id').limit(page_size).execute().data)
+            live_ids.extend(row['id'] for row in page)
+            if len(page) < page_size:
+                break
+            last_id = page[-1]['id']
+        live = set(live_ids)
+
+        by_id = self.state.by_id
+        gone = [row_id for row_id in by_id if row_id not in live]
+        new_ids = sorted(live - set(by_id))
+        self.remove(gone)
+        for start in range(0, len(new_ids), page_size):
+            batch = new_ids[start:start + page_size]
+            self.add(client.table('documents').select('id', 'content', 'metadata').in_('id', batch).execute().data)
+        logger.info(f"Lexical index refreshed: {len(new_ids)} new rows, {len(gone)} removed, {self.live} total")
+        return bool(new_ids or gone)
+
+    # Searching
+
+    def search(self, query: str, match_count: int,
+               filter_conditions: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Top match_count rows by BM25 score that match every filtered key"""
+        # Read once: a reload on another thread swaps in a new state, never parts of one
+        state = self._reload()
+        if not state.live:
+            return []
+        alive = np.frombuffer(bytes(state.alive), dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(state.lengths, dtype=np.uint32)
+        average = state.total_length / state.live or 1.0
+        scores = np.zeros(len(state.rows), dtype=np.float32)
+
+        for token in set(tokenize(query)):
+            term = state.terms.get(token)
+            if term is None:
+                continue
+            docs = np.frombuffer(state.docs[term], dtype=np.uint32)
+            docs_alive = alive[docs]
+            df = int(docs_alive.sum())
+            if not df:
+                continue
+            docs = docs[docs_alive]
+            tf = np.frombuffer(state.freqs[term], dtype=np.uint16)[docs_alive].astype(np.float32)
+            idf = math.log(1 + (state.live - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / average)
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        candidates = np.flatnonzero(scores)
+        if filter_conditions:
+            candidates = candidates[[_matches(state.rows[doc]['metadata'], filter_conditions)
+                                     for doc in candidates]] if len(candidates) else candidates
+        top = candidates[np.argsort(-scores[candidates], kind='stable')[:match_count]]
+        return [{**state.rows[doc], 'bm25_score': float(scores[doc])} for doc in top]
+
+    # Persistence
+
+    def save(self, path: Optional[str] = None):
+        """Write the live rows, compacted, to path via a temporary file"""
+        path = path or self.path
+        state = self.state
+        keep = np.flatnonzero(np.frombuffer(bytes(state.alive), dtype=np.uint8))
+        renumber = np.full(len(state.rows), -1, dtype=np.int64)
+        renumber[keep] = np.arange(len(keep))
+
+        vocabulary, offsets, postings, frequencies = [], [0], [], []
+        for token, term in state.terms.items():
+            docs = np.frombuffer(state.docs[term], dtype=np.uint32)
+            mask = renumber[docs] >= 0
+            if not mask.any():
+                continue
+            vocabulary.append(token)
+            postings.append(renumber[docs[mask]].astype(np.uint32))
+            frequencies.append(np.frombuffer(state.freqs[term], dtype=np.uint16)[mask])
+            offsets.append(offsets[-1] + int(mask.sum()))
+
+        rows = [state.rows[doc] for doc in keep]
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            np.savez(
+                f,
+                vocabulary=np.frombuffer(json.dumps(vocabulary).encode(), dtype=np.uint8),
+                offsets=np.asarray(offsets, dtype=np.uint64),
+                postings=np.concatenate(postings) if postings else np.zeros(0, np.uint32),
+                frequencies=np.concatenate(frequencies) if frequencies else np.zeros(0, np.uint16),
+                lengths=np.frombuffer(state.lengths, dtype=np.uint32)[keep],
+                rows=np.frombuffer(json.dumps(rows).encode(), dtype=np.uint8)
+            )
+        os.replace(temporary, path)
+        logger.info(f"Saved lexical index with {len(rows)} rows and {len(vocabulary)} terms to {path}")
+
+    def data_version(self) -> Optional[str]:
+        """Modification time of the saved index, which changes when it is rebuilt"""
+        try:
+            return str(os.stat(self.path).st_mtime_ns) if self.path else None
+        except FileNotFoundError:
+            return None
+
+    def _reload(self) -> _State:
+        """The current state, switching to the saved index first if another process rebuilt it"""
+        state = self.state
+        version = self.data_version()
+        if version is None or version == state.version:
+            return state
+        with self._load_lock:
+            # Another thread may have loaded it while this one waited
+            if self.state.version != version:
+                self.state = self._load(version)
+            return self.state
+
+    def _load(self, version: str) -> _State:
+        state = _State()
+        state.version = version
+        with np.load(self.path) as saved:
+            vocabulary = json.loads(saved['vocabulary'].tobytes())
+            offsets = saved['offsets']
+            postings, frequencies = saved['postings'], saved['frequencies']
+            lengths = saved['lengths']
+            state.rows = json.loads(saved['rows'].tobytes())
+        state.terms = {token: term for term, token in enumerate(vocabulary)}
+        state.docs = [array('I', postings[offsets[t]:offsets[t + 1]].tobytes()) for t in range(len(vocabulary))]
+        state.freqs = [array('H', frequencies[offsets[t]:offsets[t + 1]].tobytes()) for t in range(len(vocabulary))]
+        state.lengths = array('I', lengths.astype(np.uint32).tobytes())
+        state.alive = bytearray(b'\x01' * len(state.rows))
+        state.by_id = {row['id']: doc for doc, row in enumerate(state.rows)}
+        state.live = len(state.rows)
+        state.total_length = int(lengths.sum())
+        return state
+
+def _matches(metadata: Dict[str, Any], filter_conditions: Dict[str, List[str]]) -> bool:
+    # Same semantics as the RPC and LocalVectorIndex: any value of every filtered key
+    for key, values in filter_conditions.items():
+        stored = metadata.get(key)
+        stored = stored if isinstance(stored, list) else [stored]
+        if not any(value in stored for value in values):
+            return False
+    return True
+
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], match_count: int,
+                           k: int = 60) -> List[Dict[str, Any]]:
+    """Merge ranked result lists by summing 1 / (k + rank) per row"""
+    fused: Dict[Any, Tuple[float, Dict[str, Any]]] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, 1):
+            metadata = row.get('metadata') or {}
+            key = row.get('id') if row.get('id') is not None else (metadata.get('url'), metadata.get('chunk_hash'))
+            score, merged = fused.get(key, (0.0, {}))
+            fused[key] = (score + 1.0 / (k + rank), {**row, **merged})
+    ordered = sorted(fused.values(), key=lambda entry: -entry[0])[:match_count]
+    return [{'similarity': None, **row, 'rrf_score': score} for score, row in ordered]
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Build or refresh the local BM25 index")
+    parser.add_argument('--path', default=os.getenv('LEXICAL_INDEX_PATH', 'lexical_index.npz'))
+    parser.add_argument('--full', action='store_true',
+                        help="Rebuild from scratch instead of applying changes. Without it only added and "
+                             "deleted rows are picked up; run with --full after updating rows in place "
+                             "(e.g. a metadata backfill)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    index = BM25Index(None if args.full else args.path)
+    index.refresh(create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")))
+    index.save(args.path)
@@ -0,0 +1,146 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from document_writer import DocumentWriter
+from new_scraper import METADATA_VERSION, DockerMetadata
+
+logger = logging.getLogger(__name__)
+
+# Metadata key holding DockerMetadata's fields and the extractor version that produced them
+TAGS_KEY = 'docker_tags'
+
+class MetadataBackfill:
+    """Re-tags the documents table with the current DockerMetadata, page by page
+
+    Rows are read in keyset order (id > last id), one page at a time, so
+    memory stays at one page however big the table grows. Tags are stored
+    under metadata[TAGS_KEY] with the extractor_version that produced them;
+    rows already at METADATA_VERSION are skipped without downloading their
+    content.
+    Tagging runs in a process pool while the previous page is being written
+    through a DocumentWriter. The last id whose page is fully written is
+    kept in the checkpoint file, so an interrupted run resumes after it; a
+    finished run removes it.
+    """
+
+    def __init__(self, client, checkpoint_path: str = 'retag_checkpoint.json', page_size: int = 1000,
+                 workers: Optional[int] = None, write_batch_size: int = 500):
+        self.client = client
+        self.checkpoint_path = checkpoint_path
+        self.page_size = page_size
+        self.workers = workers
+        self.write_batch_size = write_batch_size
+        self.stats = {'pages': 0, 'rows': 0, 'skipped': 0, 'updated': 0}
+
+    def run(self, restart: bool = False) -> Dict[str, int]:
+        last_id = 0 if restart else self._load_checkpoint()
+        if last_id:
+            logger.info(f"Resuming metadata backfill after id {last_id}")
+
+        writer = DocumentWriter(self.client, batch_size=self.write_batch_size)
+        pending: Optional[tuple] = None     # (future, last id) of the page being written
+        try:
+            # Workers come from a fork server: the writer's flush thread is already running here
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['new_scraper'])
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as pool:
+                while True:
+                    page = (self.client.table('documents').select('id', 'url', 'chunk_hash', 'metadata')
+                            .gt('id', last_id).order('id').limit(self.page_size).execute().data)
+                    if not page:
+                        break
+                    self.stats['pages'] += 1
+                    self.stats['rows'] += len(page)
+                    last_id = page[-1]['id']
+
+                    stale = [row for row in page
+                             if ((row['metadata'] or {}).get(TAGS_KEY) or {}).get('extractor_version')
+                             != METADATA_VERSION]
+                    self.stats['skipped'] += len(page) - len(stale)
+                    written = self._retag(stale, pool, writer)
+
+                    # Checkpoint a page only once its writes have landed
+                    if pending is not None:
+                        self._commit(*pending)
+                    pending = (written, last_id)
+                    if len(page) < self.page_size:
+                        break
+        finally:
+            writer.close()
+        if pending is not None:
+            self._commit(*pending)
+        # Finished: the next run starts over, skipping rows already at this version
+        self._clear_checkpoint()
+        logger.info(f"Metadata backfill done: {self.stats}")
+        if self.stats['updated']:
+            # Incremental index refreshes only see added and deleted rows
+            logger.info("Rows were re-tagged in place; rebuild vector_index.py / lexical_index.py with --full")
+        return self.stats
+
+    def _retag(self, rows: List[Dict[str, Any]], pool: ProcessPoolExecutor, writer: DocumentWriter) -> Future:
+        if not rows:
+            done: Future = Future()
+            done.set_result(None)
+            return done
+        content = {row['id']: row['content'] for row in
+                   self.client.table('documents').select('id', 'content')
+                   .in_('id', [row['id'] for row in rows]).execute().data}
+        rows = [row for row in rows if row['id'] in content]
+        tagged = pool.map(DockerMetadata.extract_all, [content[row['id']] for row in rows],
+                          chunksize=max(1, len(rows) // (4 * (self.workers or os.cpu_count() or 1))))
+        updates = [
+            {
+                'url': row['url'],
+                'chunk_hash': row['chunk_hash'],
+                'content': content[row['id']],
+                # Tags get their own key: DockerMetadata's fields (prerequisites, ...) share
+                # names with the scraper's, which stay as the scraper stored them
+                'metadata': {**(row['metadata'] or {}), TAGS_KEY: {**metadata, 'extractor_version': METADATA_VERSION}}
+            }
+            for row, metadata in zip(rows, tagged)
+        ]
+        self.stats['updated'] += len(updates)
+        return writer.upsert(updates)
+
+    def _commit(self, written: Future, last_id: Any):
+        written.result()
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump({'version': METADATA_VERSION, 'last_id': last_id}, f)
+        os.replace(temporary, self.checkpoint_path)
+
+    def _load_checkpoint(self) -> Any:
+        try:
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return 0
+        # A checkpoint from an older extractor does not cover rows it already passed
+        return checkpoint['last_id'] if checkpoint.get('version') == METADATA_VERSION else 0
+
+    def _clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Re-tag stored chunks with the current DockerMetadata")
+    parser.add_argument('--checkpoint', default=os.getenv('RETAG_CHECKPOINT', 'retag_checkpoint.json'))
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start from the first row")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    MetadataBackfill(client, args.checkpoint, args.page_size, args.workers).run(restart=args.restart)
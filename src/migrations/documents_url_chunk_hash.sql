@@ -0,0 +1,13 @@
+-- One-off migration for the documents table: real url / chunk_hash columns with a
+-- unique index so DocumentWriter can upsert on them. chunk_hash is the SHA-256 of
+-- the chunk text, the same hash DockerDocsScraper.content_hash computes.
+-- Safe to re-run; duplicates of a (url, chunk_hash) pair keep their lowest id.
+alter table documents add column if not exists url text;
+alter table documents add column if not exists chunk_hash text;
+update documents
+   set url = metadata->>'url',
+       chunk_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex')
+ where chunk_hash is null;
+delete from documents a using documents b
+ where a.url = b.url and a.chunk_hash = b.chunk_hash and a.id > b.id;
+create unique index if not exists documents_url_chunk_hash on documents (url, chunk_hash);
@@ -1,110 +1,125 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Set
+import hashlib
+import json
+import logging
 import re
 from bs4 import BeautifulSoup
 import time
+from pattern_set import PatternSet
 
+logger = logging.getLogger(__name__)
+
+# Every category's patterns, one list of alternatives per label, in output order
+METADATA_PATTERNS = {
+    'commands': {
+        'build': [r'docker\s+build', r'Dockerfile'],
+        'run': [r'docker\s+run', r'container\s+execution'],
+        'compose': [r'docker-compose', r'docker\s+compose'],
+        'swarm': [r'docker\s+swarm', r'service\s+deployment'],
+        'network': [r'docker\s+network', r'container\s+networking'],
+        'volume': [r'docker\s+volume', r'data\s+persistence'],
+        'security': [r'docker\s+secret', r'security\s+context']
+    },
+    'resource_types': {
+        'container': [r'container[s]?\b'],
+        'image': [r'image[s]?\b'],
+        'volume': [r'volume[s]?\b'],
+        'network': [r'network[s]?\b'],
+        'service': [r'service[s]?\b'],
+        'stack': [r'stack[s]?\b'],
+        'secret': [r'secret[s]?\b']
+    },
+    'environments': {
+        'production': [r'production', r'prod\b'],
+        'development': [r'development', r'dev\b'],
+        'testing': [r'testing', r'test\b'],
+        'staging': [r'staging', r'stage\b'],
+        'local': [r'local\s+environment', r'localhost']
+    },
+    'prerequisites': {
+        'docker_engine': [r'requires\s+Docker\s+Engine', r'Docker\s+version'],
+        'compose': [r'requires\s+Docker\s+Compose', r'Compose\s+version'],
+        'linux': [r'requires\s+Linux', r'Linux\s+kernel'],
+        'memory': [r'(\d+)\s*(GB|MB)\s+RAM', r'memory\s+requirement'],
+        'disk': [r'(\d+)\s*(GB|MB)\s+disk\s+space'],
+        'root': [r'root\s+privileges', r'sudo\s+access']
+    }
+}
+
+# Complexity counts how many of these terms appear anywhere in the text
+COMPLEXITY_TERMS = {
+    'advanced': ['orchestration', 'swarm', 'kubernetes', 'security',
+                 'optimization', 'scaling', 'load balancing', 'clustering'],
+    'intermediate': ['networking', 'volumes', 'compose', 'dockerfile',
+                     'multi-container', 'deployment']
+}
+
+# Stored with re-tagged rows; changes whenever the tables above do, so a
+# backfill knows which rows were tagged by an older extractor
+METADATA_VERSION = hashlib.sha1(
+    json.dumps([METADATA_PATTERNS, COMPLEXITY_TERMS], sort_keys=True).encode()
+).hexdigest()[:12]
 
 class DockerMetadata:
-    """Dedicated class for Docker-specific metadata extraction"""
-    
+    """Dedicated class for Docker-specific metadata extraction
+
+    All fields come from one PatternSet lookup per text; the per-field
+    methods are kept for callers that only need one of them.
+    """
+
+    patterns = PatternSet(
+        [((field, label), alternatives)
+         for field, labels in METADATA_PATTERNS.items() for label, alternatives in labels.items()]
+        + [(('complexity', level, term), [re.escape(term)])
+           for level, terms in COMPLEXITY_TERMS.items() for term in terms]
+    )
+
+    @classmethod
+    def extract_all(cls, text: str) -> Dict[str, Any]:
+        """Commands, resource types, environments, complexity and prerequisites from one scan"""
+        return cls._metadata(cls.patterns.find(text))
+
     @staticmethod
-    def extract_command_metadata(text: str) -> Dict[str, Any]:
-        """Extract command-related metadata"""
-        command_patterns = {
-            'build': r'docker\s+build|Dockerfile',
-            'run': r'docker\s+run|container\s+execution',
-            'compose': r'docker-compose|docker\s+compose',
-            'swarm': r'docker\s+swarm|service\s+deployment',
-            'network': r'docker\s+network|container\s+networking',
-            'volume': r'docker\s+volume|data\s+persistence',
-            'security': r'docker\s+secret|security\s+context'
+    def _metadata(found: Set[Any]) -> Dict[str, Any]:
+        metadata = {
+            field: [label for label in labels if (field, label) in found]
+            for field, labels in METADATA_PATTERNS.items()
         }
-        
-        commands = []
-        for cmd, pattern in command_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                commands.append(cmd)
-                
-        return commands
+        advanced_count = sum(1 for term in COMPLEXITY_TERMS['advanced'] if ('complexity', 'advanced', term) in found)
+        intermediate_count = sum(1 for term in COMPLEXITY_TERMS['intermediate']
+                                 if ('complexity', 'intermediate', term) in found)
+        if advanced_count >= 2:
+            metadata['complexity'] = 'advanced'
+        elif intermediate_count >= 2:
+            metadata['complexity'] = 'intermediate'
+        else:
+            metadata['complexity'] = 'beginner'
+        return metadata
 
-    @staticmethod
-    def extract_resource_type(text: str) -> List[str]:
+    @classmethod
+    def extract_command_metadata(cls, text: str) -> List[str]:
+        """Extract command-related metadata"""
+        return cls.extract_all(text)['commands']
+
+    @classmethod
+    def extract_resource_type(cls, text: str) -> List[str]:
         """Identify Docker resource types mentioned"""
-        resources = {
-            'container': r'container[s]?\b',
-            'image': r'image[s]?\b',
-            'volume': r'volume[s]?\b',
-            'network': r'network[s]?\b',
-            'service': r'service[s]?\b',
-            'stack': r'stack[s]?\b',
-            'secret': r'secret[s]?\b'
-        }
-        
-        found_resources = []
-        for resource, pattern in resources.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                found_resources.append(resource)
-                
-        return found_resources
+        return cls.extract_all(text)['resource_types']
 
-    @staticmethod
-    def extract_environment_context(text: str) -> List[str]:
+    @classmethod
+    def extract_environment_context(cls, text: str) -> List[str]:
         """Determine relevant environment contexts"""
-        environments = {
-            'production': r'production|prod\b',
-            'development': r'development|dev\b',
-            'testing': r'testing|test\b',
-            'staging': r'staging|stage\b',
-            'local': r'local\s+environment|localhost'
-        }
-        
-        contexts = []
-        for env, pattern in environments.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                contexts.append(env)
-                
-        return contexts
+        return cls.extract_all(text)['environments']
 
-    @staticmethod
-    def determine_complexity(text: str) -> str:
+    @classmethod
+    def determine_complexity(cls, text: str) -> str:
         """Determine content complexity level"""
-        advanced_terms = {
-            'orchestration', 'swarm', 'kubernetes', 'security', 
-            'optimization', 'scaling', 'load balancing', 'clustering'
-        }
-        intermediate_terms = {
-            'networking', 'volumes', 'compose', 'dockerfile', 
-            'multi-container', 'deployment'
-        }
-        
-        text_lower = text.lower()
-        advanced_count = sum(1 for term in advanced_terms if term in text_lower)
-        intermediate_count = sum(1 for term in intermediate_terms if term in text_lower)
-        
-        if advanced_count >= 2:
-            return 'advanced'
-        elif intermediate_count >= 2:
-            return 'intermediate'
-        return 'beginner'
+        return cls.extract_all(text)['complexity']
 
-    @staticmethod
-    def extract_prerequisites(text: str) -> List[str]:
+    @classmethod
+    def extract_prerequisites(cls, text: str) -> List[str]:
         """Extract prerequisites and dependencies"""
-        prereq_patterns = {
-            'docker_engine': r'requires\s+Docker\s+Engine|Docker\s+version',
-            'compose': r'requires\s+Docker\s+Compose|Compose\s+version',
-            'linux': r'requires\s+Linux|Linux\s+kernel',
-            'memory': r'(\d+)\s*(GB|MB)\s+RAM|memory\s+requirement',
-            'disk': r'(\d+)\s*(GB|MB)\s+disk\s+space',
-            'root': r'root\s+privileges|sudo\s+access'
-        }
-        
-        prerequisites = []
-        for prereq, pattern in prereq_patterns.items():
-            if re.search(pattern, text, re.IGNORECASE):
-                prerequisites.append(prereq)
-                
-        return prerequisites
+        return cls.extract_all(text)['prerequisites']
 
 class DockerDocsScraper:
     def __init__(self):
@@ -129,11 +144,7 @@ class DockerDocsScraper:
         metadata = {
             'url': url,
             'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'commands': self.metadata_extractor.extract_command_metadata(content_text),
-            'resource_types': self.metadata_extractor.extract_resource_type(content_text),
-            'environments': self.metadata_extractor.extract_environment_context(content_text),
-            'complexity': self.metadata_extractor.determine_complexity(content_text),
-            'prerequisites': self.metadata_extractor.extract_prerequisites(content_text)
+            **self.metadata_extractor.extract_all(content_text)
         }
         
         # Extract chunks with consistent size
@@ -146,28 +157,13 @@ class DockerDocsScraper:
 
     async def update_existing_records(self):
         """Update existing records with new metadata"""
+        # Imported here: metadata_backfill imports this module
+        from metadata_backfill import MetadataBackfill
+
         try:
-            # Fetch all existing records
-            response = self.supabase.table('documents').select('id', 'content').execute()
-            records = response.data
-            
-            for record in records:
-                # Extract new metadata for existing content
-                metadata = {
-                    'commands': self.metadata_extractor.extract_command_metadata(record['content']),
-                    'resource_types': self.metadata_extractor.extract_resource_type(record['content']),
-                    'environments': self.metadata_extractor.extract_environment_context(record['content']),
-                    'complexity': self.metadata_extractor.determine_complexity(record['content']),
-                    'prerequisites': self.metadata_extractor.extract_prerequisites(record['content'])
-                }
-                
-                # Update the record with new metadata
-                self.supabase.table('documents').update({
-                    'metadata': metadata
-                }).eq('id', record['id']).execute()
-                
-                logger.info(f"Updated metadata for record {record['id']}")
-                await asyncio.sleep(0.1)  # Rate limiting
+            # Keyset-paginated, resumable, and skips rows already at METADATA_VERSION
+            stats = MetadataBackfill(self.supabase).run()
+            logger.info(f"Updated metadata for {stats['updated']} records, {stats['skipped']} already current")
                 
         except Exception as e:
-            logger.error(f"Error updating metadata: {e}")
\ No newline at end of file
+            logger.error(f"Error updating metadata: {e}")
@@ -0,0 +1,55 @@
+import json
+import sqlite3
+from typing import Dict, List, Optional
+
+class PageIndex:
+    """What the last crawl stored for each page, kept between runs
+
+    Holds the HTTP validators for conditional GETs, a hash of the page body,
+    the hashes of the chunks currently in the documents table and the page's
+    links, so an unchanged page can be skipped without parsing it.
+    """
+
+    def __init__(self, path: str = 'page_index.db'):
+        self.conn = sqlite3.connect(path)
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS pages ('
+                'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT, '
+                'chunk_hashes TEXT, links TEXT, updated_at REAL)'
+            )
+
+    def get(self, url: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            'SELECT etag, last_modified, content_hash, chunk_hashes, links FROM pages WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'content_hash': row[2],
+            'chunk_hashes': json.loads(row[3]),
+            'links': json.loads(row[4])
+        }
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for url"""
+        page = self.get(url)
+        headers = {}
+        if page and page['etag']:
+            headers['If-None-Match'] = page['etag']
+        if page and page['last_modified']:
+            headers['If-Modified-Since'] = page['last_modified']
+        return headers
+
+    def put(self, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str,
+            chunk_hashes: List[str], links: List[str], updated_at: float):
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, content_hash, json.dumps(chunk_hashes), json.dumps(links), updated_at)
+            )
+
+    def close(self):
+        self.conn.close()
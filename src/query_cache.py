@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+class _LRU:
+    """OrderedDict LRU with per-entry TTL and a cap on the estimated bytes held"""
+
+    def __init__(self, max_bytes: int, ttl: float, stats: Dict[str, int], prefix: str):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = stats
+        self.prefix = prefix
+        self.bytes = 0
+        self.entries: "OrderedDict[Any, Tuple[Any, int, float]]" = OrderedDict()
+
+    def get(self, key) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[2] > self.ttl:
+            self.pop(key)
+            self.stats[f'{self.prefix}_expired'] += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value, size: int):
+        self.pop(key)
+        self.entries[key] = (value, size, time.monotonic())
+        self.bytes += size
+        while self.bytes > self.max_bytes and self.entries:
+            oldest = next(iter(self.entries))
+            self.pop(oldest)
+            self.stats[f'{self.prefix}_evicted'] += 1
+
+    def pop(self, key) -> Optional[Any]:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.bytes -= entry[1]
+        return entry[0]
+
+class QueryCache:
+    """Two-level cache in front of VectorSearch
+
+    The exact level maps normalized query text to its embedding and metadata
+    filter, skipping filter extraction and the embedding model. The semantic
+    level keeps result sets and serves one to any new query whose embedding
+    is within `similarity` (cosine) of a cached query with the same filter,
+    threshold, count and key, skipping the vector search itself. The key
+    lets callers keep apart queries that embed alike but must not share
+    results, such as ones naming different flags. Both levels expire
+    entries after `ttl` seconds and evict least recently used entries past
+    their share of `max_bytes`.
+
+    Cached results are dropped when the documents they point to change: pass
+    the search backend's data version to the result lookups, and a new
+    version empties the semantic level.
+    """
+
+    def __init__(self, ttl: float = 3600.0, max_bytes: int = 64 * 1024 * 1024, similarity: float = 0.95):
+        self.similarity = similarity
+        self.stats = {
+            'query_hits': 0, 'query_misses': 0, 'query_expired': 0, 'query_evicted': 0,
+            'result_hits': 0, 'result_misses': 0, 'result_expired': 0, 'result_evicted': 0,
+            'invalidated': 0
+        }
+        self._queries = _LRU(max_bytes // 4, ttl, self.stats, 'query')
+        self._results = _LRU(max_bytes - max_bytes // 4, ttl, self.stats, 'result')
+        self._next_id = 0
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return ' '.join(query.lower().split())
+
+    # Exact level
+
+    def get_query(self, query: str) -> Optional[Tuple[List[float], Dict[str, List[str]]]]:
+        """Cached (embedding, metadata filter) for this query text"""
+        with self._lock:
+            value = self._queries.get(self.normalize(query))
+            self.stats['query_hits' if value is not None else 'query_misses'] += 1
+            return value
+
+    def put_query(self, query: str, embedding: List[float], metadata_filter: Dict[str, List[str]]):
+        key = self.normalize(query)
+        # A list of Python floats costs a pointer plus a float object per element
+        size = len(key) + 32 * len(embedding) + len(json.dumps(metadata_filter))
+        with self._lock:
+            self._queries.put(key, (embedding, metadata_filter), size)
+
+    # Semantic level
+
+    @staticmethod
+    def _group(metadata_filter: Dict[str, List[str]], match_threshold: float, match_count: int,
+               key: str) -> str:
+        return json.dumps([metadata_filter, match_threshold, match_count, key], sort_keys=True)
+
+    def get_results(self, embedding: List[float], metadata_filter: Dict[str, List[str]],
+                    match_threshold: float, match_count: int,
+                    data_version: Optional[str] = None, key: str = '') -> Optional[List[Dict[str, Any]]]:
+        """Results of the closest cached query with the same filter and key, if close enough"""
+        group = self._group(metadata_filter, match_threshold, match_count, key)
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        with self._lock:
+            self._check_version(data_version)
+            best, best_score = None, self.similarity
+            for key in [k for k in self._results.entries if k[0] == group]:
+                entry = self._results.get(key)
+                if entry is None:
+                    continue
+                score = float(entry[0] @ query)
+                if score >= best_score:
+                    best, best_score = key, score
+            if best is None:
+                self.stats['result_misses'] += 1
+                return None
+            self.stats['result_hits'] += 1
+            return list(self._results.get(best)[1])
+
+    def put_results(self, embedding: List[float], metadata_filter: Dict[str, List[str]],
+                    match_threshold: float, match_count: int, results: List[Dict[str, Any]],
+                    data_version: Optional[str] = None, key: str = ''):
+        group = self._group(metadata_filter, match_threshold, match_count, key)
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector /= np.linalg.norm(vector) or 1.0
+        size = vector.nbytes + len(json.dumps(results, default=str))
+        with self._lock:
+            self._check_version(data_version)
+            self._next_id += 1
+            self._results.put((group, self._next_id), (vector, results), size)
+
+    # Invalidation
+
+    def _check_version(self, data_version: Optional[str]):
+        # A new snapshot of the documents table invalidates every result set
+        if data_version is not None and data_version != self._data_version:
+            if self._data_version is not None:
+                self.stats['invalidated'] += len(self._results.entries)
+                self._results.entries.clear()
+                self._results.bytes = 0
+            self._data_version = data_version
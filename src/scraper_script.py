@@ -1,4 +1,6 @@
 import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from supabase import create_client
 import logging
@@ -9,6 +11,10 @@ from google.generativeai import GenerationConfig
 from typing import Dict, Any, List
 import json
 from pydantic import BaseModel, Field
+from vector_index import LocalVectorIndex, SupabaseVectorBackend
+from search_filters import LocalMetadataExtractor
+from query_cache import QueryCache
+from lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -36,6 +42,19 @@ class SearchMetadata(BaseModel):
         description="OS types like linux, windows, macos"
     )
 
+METADATA_PROMPT = """Extract metadata from the search query and return a raw JSON object with no formatting, markdown, or extra characters:
+    {
+        "command_category": ["container"|"network"|"volume"|"image"|"compose"|"system"],
+        "component_type": ["cli"|"daemon"|"compose"|"swarm"|"api"],
+        "resource_type": ["tutorial"|"reference"|"troubleshooting"],
+        "environment": ["development"|"production"],
+        "os_compatibility": ["linux"|"windows"|"macos"]
+    }
+
+    -Return only the JSON object itself 
+    -no code blocks, no newlines (\n) before or after, no additional text.
+    -the value must be a list of [str] as described in the example even for a single value"""
+
 class VectorSearch:
     def __init__(self):
         # Load environment variables
@@ -54,38 +73,106 @@ class VectorSearch:
         genai.configure(api_key=gemini_api_key)
         self.llm = genai.GenerativeModel('gemini-pro')
         
+        # Filters come from the local gazetteer first; Gemini is only asked when
+        # SEARCH_METADATA_LLM allows it: "fallback" (below the confidence floor),
+        # "always" or "never"
+        self.metadata_extractor = LocalMetadataExtractor()
+        self.llm_policy = os.getenv("SEARCH_METADATA_LLM", "fallback")
+        self.llm_min_confidence = float(os.getenv("SEARCH_METADATA_MIN_CONFIDENCE", "0.5"))
+        
+        # Search backend: the remote RPC, or a local snapshot built by vector_index.py
+        if os.getenv("VECTOR_BACKEND", "supabase") == "local":
+            self.search_backend = LocalVectorIndex(
+                os.getenv("VECTOR_INDEX_PATH", "vector_index"),
+                nprobe=int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+            )
+        else:
+            self.search_backend = SupabaseVectorBackend(
+                self.supabase,
+                version_interval=float(os.getenv("SEARCH_VERSION_INTERVAL", "10"))
+            )
+        
+        # Optional BM25 index built by lexical_index.py. When present, each search
+        # fuses HYBRID_CANDIDATES lexical and vector hits by reciprocal rank, so
+        # exact flags and commands rank well without raising match_count
+        lexical_path = os.getenv("LEXICAL_INDEX_PATH")
+        self.lexical_index = BM25Index(lexical_path) if lexical_path and os.path.exists(lexical_path) else None
+        self.hybrid_candidates = int(os.getenv("HYBRID_CANDIDATES", "20"))
+        
+        # Repeated and near-duplicate queries skip extraction, embedding and search.
+        # Cached results are dropped whenever the backend's data version moves.
+        self.query_cache = QueryCache(
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+            max_bytes=int(float(os.getenv("SEARCH_CACHE_MAX_MB", "64")) * 1024 * 1024),
+            similarity=float(os.getenv("SEARCH_CACHE_SIMILARITY", "0.95"))
+        )
+        
         # Initialize embedding model
         logger.info("Loading embedding model...")
         self.embedding_model = SentenceTransformer('all-mpnet-base-v2')
         logger.info("Model loaded successfully")
+        
+        # Encoding runs on one thread so forward passes never contend for the
+        # model; backend searches are blocking client calls and get their own pool
+        self.encode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-encode")
+        self.search_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("SEARCH_WORKERS", "8")), thread_name_prefix="search-rpc"
+        )
     
     def extract_search_metadata(self, query: str) -> Dict[str, Any]:
+        """Extract metadata filters from the search query, locally when possible"""
+        metadata, confidence = self.metadata_extractor.extract(query)
+        use_llm = self.llm_policy == "always" or (
+            self.llm_policy == "fallback" and confidence < self.llm_min_confidence
+        )
+        if not use_llm:
+            logger.info(f"Search metadata from local extractor (confidence {confidence:.1f}): {metadata}")
+            return SearchMetadata(**metadata).model_dump(exclude_none=True)
+
+        logger.info(f"Local extractor confidence {confidence:.1f} below {self.llm_min_confidence}, asking Gemini")
+        return self.llm_search_metadata(query)
+
+    async def extract_search_metadata_async(self, query: str) -> Dict[str, Any]:
+        """extract_search_metadata without blocking the event loop on Gemini"""
+        metadata, confidence = self.metadata_extractor.extract(query)
+        use_llm = self.llm_policy == "always" or (
+            self.llm_policy == "fallback" and confidence < self.llm_min_confidence
+        )
+        if not use_llm:
+            logger.info(f"Search metadata from local extractor (confidence {confidence:.1f}): {metadata}")
+            return SearchMetadata(**metadata).model_dump(exclude_none=True)
+
+        logger.info(f"Local extractor confidence {confidence:.1f} below {self.llm_min_confidence}, asking Gemini")
+        return await self.llm_search_metadata_async(query)
+
+    def llm_search_metadata(self, query: str) -> Dict[str, Any]:
         """Extract metadata filters from the search query using Gemini"""
         try:
-            system_prompt = """Extract metadata from the search query and return a raw JSON object with no formatting, markdown, or extra characters:
-            {
-                "command_category": ["container"|"network"|"volume"|"image"|"compose"|"system"],
-                "component_type": ["cli"|"daemon"|"compose"|"swarm"|"api"],
-                "resource_type": ["tutorial"|"reference"|"troubleshooting"],
-                "environment": ["development"|"production"],
-                "os_compatibility": ["linux"|"windows"|"macos"]
-            }
-
-            -Return only the JSON object itself 
-            -no code blocks, no newlines (\n) before or after, no additional text.
-            -the value must be a list of [str] as described in the example even for a single value"""
-            prompt = f"{system_prompt}\n\nQuery: {query}"
+            prompt = f"{METADATA_PROMPT}\n\nQuery: {query}"
             response = response = self.llm.generate_content(prompt)
             #logger.info("Model response: ", response.text)
+            return self.parse_llm_metadata(response.text)
             
-            # Parse the response into SearchMetadata
-            parsed = SearchMetadata.model_validate_json((response.text).strip().replace('\n',''))
-            return parsed.model_dump(exclude_none=True)
+        except Exception as e:
+            logger.error(f"Error extracting metadata: {e}")
+            return {}
+
+    async def llm_search_metadata_async(self, query: str) -> Dict[str, Any]:
+        """llm_search_metadata through Gemini's non-blocking client"""
+        try:
+            response = await self.llm.generate_content_async(f"{METADATA_PROMPT}\n\nQuery: {query}")
+            return self.parse_llm_metadata(response.text)
             
         except Exception as e:
             logger.error(f"Error extracting metadata: {e}")
             return {}
 
+    @staticmethod
+    def parse_llm_metadata(text: str) -> Dict[str, Any]:
+        """Parse the model response into SearchMetadata"""
+        parsed = SearchMetadata.model_validate_json(text.strip().replace('\n',''))
+        return parsed.model_dump(exclude_none=True)
+
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embeddings for the input text"""
         try:
@@ -95,6 +182,18 @@ class VectorSearch:
             logger.error(f"Error generating embedding: {e}")
             raise
 
+    async def generate_embeddings_async(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings for all texts from one forward pass, off the event loop"""
+        try:
+            embeddings = await asyncio.get_running_loop().run_in_executor(
+                self.encode_executor,
+                lambda: self.embedding_model.encode(texts, batch_size=len(texts), normalize_embeddings=True)
+            )
+            return embeddings.tolist()
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            raise
+
     def build_metadata_filter(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
         """Build Supabase filter from extracted metadata"""
         filter_conditions = {}
@@ -115,34 +214,93 @@ class VectorSearch:
         match_count: int = 5
     ) -> List[Dict[str, Any]]:
         """Search for similar documents using both semantic search and metadata filtering"""
+        results = await self.search_similar_documents_batch([query], match_threshold, match_count)
+        return results[0]
+
+    async def search_similar_documents_batch(
+        self,
+        queries: List[str],
+        match_threshold: float = 0.7,
+        match_count: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """search_similar_documents for many queries, with one forward pass for all of them
+
+        Metadata extraction and encoding run concurrently; each query's search
+        starts as soon as both are done. Queries answered by the cache skip
+        whichever steps it covers.
+        """
         try:
-            #logger.info("Extracting metadata from query...")
-            metadata = self.extract_search_metadata(query)
-            metadata_filter = self.build_metadata_filter(metadata)
-            
-            logger.info(f"Generated metadata filter: {metadata_filter}")
-            #logger.info(f"Generating embedding for query: {query[:100]}...")
-            
-            query_embedding = self.generate_embedding(query)
-            
-            #logger.info("Searching for similar documents...")
-            result = self.supabase.rpc(
-                'match_documents_with_filters',  
-                {
-                    'query_embedding': query_embedding,
-                    'match_threshold': match_threshold,
-                    'match_count': match_count,
-                    'filter_conditions': metadata_filter
-                }
-            ).execute()
-            
-            logger.info(f"Found {len(result.data)} matches")
-            return result.data
+            prepared = {}
+            for query in queries:
+                cached = self.query_cache.get_query(query)
+                if cached is not None:
+                    prepared[query] = cached
+
+            misses = [query for query in dict.fromkeys(queries) if query not in prepared]
+            if misses:
+                embeddings, *metadata = await asyncio.gather(
+                    self.generate_embeddings_async(misses),
+                    *(self.extract_search_metadata_async(query) for query in misses)
+                )
+                for query, query_embedding, query_metadata in zip(misses, embeddings, metadata):
+                    metadata_filter = self.build_metadata_filter(query_metadata)
+                    logger.info(f"Generated metadata filter: {metadata_filter}")
+                    self.query_cache.put_query(query, query_embedding, metadata_filter)
+                    prepared[query] = (query_embedding, metadata_filter)
+
+            # The remote version is a table probe, so keep it off the event loop
+            data_version = await asyncio.get_running_loop().run_in_executor(
+                self.search_executor, self.search_backend.data_version
+            )
+            if self.lexical_index is not None:
+                data_version = f"{data_version}:{self.lexical_index.data_version()}"
+            return list(await asyncio.gather(*(
+                self._search(query, *prepared[query], match_threshold, match_count, data_version)
+                for query in queries
+            )))
             
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
             raise
 
+    async def _search(self, query: str, query_embedding: List[float], metadata_filter: Dict[str, Any],
+                      match_threshold: float, match_count: int, data_version) -> List[Dict[str, Any]]:
+        # Queries that embed alike can still name different flags; only share results when they match
+        cache_key = ' '.join(sorted({token for token in tokenize(query) if not token.isalnum()})) \
+            if self.lexical_index is not None else ''
+        results = self.query_cache.get_results(
+            query_embedding, metadata_filter, match_threshold, match_count, data_version, cache_key
+        )
+        if results is not None:
+            logger.info(f"Served {len(results)} matches from the query cache")
+            return results
+        
+        #logger.info("Searching for similar documents...")
+        loop = asyncio.get_running_loop()
+        if self.lexical_index is None:
+            results = await loop.run_in_executor(
+                self.search_executor,
+                self.search_backend.search, query_embedding, match_threshold, match_count, metadata_filter
+            )
+        else:
+            depth = max(match_count, self.hybrid_candidates)
+            vector_results, lexical_results = await asyncio.gather(
+                loop.run_in_executor(
+                    self.search_executor,
+                    self.search_backend.search, query_embedding, match_threshold, depth, metadata_filter
+                ),
+                loop.run_in_executor(
+                    self.search_executor, self.lexical_index.search, query, depth, metadata_filter
+                )
+            )
+            results = reciprocal_rank_fusion([vector_results, lexical_results], match_count)
+        self.query_cache.put_results(
+            query_embedding, metadata_filter, match_threshold, match_count, results, data_version, cache_key
+        )
+        
+        logger.info(f"Found {len(results)} matches")
+        return results
+
 async def main():
     try:
         vector_search = VectorSearch()
@@ -164,7 +322,8 @@ async def main():
                 print("\nMatching documents found:")
                 print("-" * 80)
                 for idx, result in enumerate(results, 1):
-                    print(f"\nMatch {idx} (Similarity: {result['similarity']:.4f})")
+                    similarity = 'lexical only' if result['similarity'] is None else f"{result['similarity']:.4f}"
+                    print(f"\nMatch {idx} (Similarity: {similarity})")
                     print("-" * 40)
                     print(f"Content: {result['content']}...")
                     if result.get('metadata'):
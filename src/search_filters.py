@@ -0,0 +1,78 @@
+import re
+from typing import Dict, List, Tuple
+
+# Closed vocabularies of SearchMetadata, each value with the phrases that signal it
+GAZETTEER = {
+    'command_category': {
+        'container': ['container', 'containers', 'exec', 'docker run', 'logs', 'attach'],
+        'network': ['network', 'networks', 'networking', 'port', 'ports', 'proxy', 'dns', 'bridge', 'overlay'],
+        'volume': ['volume', 'volumes', 'storage', 'mount', 'mounts', 'bind mount', 'tmpfs'],
+        'image': ['image', 'images', 'build', 'dockerfile', 'registry', 'docker pull', 'docker push'],
+        'compose': ['compose', 'docker-compose', 'compose file', 'compose.yaml', 'docker-compose.yml',
+                    'stack', 'stacks'],
+        'system': ['daemon', 'dockerd', 'system', 'prune', 'disk usage']
+    },
+    'component_type': {
+        'cli': ['cli', 'command line', 'command-line', 'commands', 'flag', 'flags'],
+        'daemon': ['dockerd', 'daemon', 'daemon.json'],
+        'compose': ['compose', 'docker-compose', 'compose file', 'compose.yaml', 'docker-compose.yml'],
+        'swarm': ['swarm', 'node', 'nodes', 'service', 'services'],
+        'api': ['api', 'engine api', 'endpoint', 'rest', 'sdk']
+    },
+    'resource_type': {
+        'tutorial': ['how to', 'how do i', 'tutorial', 'guide', 'install', 'installing', 'set up', 'setup',
+                     'get started', 'getting started', 'example', 'step by step'],
+        'reference': ['reference', 'options', 'syntax', 'manual', 'parameters', 'list of', 'what is',
+                      'difference between'],
+        'troubleshooting': ['error', 'errors', 'fails', 'failed', 'failing', 'troubleshoot', 'troubleshooting',
+                            'debug', 'not working', "doesn't work", "can't", 'cannot', 'permission denied',
+                            'fix', 'crash', 'crashes', 'stuck']
+    },
+    'environment': {
+        'development': ['development', 'dev', 'local development', 'localhost', 'testing'],
+        'production': ['production', 'prod', 'deploy', 'deployment', 'scale', 'scaling', 'high availability']
+    },
+    'os_compatibility': {
+        'linux': ['linux', 'ubuntu', 'debian', 'centos', 'fedora', 'rhel', 'alpine'],
+        'windows': ['windows', 'wsl', 'wsl2', 'powershell'],
+        'macos': ['mac', 'macos', 'os x', 'osx', 'darwin', 'apple silicon']
+    }
+}
+
+# Phrases that often appear without meaning their value ("run a service", "system")
+WEAK_PHRASES = {'service', 'services', 'node', 'nodes', 'system', 'logs', 'build', 'port', 'ports', 'fix',
+                'flag', 'flags', 'commands', 'setup', 'set up', 'dev', 'testing', 'scale', 'stack'}
+
+class LocalMetadataExtractor:
+    """Fills SearchMetadata fields from the closed vocabularies in a single regex pass
+
+    Every phrase of the gazetteer is one alternative of a compiled pattern,
+    longest first, so "bind mount" wins over "mount". Confidence is 1.0 when
+    any matched phrase is unambiguous, 0.5 when only weak phrases matched and
+    0.0 when nothing did.
+    """
+
+    def __init__(self, gazetteer: Dict[str, Dict[str, List[str]]] = GAZETTEER):
+        self.lookup: Dict[str, List[Tuple[str, str]]] = {}
+        for field, values in gazetteer.items():
+            for value, phrases in values.items():
+                for phrase in phrases:
+                    self.lookup.setdefault(phrase.lower(), []).append((field, value))
+        alternatives = sorted(self.lookup, key=len, reverse=True)
+        self.scanner = re.compile(
+            r"(?<![\w-])(?:" + "|".join(re.escape(p).replace(r'\ ', r'\s+') for p in alternatives) + r")(?![\w-])",
+            re.IGNORECASE
+        )
+        self.fields = list(gazetteer)
+
+    def extract(self, query: str) -> Tuple[Dict[str, List[str]], float]:
+        """SearchMetadata-shaped filters for query and how confident the match is"""
+        metadata = {field: [] for field in self.fields}
+        confidence = 0.0
+        for match in self.scanner.finditer(query):
+            phrase = ' '.join(match.group(0).lower().split())
+            for field, value in self.lookup[phrase]:
+                if value not in metadata[field]:
+                    metadata[field].append(value)
+            confidence = max(confidence, 0.5 if phrase in WEAK_PHRASES else 1.0)
+        return metadata, confidence
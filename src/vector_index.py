@@ -0,0 +1,323 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Metadata keys that can be filtered on, as produced by build_metadata_filter
+FILTER_KEYS = ('command_category', 'component_type', 'resource_type', 'environment', 'os_compatibility')
+
+class SupabaseVectorBackend:
+    """Remote search through the match_documents_with_filters RPC"""
+
+    def __init__(self, client, version_interval: float = 10.0):
+        self.client = client
+        self.version_interval = version_interval
+        self._version: Optional[str] = None
+        self._version_checked = 0.0
+        self._version_lock = threading.Lock()
+
+    def data_version(self) -> Optional[str]:
+        """Highest id and row count of the documents table, probed at most every version_interval seconds
+
+        New chunks get new ids and stale ones are deleted, so any scrape that
+        adds or removes chunks changes it. Metadata-only updates to existing
+        rows do not; cached results carrying those are bounded by the TTL.
+        """
+        with self._version_lock:
+            if time.monotonic() - self._version_checked < self.version_interval:
+                return self._version
+            try:
+                result = (self.client.table('documents').select('id', count='exact')
+                          .order('id', desc=True).limit(1).execute())
+                last_id = result.data[0]['id'] if result.data else 0
+                self._version = f"{last_id}:{result.count}"
+            except Exception as e:
+                # Keep the last known version; the next call probes again
+                logger.error(f"Probing the documents table version failed: {str(e)}")
+                return self._version
+            self._version_checked = time.monotonic()
+            return self._version
+
+    def search(self, query_embedding: List[float], match_threshold: float, match_count: int,
+               filter_conditions: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        result = self.client.rpc(
+            'match_documents_with_filters',
+            {
+                'query_embedding': query_embedding,
+                'match_threshold': match_threshold,
+                'match_count': match_count,
+                'filter_conditions': filter_conditions
+            }
+        ).execute()
+        return result.data
+
+def _parse_embedding(value) -> List[float]:
+    # PostgREST returns pgvector columns as their text form
+    return json.loads(value) if isinstance(value, str) else value
+
+def _kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids for normalized vectors"""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), k * 64), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for list_id in range(k):
+            members = sample[assignment == list_id]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[list_id] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return centroids
+
+class _Snapshot(NamedTuple):
+    version: str
+    embeddings: np.ndarray
+    centroids: np.ndarray
+    offsets: np.ndarray
+    bitmaps: Dict[str, np.ndarray]
+    rows: List[Dict]
+    count: int
+
+class LocalVectorIndex:
+    """Read-only, memory-mapped snapshot of the documents table with an IVF index
+
+    A snapshot directory holds the normalized float32 embeddings (grouped by
+    IVF list so each list is one contiguous slice), the IVF centroids, one
+    packed bitmap per filterable metadata value, and the rows themselves.
+    Embeddings are opened with np.memmap, so every worker process on a host
+    shares the same page-cache copy. refresh() writes a new snapshot next to
+    the current one and switches the CURRENT pointer; readers pick it up on
+    their next search. A snapshot is loaded whole and published as one
+    immutable object, so searches on other threads see either the old one or
+    the new one, never a mix.
+    """
+
+    exact_below = 4096  # Scanning everything is as fast as probing below this size
+
+    def __init__(self, path: str, nprobe: int = 8):
+        self.path = path
+        self.nprobe = nprobe
+        self.snapshot: Optional[_Snapshot] = None
+        self._load_lock = threading.Lock()
+        self._load()
+
+    # Reading
+
+    def _current(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.path, 'CURRENT')) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def data_version(self) -> Optional[str]:
+        """Snapshot the next search will read, for invalidating cached results"""
+        return self._current()
+
+    def _load(self) -> Optional[_Snapshot]:
+        """The current snapshot, switching to a newer one first if CURRENT moved"""
+        snapshot = self.snapshot
+        version = self._current()
+        if version is None or (snapshot is not None and version == snapshot.version):
+            return snapshot
+        with self._load_lock:
+            # Another thread may have loaded it while this one waited
+            if self.snapshot is not None and self.snapshot.version == version:
+                return self.snapshot
+            directory = os.path.join(self.path, version)
+            with open(os.path.join(directory, 'manifest.json')) as f:
+                manifest = json.load(f)
+            with open(os.path.join(directory, 'rows.json')) as f:
+                rows = json.load(f)
+            count, dim = manifest['count'], manifest['dim']
+            bitmaps = np.load(os.path.join(directory, 'bitmaps.npz'))
+            self.snapshot = _Snapshot(
+                version=version,
+                embeddings=(np.memmap(os.path.join(directory, 'embeddings.f32'), dtype=np.float32,
+                                      mode='r', shape=(count, dim)) if count else np.zeros((0, dim), np.float32)),
+                centroids=np.load(os.path.join(directory, 'centroids.npy')),
+                offsets=np.load(os.path.join(directory, 'offsets.npy')),
+                bitmaps={name: bitmaps[name] for name in bitmaps.files},
+                rows=rows,
+                count=count
+            )
+        logger.info(f"Loaded vector snapshot {version} with {count} rows")
+        return self.snapshot
+
+    @staticmethod
+    def _filter_mask(snapshot: _Snapshot, filter_conditions: Dict[str, List[str]]) -> Optional[np.ndarray]:
+        """Rows matching any value of every filtered key, from the precomputed bitmaps"""
+        mask = None
+        for key, values in filter_conditions.items():
+            packed = np.zeros((snapshot.count + 7) // 8, dtype=np.uint8)
+            for value in values:
+                bitmap = snapshot.bitmaps.get(f"{key}={value}")
+                if bitmap is not None:
+                    packed |= bitmap
+            mask = packed if mask is None else mask & packed
+        return None if mask is None else np.unpackbits(mask, count=snapshot.count).astype(bool)
+
+    def search(self, query_embedding: List[float], match_threshold: float, match_count: int,
+               filter_conditions: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        # Read once: a reload on another thread swaps in a new snapshot, never parts of one
+        snapshot = self._load()
+        if snapshot is None or not snapshot.count:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+
+        mask = self._filter_mask(snapshot, filter_conditions)
+        matching = snapshot.count if mask is None else int(mask.sum())
+        if matching < self.exact_below or len(snapshot.centroids) <= self.nprobe:
+            # Few enough rows to score them all; also keeps selective filters
+            # from starving the probed lists of matches
+            if mask is None:
+                candidates, scores = np.arange(snapshot.count), np.asarray(snapshot.embeddings @ query)
+            else:
+                candidates = np.flatnonzero(mask)
+                scores = snapshot.embeddings[candidates] @ query
+        else:
+            probe = np.argpartition(snapshot.centroids @ query, -self.nprobe)[-self.nprobe:]
+            # Each list is a contiguous slice, scored in place without copying
+            slices = [(snapshot.offsets[l], snapshot.offsets[l + 1]) for l in probe]
+            candidates = np.concatenate([np.arange(start, end) for start, end in slices])
+            scores = np.concatenate([snapshot.embeddings[start:end] @ query for start, end in slices])
+            if mask is not None:
+                keep = mask[candidates]
+                candidates, scores = candidates[keep], scores[keep]
+        if not len(candidates):
+            return []
+
+        keep = scores >= match_threshold
+        candidates, scores = candidates[keep], scores[keep]
+        top = np.argsort(-scores)[:match_count]
+        return [{**snapshot.rows[i], 'similarity': float(s)} for i, s in zip(candidates[top], scores[top])]
+
+    # Writing
+
+    def refresh(self, client, page_size: int = 1000, full: bool = False) -> bool:
+        """Bring the snapshot up to date with the documents table
+
+        Only rows added since the current snapshot have their embeddings
+        downloaded; rows that disappeared are dropped. Returns True when a new
+        snapshot was written.
+
+        Rows are matched by id alone. Changed text needs nothing more, since
+        DocumentWriter keys rows on (url, chunk_hash) and new content gets a
+        new row. Edits made in place, such as a metadata backfill, are not
+        seen; pass full=True after them.
+        """
+        self._load()
+        live_ids = []
+        last_id = 0
+        while True:
+            page = (client.table('documents').select('id')
+                    .gt('id', last_id).order('id').limit(page_size).execute().data)
+            live_ids.extend(row['id'] for row in page)
+            if len(page) < page_size:
+                break
+            last_id = page[-1]['id']
+        live = set(live_ids)
+
+        snapshot = self.snapshot
+        old_rows, old_embeddings = [], None
+        if snapshot is not None and not full:
+            old_rows, old_embeddings = snapshot.rows, snapshot.embeddings
+        known = {row['id'] for row in old_rows}
+        kept = [i for i, row in enumerate(old_rows) if row['id'] in live]
+        new_ids = sorted(live - known)
+        if snapshot is not None and not full and not new_ids and len(kept) == len(old_rows):
+            return False
+
+        rows = [old_rows[i] for i in kept]
+        vectors = [np.asarray(old_embeddings[kept])] if kept else []
+        for start in range(0, len(new_ids), page_size):
+            batch = new_ids[start:start + page_size]
+            fetched = (client.table('documents').select('id', 'content', 'metadata', 'embedding')
+                       .in_('id', batch).execute().data)
+            if not fetched:
+                continue
+            matrix = np.asarray([_parse_embedding(row['embedding']) for row in fetched], dtype=np.float32)
+            matrix /= np.linalg.norm(matrix, axis=1, keepdims=True).clip(min=1e-12)
+            vectors.append(matrix)
+            rows.extend({'id': row['id'], 'content': row['content'], 'metadata': row['metadata'] or {}}
+                        for row in fetched)
+
+        self._write(rows, np.concatenate(vectors) if vectors else np.zeros((0, 0), np.float32))
+        self._load()
+        logger.info(f"Vector snapshot refreshed: {len(new_ids)} new rows, "
+                    f"{len(old_rows) - len(kept)} removed, {len(rows)} total")
+        return True
+
+    def _write(self, rows: List[Dict], embeddings: np.ndarray):
+        count, dim = embeddings.shape if embeddings.size else (0, 0)
+        nlist = max(1, int(np.sqrt(count))) if count >= self.exact_below else 1
+        if nlist > 1:
+            centroids = _kmeans(embeddings, nlist)
+            assignment = np.argmax(embeddings @ centroids.T, axis=1)
+        else:
+            centroids = np.zeros((1, dim), np.float32)
+            assignment = np.zeros(count, dtype=np.int64)
+
+        # Group rows by list so each list is a contiguous slice of the matrix
+        order = np.argsort(assignment, kind='stable')
+        embeddings, rows = embeddings[order], [rows[i] for i in order]
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=nlist))])
+
+        bitmaps = {}
+        for key in FILTER_KEYS:
+            for i, row in enumerate(rows):
+                values = row['metadata'].get(key)
+                for value in values if isinstance(values, list) else [values]:
+                    if value is not None:
+                        bitmaps.setdefault(f"{key}={value}", np.zeros(count, dtype=bool))[i] = True
+
+        version = f"v{time.time_ns()}"
+        directory = os.path.join(self.path, version)
+        os.makedirs(directory)
+        if count:
+            np.ascontiguousarray(embeddings, dtype=np.float32).tofile(os.path.join(directory, 'embeddings.f32'))
+        np.save(os.path.join(directory, 'centroids.npy'), centroids)
+        np.save(os.path.join(directory, 'offsets.npy'), offsets)
+        np.savez(os.path.join(directory, 'bitmaps.npz'), **{k: np.packbits(v) for k, v in bitmaps.items()})
+        with open(os.path.join(directory, 'rows.json'), 'w') as f:
+            json.dump(rows, f)
+        with open(os.path.join(directory, 'manifest.json'), 'w') as f:
+            json.dump({'count': int(count), 'dim': int(dim), 'nlist': nlist, 'created_at': time.time()}, f)
+
+        # Switch readers over atomically, then drop snapshots nobody points at
+        pointer = os.path.join(self.path, 'CURRENT.tmp')
+        with open(pointer, 'w') as f:
+            f.write(version)
+        os.replace(pointer, os.path.join(self.path, 'CURRENT'))
+        # The snapshot searches may still be reading stays until the next refresh
+        loaded = self.snapshot.version if self.snapshot is not None else None
+        for name in os.listdir(self.path):
+            if name.startswith('v') and name not in (version, loaded):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    parser = argparse.ArgumentParser(description="Build or refresh the local vector snapshot")
+    parser.add_argument('--path', default=os.getenv('VECTOR_INDEX_PATH', 'vector_index'))
+    parser.add_argument('--full', action='store_true',
+                        help="Rebuild from scratch instead of applying changes. Without it only added and "
+                             "deleted rows are picked up; run with --full after updating rows in place "
+                             "(e.g. a metadata backfill)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+    os.makedirs(args.path, exist_ok=True)
+    LocalVectorIndex(args.path).refresh(create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")),
+                                        full=args.full)